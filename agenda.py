@@ -0,0 +1,238 @@
+import bisect
+import datetime
+import heapq
+import math
+import re
+from collections import defaultdict
+
+# Agenda de colaboradores: quién trabaja en qué evento, choques de horario
+# y propuestas de asignación.
+#
+# Cada evento ocupa un intervalo del día (desde su Horario y durante
+# DURACION_MINUTOS, más un margen para el traslado); si pasa de la
+# medianoche, lo que sobra ocupa el principio del día siguiente. Los
+# intervalos se guardan por día y ordenados por inicio (el índice de
+# intervalos), así revisar si alguien está libre es una búsqueda binaria
+# en sus eventos de ese día, y detectar choques de toda una temporada es
+# un solo recorrido ordenado por colaborador y día.
+
+# Duración de un evento y margen de traslado entre eventos (minutos)
+DURACION_MINUTOS = 4 * 60
+MARGEN_MINUTOS = 60
+
+# Personas que atiende cada colaborador (para calcular cuántos necesita un evento)
+PERSONAS_POR_COLABORADOR = 50
+
+_SEPARADORES = re.compile(r"\s*(?:[,;/\n]|\by\b)\s*")
+
+
+# Nombres de colaboradores de un texto libre ("Juan, Luis y Ana"), sin
+# repetir y con mayúscula inicial
+def separar_colaboradores(texto):
+    nombres = []
+    for nombre in _SEPARADORES.split(texto or ""):
+        nombre = " ".join(nombre.split()).title()
+        if nombre and nombre not in nombres:
+            nombres.append(nombre)
+    return nombres
+
+
+# Unir nombres en el formato de la columna colaboradores
+def unir_colaboradores(nombres):
+    return ", ".join(nombres)
+
+
+# Colaboradores que necesita un evento según sus personas
+def colaboradores_necesarios(personas):
+    return max(1, math.ceil((personas or 0) / PERSONAS_POR_COLABORADOR))
+
+
+MINUTOS_DIA = 24 * 60
+
+
+# Minutos del día que ocupa el evento (inicio, fin); el fin puede pasar de
+# MINUTOS_DIA si el evento cruza la medianoche. Sin horario ocupa el día completo.
+def _intervalo(horario):
+    try:
+        horas, minutos = str(horario).split(":")[:2]
+        inicio = int(horas) * 60 + int(minutos)
+    except (ValueError, TypeError):
+        return 0, MINUTOS_DIA
+    return inicio, inicio + DURACION_MINUTOS + MARGEN_MINUTOS
+
+
+# Tramos (día, inicio, fin) que ocupa un intervalo: el del día del evento
+# y, si cruza la medianoche, el principio del día siguiente
+def _tramos(dia, inicio, fin):
+    if fin <= MINUTOS_DIA:
+        return [(dia, inicio, fin)]
+    try:
+        siguiente = (datetime.date.fromisoformat(dia) + datetime.timedelta(days=1)).isoformat()
+    except (ValueError, TypeError):
+        return [(dia, inicio, MINUTOS_DIA)]
+    return [(dia, inicio, MINUTOS_DIA), (siguiente, 0, fin - MINUTOS_DIA)]
+
+
+class Agenda:
+    def __init__(self):
+        self.eventos = {}                          # rowid -> (día, inicio, fin, personas)
+        self.asignaciones = defaultdict(list)      # colaborador -> [rowid, ...]
+        self.personal = {}                         # rowid -> [colaborador, ...]
+        self.plantilla = []                        # todos los colaboradores (tabla staff)
+        # Índice de intervalos: (colaborador, día) -> [(inicio, fin, rowid)] ordenado
+        self._ocupado = defaultdict(list)
+
+    # Agenda de los eventos entre `desde` y `hasta` ('AAAA-MM-DD', incluidas;
+    # sin rango se lee toda la tabla) con una sola consulta, más la
+    # plantilla de colaboradores para las propuestas
+    @classmethod
+    def leer(cls, conexion, desde=None, hasta=None):
+        sql = """
+            SELECT t.id, substr(t."Fecha", 1, 10), t."Horario", t."Cantidad de personas", s.nombre
+            FROM taquizas t
+            LEFT JOIN event_staff es ON es.rowid_taquiza = t.id
+            LEFT JOIN staff s ON s.id = es.staff_id
+        """
+        parametros = []
+        if desde is not None and hasta is not None:
+            sql += ' WHERE t."Fecha" >= ? AND t."Fecha" < date(?, \'+1 day\')'
+            parametros = [desde, hasta]
+        agenda = cls()
+        agenda.plantilla = [fila[0] for fila in conexion.execute("SELECT nombre FROM staff ORDER BY nombre")]
+        for rowid, dia, horario, personas, colaborador in conexion.execute(sql + " ORDER BY t.id, es.posicion", parametros):
+            if rowid not in agenda.eventos:
+                agenda.agregar_evento(rowid, dia, horario, personas)
+            if colaborador is not None:
+                agenda.asignar(colaborador, rowid)
+        return agenda
+
+    def agregar_evento(self, rowid, dia, horario, personas, colaboradores=()):
+        inicio, fin = _intervalo(horario)
+        self.eventos[rowid] = (dia, inicio, fin, personas)
+        self.personal[rowid] = []
+        for colaborador in colaboradores:
+            self.asignar(colaborador, rowid)
+
+    def _tramos_de(self, rowid):
+        dia, inicio, fin, _ = self.eventos[rowid]
+        return _tramos(dia, inicio, fin)
+
+    def asignar(self, colaborador, rowid):
+        self.asignaciones[colaborador].append(rowid)
+        self.personal[rowid].append(colaborador)
+        for dia, inicio, fin in self._tramos_de(rowid):
+            bisect.insort(self._ocupado[(colaborador, dia)], (inicio, fin, rowid))
+
+    # Cambiar todo el personal de un evento (para revisar cambios antes de guardarlos)
+    def reemplazar_personal(self, rowid, colaboradores):
+        for colaborador in self.personal[rowid]:
+            self.asignaciones[colaborador].remove(rowid)
+            for dia, inicio, fin in self._tramos_de(rowid):
+                self._ocupado[(colaborador, dia)].remove((inicio, fin, rowid))
+        self.personal[rowid] = []
+        for colaborador in colaboradores:
+            self.asignar(colaborador, rowid)
+
+    # ¿Está libre el colaborador durante el evento? Búsqueda binaria en sus
+    # intervalos de cada día que ocupa el evento: sólo pueden cruzarse el
+    # anterior y el siguiente
+    def libre(self, colaborador, rowid):
+        for dia, inicio, fin in self._tramos_de(rowid):
+            ocupados = self._ocupado.get((colaborador, dia), [])
+            i = bisect.bisect_left(ocupados, (inicio, fin, rowid))
+            if i > 0 and ocupados[i - 1][1] > inicio:
+                return False
+            if i < len(ocupados) and ocupados[i][0] < fin:
+                return False
+        return True
+
+    # Choques de horario: [(colaborador, día, rowid_a, rowid_b), ...], cada
+    # par de eventos que se cruzan una vez (con el primer día en que se
+    # cruzan). Por colaborador y día los intervalos ya están ordenados por
+    # inicio; al recorrerlos se mantienen los activos (los que todavía no
+    # terminan) y el evento nuevo choca con todos ellos.
+    def conflictos(self):
+        encontrados = {}
+        for (colaborador, dia), ocupados in self._ocupado.items():
+            activos = []
+            for inicio, fin, rowid in ocupados:
+                activos = [(otro_fin, otro) for otro_fin, otro in activos if otro_fin > inicio]
+                for _, otro in activos:
+                    par = (colaborador, min(otro, rowid), max(otro, rowid))
+                    if par not in encontrados or dia < encontrados[par][1]:
+                        encontrados[par] = (colaborador, dia, otro, rowid)
+                activos.append((fin, rowid))
+        return sorted(encontrados.values(), key=lambda c: (c[1], c[0]))
+
+    # Choques que tendría un evento con otra lista de colaboradores
+    # (para avisar antes de guardar): [(colaborador, rowid_en_conflicto), ...]
+    def conflictos_de(self, rowid, colaboradores):
+        encontrados = []
+        for colaborador in colaboradores:
+            for dia, inicio, fin in self._tramos_de(rowid):
+                for otro_inicio, otro_fin, otro in self._ocupado.get((colaborador, dia), []):
+                    if otro != rowid and otro_inicio < fin and inicio < otro_fin \
+                            and (colaborador, otro) not in encontrados:
+                        encontrados.append((colaborador, otro))
+        return encontrados
+
+    # Carga de cada colaborador (eventos asignados)
+    def carga(self):
+        return {colaborador: len(eventos) for colaborador, eventos in self.asignaciones.items()}
+
+    # Proponer colaboradores para los eventos con menos de los necesarios,
+    # en orden cronológico, eligiendo siempre a los libres con menos carga
+    # (un montículo por carga). Sin lista de candidatos se usa la plantilla
+    # completa (también quien no tiene eventos en el rango). Las propuestas
+    # se agregan a la agenda y se devuelven como
+    # [(rowid, [colaboradores nuevos], faltantes), ...].
+    def proponer(self, colaboradores=None):
+        if colaboradores is None:
+            colaboradores = set(self.plantilla) | set(self.asignaciones)
+        colaboradores = sorted(colaboradores)
+        carga = self.carga()
+        propuestas = []
+        for rowid in sorted(self.eventos, key=lambda r: self.eventos[r][:2]):
+            faltan = colaboradores_necesarios(self.eventos[rowid][3]) - len(self.personal[rowid])
+            if faltan <= 0:
+                continue
+            monticulo = [(carga.get(c, 0), c) for c in colaboradores if c not in self.personal[rowid]]
+            heapq.heapify(monticulo)
+            nuevos = []
+            while monticulo and len(nuevos) < faltan:
+                _, colaborador = heapq.heappop(monticulo)
+                if self.libre(colaborador, rowid):
+                    self.asignar(colaborador, rowid)
+                    carga[colaborador] = carga.get(colaborador, 0) + 1
+                    nuevos.append(colaborador)
+            propuestas.append((rowid, nuevos, faltan - len(nuevos)))
+        return propuestas
+
+
+# Choques que habría si se guardan varios cambios de personal a la vez:
+# {rowid: colaboradores en texto libre}. Sólo lee los eventos de los días
+# entre el primero y el último de los cambios (más el día anterior, por los
+# eventos que cruzan la medianoche), y también encuentra choques
+# entre dos eventos cambiados. Devuelve [(colaborador, día, rowid_a, rowid_b), ...].
+def choques_en_cambios(conexion, cambios):
+    if not cambios:
+        return []
+    marcas = ", ".join("?" for _ in cambios)
+    dias = conexion.execute(
+        f'SELECT date(MIN(substr("Fecha", 1, 10)), \'-1 day\'), MAX(substr("Fecha", 1, 10)) '
+        f'FROM taquizas WHERE id IN ({marcas})',
+        list(cambios)).fetchone()
+    if dias[0] is None:
+        return []
+    agenda = Agenda.leer(conexion, dias[0], dias[1])
+    for rowid, colaboradores in cambios.items():
+        if rowid in agenda.eventos:
+            agenda.reemplazar_personal(rowid, separar_colaboradores(colaboradores))
+    return [choque for choque in agenda.conflictos() if choque[2] in cambios or choque[3] in cambios]
+
+
+# Choques que tendría una taquiza si se le asignan `colaboradores` (texto
+# libre): [(colaborador, rowid_en_conflicto), ...]
+def choques_al_asignar(conexion, rowid, colaboradores):
+    return [(colaborador, b if a == rowid else a)
+            for colaborador, _, a, b in choques_en_cambios(conexion, {rowid: colaboradores})]
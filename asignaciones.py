@@ -0,0 +1,133 @@
+import filtros
+from agenda import separar_colaboradores
+from migraciones import COLUMNAS_ASIGNACION
+
+# Consultas de la pantalla de asignación de colaboradores e insumos.
+# Los colaboradores y los kilos se guardan normalizados (staff,
+# event_staff, event_supplies); la vista asignaciones_taquizas los
+# devuelve en la forma de la pantalla: (colaboradores, kg_...).
+
+# Insumos en kilos que se asignan a cada taquiza
+INSUMOS = tuple(nombre for nombre, _ in COLUMNAS_ASIGNACION if nombre.startswith('kg_'))
+
+_COLUMNAS_ASIGNACION = ("colaboradores",) + INSUMOS
+
+
+# Nombre del insumo en event_supplies ('kg_pastor' -> 'pastor')
+def nombre_insumo(columna):
+    return columna[3:] if columna.startswith('kg_') else columna
+
+
+# Lista de taquizas (las que cumplen el filtro, ver filtros.py) con su
+# asignación actual: [(rowid, nombre, fecha, personas, colaboradores, kg_...), ...]
+def leer_asignaciones(conexion, filtro=None):
+    where, parametros = filtros.clausula(filtro, 't')
+    return conexion.execute(
+        'SELECT t.id, "Nombre del solicitante", "Fecha", "Cantidad de personas", '
+        + ", ".join(_COLUMNAS_ASIGNACION)
+        + " FROM taquizas t JOIN asignaciones_taquizas a ON a.rowid_taquiza = t.id"
+        + where + ' ORDER BY t."Fecha", t.id', parametros
+    ).fetchall()
+
+
+# Asignación de una taquiza: (colaboradores, kg_...) o None si no existe
+def leer_asignacion(conexion, rowid):
+    return conexion.execute(
+        "SELECT " + ", ".join(_COLUMNAS_ASIGNACION) + " FROM asignaciones_taquizas WHERE rowid_taquiza = ?", (rowid,)
+    ).fetchone()
+
+
+# Convertir los kilos capturados a números; lanza ValueError si alguno no lo es
+def convertir_insumos(valores):
+    return tuple(float(valor) for valor in valores)
+
+
+# Validar los cambios de la edición en lote: {rowid: (colaboradores, kg...)}
+# con los kilos como texto. Devuelve (filas, errores) con filas
+# [(rowid, colaboradores, kilos), ...] y errores [(rowid, mensaje), ...].
+def validar_cambios(cambios):
+    filas, errores = [], []
+    for rowid, (colaboradores, *kilos) in cambios.items():
+        try:
+            kilos = convertir_insumos(kilos)
+        except ValueError:
+            errores.append((rowid, "los kilos deben ser números"))
+            continue
+        negativos = [columna for columna, kg in zip(INSUMOS, kilos) if kg < 0]
+        if negativos:
+            errores.append((rowid, "kilos negativos en " + ", ".join(negativos)))
+            continue
+        filas.append((rowid, colaboradores, kilos))
+    return filas, errores
+
+
+# Reemplazar los colaboradores de varias taquizas: filas (colaboradores, rowid)
+# con los colaboradores en texto libre ("Juan, Luis y Ana"). Los nombres
+# nuevos se dan de alta en staff.
+def guardar_colaboradores(conexion, filas):
+    filas = [(rowid, separar_colaboradores(texto)) for texto, rowid in filas]
+    conexion.executemany("DELETE FROM event_staff WHERE rowid_taquiza = ?", [(rowid,) for rowid, _ in filas])
+    conexion.executemany("INSERT OR IGNORE INTO staff (nombre) VALUES (?)",
+                         [(nombre,) for _, nombres in filas for nombre in nombres])
+    conexion.executemany(
+        "INSERT OR IGNORE INTO event_staff (rowid_taquiza, staff_id, posicion) "
+        "SELECT ?, id, ? FROM staff WHERE nombre = ?",
+        [(rowid, posicion, nombre) for rowid, nombres in filas for posicion, nombre in enumerate(nombres)])
+    return len(filas)
+
+
+# Reemplazar los kilos de varias taquizas: filas (kg_... en el orden de
+# INSUMOS, rowid). Sólo se guardan los insumos distintos de cero.
+def guardar_insumos(conexion, filas):
+    filas = [(rowid, tuple(kilos)) for *kilos, rowid in filas]
+    conexion.executemany("DELETE FROM event_supplies WHERE rowid_taquiza = ?", [(rowid,) for rowid, _ in filas])
+    conexion.executemany(
+        "INSERT INTO event_supplies (rowid_taquiza, insumo, kg) VALUES (?, ?, ?)",
+        [(rowid, nombre_insumo(columna), kg)
+         for rowid, kilos in filas for columna, kg in zip(INSUMOS, kilos) if kg])
+    return len(filas)
+
+
+# Guardar varias asignaciones: filas (rowid, colaboradores, kilos en el
+# orden de INSUMOS), con una sentencia preparada por tabla (la transacción
+# la abre quien llama)
+def guardar_asignaciones(conexion, filas):
+    guardar_colaboradores(conexion, [(colaboradores, rowid) for rowid, colaboradores, _ in filas])
+    guardar_insumos(conexion, [tuple(kilos) + (rowid,) for rowid, _, kilos in filas])
+    return len(filas)
+
+
+# Guardar colaboradores y kilos (en el orden de INSUMOS) de una taquiza;
+# devuelve la cantidad de filas afectadas
+def guardar_asignacion(conexion, rowid, colaboradores, kilos):
+    if conexion.execute("SELECT 1 FROM taquizas WHERE id = ?", (rowid,)).fetchone() is None:
+        return 0
+    return guardar_asignaciones(conexion, [(rowid, colaboradores, kilos)])
+
+
+# Taquizas de un colaborador (búsqueda en el índice por colaborador):
+# [(rowid, fecha, horario, nombre del solicitante), ...] por fecha
+def eventos_de_colaborador(conexion, nombre, desde=None, hasta=None):
+    sql = """
+        SELECT t.id, t."Fecha", t."Horario", t."Nombre del solicitante"
+        FROM staff s
+        JOIN event_staff es ON es.staff_id = s.id
+        JOIN taquizas t ON t.id = es.rowid_taquiza
+        WHERE s.nombre = ?
+    """
+    parametros = [nombre]
+    if desde is not None and hasta is not None:
+        sql += ' AND t."Fecha" >= ? AND t."Fecha" < date(?, \'+1 day\')'
+        parametros += [desde, hasta]
+    return conexion.execute(sql + ' ORDER BY t."Fecha", t.id', parametros).fetchall()
+
+
+# Total de kilos de un insumo ('pastor' o 'kg_pastor') entre dos fechas
+# ('AAAA-MM-DD', incluidas), con el índice por insumo
+def total_insumo(conexion, insumo, desde, hasta):
+    return conexion.execute("""
+        SELECT COALESCE(SUM(su.kg), 0)
+        FROM event_supplies su
+        JOIN taquizas t ON t.id = su.rowid_taquiza
+        WHERE su.insumo = ? AND t."Fecha" >= ? AND t."Fecha" < date(?, '+1 day')
+    """, (nombre_insumo(insumo), desde, hasta)).fetchone()[0]
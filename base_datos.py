@@ -0,0 +1,153 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Ruta por defecto de la base de datos de taquizas
+RUTA_DB = 'taquizas_db.sqlite'
+
+# Cantidad de sentencias preparadas que sqlite3 guarda por conexión.
+# Como las conexiones viven todo el proceso, las consultas repetidas
+# (mismo texto SQL) se reutilizan en lugar de compilarse en cada clic.
+SENTENCIAS_EN_CACHE = 256
+
+# Pragmas aplicados a cada conexión nueva
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",        # lectores y escritor no se bloquean entre sí
+    "PRAGMA synchronous = NORMAL",      # seguro con WAL y mucho más rápido que FULL
+    "PRAGMA cache_size = -16000",       # ~16 MB de caché de páginas por conexión
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+# Capa de acceso a datos: un pool pequeño de conexiones de larga vida.
+# Cada hilo toma una conexión prestada con `conexion()` (lecturas) o
+# `transaccion()` (escrituras) y la devuelve al salir del bloque `with`.
+# Las escrituras se serializan con un candado para que nunca compitan
+# por el bloqueo de la base de datos.
+class BaseDatos:
+    def __init__(self, ruta=RUTA_DB, tamano_pool=4):
+        self.ruta = ruta
+        self.tamano_pool = tamano_pool
+        self._pool = queue.LifoQueue()
+        self._creadas = 0
+        self._candado_pool = threading.Lock()
+        self._candado_escritura = threading.RLock()
+        self._local = threading.local()
+        self._todas = []
+        self._cerrada = False
+        # Marcador de cambios (ver version_datos): conexión que nunca
+        # escribe, último `PRAGMA data_version` visto y la revisión leída
+        self._observador = None
+        self._version_vista = None
+        self._revision = None
+        self._candado_observador = threading.Lock()
+
+    # Abrir una conexión nueva con los pragmas de rendimiento
+    def _abrir(self):
+        conexion = sqlite3.connect(
+            self.ruta,
+            isolation_level=None,  # las transacciones se controlan con transaccion()
+            check_same_thread=False,
+            cached_statements=SENTENCIAS_EN_CACHE,
+        )
+        for pragma in PRAGMAS:
+            conexion.execute(pragma)
+        return conexion
+
+    # Tomar una conexión del pool, creando una si todavía hay cupo
+    def _tomar(self):
+        if self._cerrada:
+            raise sqlite3.ProgrammingError("La base de datos ya fue cerrada.")
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._candado_pool:
+            if self._creadas < self.tamano_pool:
+                conexion = self._abrir()
+                self._creadas += 1
+                self._todas.append(conexion)
+                return conexion
+        return self._pool.get()
+
+    # Préstamo de conexión para lecturas. Es reentrante: si el hilo ya
+    # tiene una conexión prestada se reutiliza la misma.
+    @contextmanager
+    def conexion(self):
+        actual = getattr(self._local, 'conexion', None)
+        if actual is not None:
+            yield actual
+            return
+        conexion = self._tomar()
+        self._local.conexion = conexion
+        try:
+            yield conexion
+        finally:
+            self._local.conexion = None
+            if conexion.in_transaction:
+                conexion.rollback()
+            self._pool.put(conexion)
+
+    # Transacción de escritura: BEGIN IMMEDIATE, COMMIT al terminar el
+    # bloque y ROLLBACK si ocurre cualquier excepción. Las transacciones
+    # anidadas en el mismo hilo se unen a la transacción exterior.
+    @contextmanager
+    def transaccion(self):
+        with self._candado_escritura, self.conexion() as conexion:
+            if conexion.in_transaction:
+                yield conexion
+                return
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexion
+            except BaseException:
+                conexion.rollback()
+                raise
+            else:
+                conexion.commit()
+
+    # Marcador barato de la versión de los datos de eventos: la revisión que
+    # suben los disparadores de taquizas y de las tablas de asignación
+    # (migración 11), así que cambia con cada cambio de eventos, propio o de
+    # otro proceso, pero no con escrituras en otras tablas (puntajes,
+    # modelos guardados, recetas). Sirve como parte de la llave de las
+    # cachés de resultados. La revisión sólo se vuelve a leer cuando
+    # `PRAGMA data_version` de una conexión que nunca escribe indica que se
+    # confirmó alguna escritura.
+    def version_datos(self):
+        with self._candado_observador:
+            if self._cerrada:
+                raise sqlite3.ProgrammingError("La base de datos ya fue cerrada.")
+            if self._observador is None:
+                self._observador = self._abrir()
+            externa = self._observador.execute("PRAGMA data_version").fetchone()[0]
+            if externa != self._version_vista:
+                try:
+                    self._revision = self._observador.execute(
+                        "SELECT revision FROM revision_datos WHERE id = 1").fetchone()[0]
+                except sqlite3.OperationalError:
+                    # Base sin migrar: cualquier escritura cuenta como cambio
+                    self._revision = ('data_version', externa)
+                self._version_vista = externa
+            return self._revision
+
+    # Cerrar todas las conexiones (al salir de la aplicación)
+    def cerrar(self):
+        with self._candado_pool:
+            self._cerrada = True
+            for conexion in self._todas:
+                try:
+                    # Refrescar estadísticas del planificador si la tabla creció
+                    conexion.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+                conexion.close()
+            self._todas = []
+            self._creadas = 0
+        with self._candado_observador:
+            if self._observador is not None:
+                self._observador.close()
+                self._observador = None
@@ -0,0 +1,586 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import agenda
+import asignaciones
+import dependencias
+import estadisticas
+import insumos
+import nucleo
+import pronosticos
+import registros
+import segmentacion
+import sentimientos
+from migraciones import RECETA_GENERAL
+
+# Pruebas de rendimiento con datos sintéticos.
+#
+# Primero se genera una base de taquizas del tamaño pedido (10 mil, 100 mil
+# o un millón de eventos) con zonas, fechas con temporada, comentarios,
+# colaboradores e insumos parecidos a los de la base real; cada base se
+# guarda en la carpeta de trabajo y se reutiliza en las siguientes
+# corridas (--regenerar la vuelve a crear).
+#
+# Después se mide cada operación de las pantallas y los análisis. Cada
+# medición corre en un proceso nuevo (como la aplicación recién abierta,
+# sin modelos ni resultados en memoria) y antes de medir se borran los
+# modelos y puntajes guardados en la base, así se mide el caso en frío.
+# El tiempo es la mediana de --repeticiones corridas; la memoria es el
+# pico de tracemalloc en una corrida aparte (tracemalloc hace más lento
+# el código Python). El pico sólo cuenta la memoria de objetos de Python
+# y numpy del proceso que mide: no incluye la caché de páginas de SQLite
+# ni los procesos auxiliares de sentimientos y pronósticos.
+#
+# El reporte se escribe en JSON; con --comparar se agrega a cada operación
+# la razón contra un reporte anterior (1.25 = 25 % más lenta).
+#
+# Uso: python benchmark.py --filas 10000 100000 --repeticiones 3
+#      python benchmark.py --filas 10000 --operaciones registros ordenar --comparar anterior.json
+
+TAMANOS = (10_000, 100_000, 1_000_000)
+
+# Filas por lote al generar (una sentencia preparada por lote)
+LOTE_GENERACION = 10_000
+
+# Filas por página de la grilla (la de GrillaPaginada)
+TAMANO_PAGINA = 100
+
+# Registros que se agregan, modifican y eliminan uno por uno (cada uno en
+# su propia transacción, como en la ventana)
+ESCRITURAS = 200
+
+# Nombre de los registros que agregan las pruebas de escritura
+NOMBRE_PRUEBA = "Prueba de rendimiento"
+
+# Proporciones de la base real
+ZONAS = ("sur", "norte", "centro", "alrededores")
+PESOS_ZONAS = (37, 25, 20, 18)
+TIPOS = ("boda", "cumpleaños", "xv años", "infantil", "graduacion", "empresarial")
+PESOS_TIPOS = (17, 18, 15, 14, 18, 18)
+PERSONAS_MIN, PERSONAS_MAX = 30, 250
+COSTO_POR_PERSONA = 70
+
+# Fechas de los eventos: cuatro años, con más eventos en temporada alta
+# (mayo, junio, julio y diciembre) y en fin de semana
+PRIMER_DIA = datetime.date(2022, 1, 1)
+DIAS = 4 * 365
+TEMPORADA = (0.7, 0.7, 0.8, 0.9, 1.2, 1.2, 1.1, 0.9, 0.9, 1.0, 1.1, 1.5)
+PESO_FIN_DE_SEMANA = 1.6
+
+FRACCION_CON_COMENTARIO = 0.5
+FRACCION_CON_PERSONAL = 0.6
+FRACCION_CON_INSUMOS = 0.6
+
+# Un colaborador por cada tantos eventos (el personal crece con la base)
+EVENTOS_POR_COLABORADOR = 150
+
+NOMBRES = (
+    "Roberto", "Cecilia", "Estela", "Teresa", "Juan", "Luis", "Ana", "María", "José", "Guadalupe",
+    "Francisco", "Alejandra", "Jorge", "Patricia", "Miguel", "Verónica", "Ricardo", "Rosa", "Fernando",
+    "Claudia", "Arturo", "Leticia", "Sergio", "Adriana", "Eduardo", "Gabriela", "Raúl", "Silvia",
+)
+APELLIDOS = (
+    "Jaime", "Almonte", "Miramontes", "Estrada", "Guevara", "Hernández", "García", "Martínez",
+    "López", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez", "Cruz", "Flores", "Gómez",
+    "Morales", "Vázquez", "Reyes", "Jiménez", "Torres", "Díaz", "Gutiérrez", "Ruiz", "Mendoza",
+)
+CALLES = (
+    "Periferico", "Retorno Estrada", "Ampliacion Francisco Villa", "Club Collado-Saiz", "Av. Juárez",
+    "Calle Hidalgo", "Privada Morelos", "Boulevard Independencia", "Calle Allende", "Colonia Centro",
+)
+
+# Comentarios armados con una apertura, un detalle y a veces un cierre
+# (miles de textos distintos, con repeticiones como en la base real)
+APERTURAS = (
+    "La carne estaba muy jugosa y bien sazonada", "El servicio fue muy lento", "Excelente servicio",
+    "La carne al pastor estaba espectacular", "El taco de bisteck estaba muy duro", "Muy buen servicio",
+    "La carne estaba fría", "Me encantó el taco de pastor", "El servicio fue lento",
+    "La carne de bisteck estaba demasiado cocida", "Todo llegó a tiempo", "Los taqueros fueron muy amables",
+    "Faltaron tortillas", "Las salsas estaban deliciosas", "El chorizo estaba muy grasoso",
+)
+DETALLES = (
+    "excelente calidad", "y la carne estaba seca", "el servicio fue rápido y amable",
+    "la carne no estaba bien cocida", "en su punto y deliciosa", "no lo recomiendo",
+    "increíblemente sabrosa", "esperaba más sabor", "pero el servicio fue muy regular",
+    "los invitados quedaron felices", "llegaron tarde", "muy limpio todo", "buena presentación",
+)
+CIERRES = ("", "", "", " Los volvería a contratar.", " No los vuelvo a llamar.", " Gracias por todo.",
+           " Recomendados.", " Muy caro para lo que es.")
+
+# Dependencias que se cargan antes de medir cada operación (en la
+# aplicación se precargan en segundo plano al arrancar)
+PRECARGA = {
+    'pronostico': ('pandas', 'arima'),
+    'pronostico_grupos': ('pandas', 'arima'),
+    'sentimientos': ('analizador_sentimientos',),
+    'segmentacion': ('pandas', 'minibatch_kmeans'),
+    'insumos': ('numpy',),
+}
+
+
+# --- Generación de datos ---
+
+# Días posibles y pesos acumulados según temporada y día de la semana
+def _calendario():
+    dias, acumulados, total = [], [], 0.0
+    for i in range(DIAS):
+        dia = PRIMER_DIA + datetime.timedelta(days=i)
+        total += TEMPORADA[dia.month - 1] * (PESO_FIN_DE_SEMANA if dia.weekday() >= 5 else 1.0)
+        dias.append(dia.strftime("%Y-%m-%d 00:00:00"))
+        acumulados.append(total)
+    return dias, acumulados
+
+
+def _comentario(azar):
+    return f"{azar.choice(APERTURAS)}, {azar.choice(DETALLES)}.{azar.choice(CIERRES)}"
+
+
+def _personal(cantidad):
+    azar = random.Random(cantidad)
+    nombres = set()
+    while len(nombres) < cantidad:
+        nombres.add(f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {len(nombres) + 1}")
+    return sorted(nombres)
+
+
+# Evento sintético en el orden de COLUMNAS_GRILLA más el comentario
+def evento_sintetico(azar, fecha, nombre=None):
+    personas = azar.randint(PERSONAS_MIN, PERSONAS_MAX)
+    return (
+        nombre or f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}",
+        fecha,
+        f"{azar.randint(8, 22):02d}:00:00.000000",
+        personas,
+        f"{azar.choice(CALLES)} {azar.randint(1, 400)}",
+        azar.choices(ZONAS, PESOS_ZONAS)[0],
+        azar.choices(TIPOS, PESOS_TIPOS)[0],
+        personas * COSTO_POR_PERSONA,
+        _comentario(azar) if azar.random() < FRACCION_CON_COMENTARIO else None,
+    )
+
+
+# Colaboradores (texto) y kilos (en el orden de INSUMOS) de un evento, o
+# None si el evento no tiene ni personal ni insumos capturados
+def _asignacion(azar, personas, personal):
+    colaboradores = ""
+    if azar.random() < FRACCION_CON_PERSONAL:
+        necesarios = min(agenda.colaboradores_necesarios(personas), len(personal))
+        colaboradores = agenda.unir_colaboradores(azar.sample(personal, necesarios))
+    kilos = (0.0,) * len(asignaciones.INSUMOS)
+    if azar.random() < FRACCION_CON_INSUMOS:
+        kilos = tuple(round(RECETA_GENERAL[insumo] * personas * azar.uniform(0.85, 1.15), 2)
+                      for insumo in asignaciones.INSUMOS)
+    if not colaboradores and not any(kilos):
+        return None
+    return colaboradores, kilos
+
+
+_COLUMNAS_GENERADAS = registros.COLUMNAS_GRILLA + ("Comentario",)
+_INSERT_GENERADO = (
+    "INSERT INTO taquizas (" + ", ".join(f'"{c}"' for c in _COLUMNAS_GENERADAS) + ") "
+    "VALUES (" + ", ".join("?" for _ in _COLUMNAS_GENERADAS) + ")"
+)
+
+
+# Crear en `ruta` una base nueva con `filas` eventos sintéticos. Como en
+# la importación masiva, los índices de taquizas y el índice de búsqueda
+# se construyen una sola vez al final. Devuelve los segundos que tardó.
+def generar(ruta, filas, semilla=0, reportar=None):
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    inicio = time.perf_counter()
+    azar = random.Random(semilla)
+    dias, acumulados = _calendario()
+    personal = _personal(max(12, filas // EVENTOS_POR_COLABORADOR))
+
+    db = nucleo.abrir(ruta)
+    try:
+        with db.transaccion() as conexion:
+            indices = conexion.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'taquizas' AND sql IS NOT NULL").fetchall()
+            for nombre, _ in indices:
+                conexion.execute(f'DROP INDEX "{nombre}"')
+            disparador = conexion.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_busqueda_insertar'"
+            ).fetchone()[0]
+            conexion.execute("DROP TRIGGER trg_busqueda_insertar")
+
+            siguiente = 1
+            for desde in range(0, filas, LOTE_GENERACION):
+                cantidad = min(LOTE_GENERACION, filas - desde)
+                fechas = sorted(azar.choices(dias, cum_weights=acumulados, k=cantidad))
+                eventos = [evento_sintetico(azar, fecha) for fecha in fechas]
+                conexion.executemany(_INSERT_GENERADO, eventos)
+                lote = []
+                for rowid, evento in enumerate(eventos, siguiente):
+                    asignacion = _asignacion(azar, evento[3], personal)
+                    if asignacion is not None:
+                        lote.append((rowid,) + asignacion)
+                asignaciones.guardar_asignaciones(conexion, lote)
+                siguiente += cantidad
+                if reportar is not None:
+                    reportar(f"{desde + cantidad} de {filas} eventos")
+
+            for _, sql in indices:
+                conexion.execute(sql)
+            conexion.execute("INSERT INTO busqueda_taquizas (busqueda_taquizas) VALUES ('rebuild')")
+            conexion.execute(disparador)
+            conexion.execute("ANALYZE")
+    finally:
+        db.cerrar()
+    return time.perf_counter() - inicio
+
+
+# --- Operaciones medidas ---
+# Cada operación es (preparar, correr): preparar(db) deja la base en el
+# estado de partida y no se mide; correr(db, preparado) es lo que se mide
+# y devuelve un diccionario con datos del resultado para el reporte.
+
+def _sin_preparar(db):
+    return None
+
+
+# Página de la grilla que empieza en `posicion`, como GrillaPaginada.saltar_a
+def _pagina_en(conexion, posicion, orden='rowid', descendente=False, busqueda=None):
+    anterior = None
+    if posicion > 0:
+        anterior = registros.llave_en_posicion(conexion, posicion - 1, orden, descendente, busqueda)
+    return registros.leer_pagina(conexion, TAMANO_PAGINA, orden, descendente,
+                                 despues_de=anterior, busqueda=busqueda)
+
+
+# Mostrar Registros: contar y leer la primera página; después arrastrar la
+# barra de desplazamiento a la mitad y al final de la tabla
+def _registros(db, _):
+    with db.conexion() as conexion:
+        total = registros.contar_registros(conexion)
+        for posicion in (0, total // 2, max(total - TAMANO_PAGINA, 0)):
+            filas = _pagina_en(conexion, posicion)
+    return {"total": total, "filas_por_pagina": len(filas)}
+
+
+# Ordenar la grilla por cada columna, ascendente y descendente: primera
+# página y página de la mitad
+def _ordenar(db, _):
+    paginas = 0
+    with db.conexion() as conexion:
+        total = registros.contar_registros(conexion)
+        for columna in registros.COLUMNAS_GRILLA:
+            for descendente in (False, True):
+                for posicion in (0, total // 2):
+                    _pagina_en(conexion, posicion, columna, descendente)
+                    paginas += 1
+    return {"columnas": len(registros.COLUMNAS_GRILLA), "paginas": paginas}
+
+
+# Búsqueda de texto completo: contar coincidencias y primera página por relevancia
+def _busqueda(db, _):
+    coincidencias = {}
+    with db.conexion() as conexion:
+        for texto in ("pastor", "carne jugosa", "gar", "Periferico 21"):
+            busqueda = registros.consulta_busqueda(texto)
+            coincidencias[texto] = registros.contar_registros(conexion, busqueda)
+            _pagina_en(conexion, 0, 'relevancia', busqueda=busqueda)
+    return {"coincidencias": coincidencias}
+
+
+def _estadisticas(db, _):
+    with db.conexion() as conexion:
+        resumen = estadisticas.resumen_por(conexion, 'zona')
+    return {"zonas": len(resumen)}
+
+
+def _borrar_modelos_pronostico(db):
+    with db.transaccion() as conexion:
+        conexion.execute("DELETE FROM modelos_pronostico")
+
+
+def _pronostico(db, _):
+    serie, _, orden, modo = pronosticos.pronosticar(db, pasos=12)
+    return {"meses": len(serie), "orden": list(orden), "modelo": modo}
+
+
+def _pronostico_grupos(db, _):
+    tabla, _, predicciones = pronosticos.pronosticar_por_grupo(db, pasos=12)
+    return {"grupos": len(tabla), "con_pronostico": len(predicciones)}
+
+
+def _borrar_sentimientos(db):
+    with db.transaccion() as conexion:
+        conexion.execute("DELETE FROM sentimientos")
+
+
+def _sentimientos(db, _):
+    calificados = sentimientos.actualizar_puntajes(db)
+    with db.conexion() as conexion:
+        distintos = conexion.execute("SELECT COUNT(DISTINCT hash_comentario) FROM sentimientos").fetchone()[0]
+    return {"calificados": calificados, "textos_distintos": distintos}
+
+
+def _borrar_modelos_segmentacion(db):
+    with db.transaccion() as conexion:
+        conexion.execute("DELETE FROM modelos_segmentacion")
+
+
+def _segmentacion(db, _):
+    df, descripcion, entrenado = segmentacion.segmentar(db, segmentacion.K_POR_DEFECTO)
+    return {"eventos": len(df), "segmentos": len(descripcion), "entrenado": entrenado}
+
+
+# Asignación de colaboradores sin filtro: todas las taquizas con su asignación
+def _asignaciones(db, _):
+    with db.conexion() as conexion:
+        filas = asignaciones.leer_asignaciones(conexion)
+    return {"filas": len(filas)}
+
+
+# Rango de 30 días que terminan en el último evento (como las ventanas de
+# agenda e insumos, que proponen los próximos 30 días)
+def _ultimo_mes(db):
+    with db.conexion() as conexion:
+        hasta = conexion.execute('SELECT substr(MAX("Fecha"), 1, 10) FROM taquizas').fetchone()[0]
+    desde = (datetime.date.fromisoformat(hasta) - datetime.timedelta(days=30)).isoformat()
+    return desde, hasta
+
+
+def _agenda(db, rango):
+    with db.conexion() as conexion:
+        agenda_eventos = agenda.Agenda.leer(conexion, *rango)
+    choques = agenda_eventos.conflictos()
+    propuestas = agenda_eventos.proponer()
+    return {"eventos": len(agenda_eventos.eventos), "choques": len(choques), "propuestas": len(propuestas)}
+
+
+def _insumos(db, rango):
+    with db.conexion() as conexion:
+        plan = insumos.planificar(conexion, *rango)
+    compras = insumos.lista_compras(plan)
+    return {"eventos": len(plan['rowids']), "dias": len(compras)}
+
+
+def _borrar_registros_de_prueba(db):
+    with db.transaccion() as conexion:
+        conexion.execute('DELETE FROM taquizas WHERE "Nombre del solicitante" = ?', (NOMBRE_PRUEBA,))
+
+
+def _eventos_de_prueba(cantidad):
+    azar = random.Random(cantidad)
+    return [evento_sintetico(azar, "2025-12-31 00:00:00", NOMBRE_PRUEBA)[:len(registros.COLUMNAS_GRILLA)]
+            for _ in range(cantidad)]
+
+
+def _preparar_insertar(db):
+    _borrar_registros_de_prueba(db)
+    return _eventos_de_prueba(ESCRITURAS)
+
+
+def _insertar(db, eventos):
+    for valores in eventos:
+        with db.transaccion() as conexion:
+            registros.insertar_registro(conexion, valores)
+    return {"registros": len(eventos)}
+
+
+# Registros existentes al azar (siempre los mismos) con valores nuevos
+def _preparar_modificar(db):
+    with db.conexion() as conexion:
+        maximo = conexion.execute("SELECT MAX(id) FROM taquizas").fetchone()[0]
+    azar = random.Random(maximo)
+    rowids = azar.sample(range(1, maximo + 1), min(ESCRITURAS, maximo))
+    with db.conexion() as conexion:
+        actuales = [registros.leer_registro(conexion, rowid) for rowid in rowids]
+    cambios = []
+    for fila in actuales:
+        if fila is None:
+            continue
+        personas = azar.randint(PERSONAS_MIN, PERSONAS_MAX)
+        valores = list(fila[1:])
+        valores[registros.COLUMNAS_GRILLA.index("Cantidad de personas")] = personas
+        valores[registros.COLUMNAS_GRILLA.index("Costo")] = personas * COSTO_POR_PERSONA
+        cambios.append((fila[0], valores))
+    return cambios
+
+
+def _modificar(db, cambios):
+    for rowid, valores in cambios:
+        with db.transaccion() as conexion:
+            registros.actualizar_registro(conexion, rowid, valores)
+    return {"registros": len(cambios)}
+
+
+def _preparar_eliminar(db):
+    _borrar_registros_de_prueba(db)
+    with db.transaccion() as conexion:
+        return [registros.insertar_registro(conexion, valores) for valores in _eventos_de_prueba(ESCRITURAS)]
+
+
+def _eliminar(db, rowids):
+    for rowid in rowids:
+        with db.transaccion() as conexion:
+            registros.eliminar_registro(conexion, rowid)
+    return {"registros": len(rowids)}
+
+
+# Operaciones disponibles, en el orden en que se miden
+OPERACIONES = {
+    'registros': (_sin_preparar, _registros),
+    'ordenar': (_sin_preparar, _ordenar),
+    'busqueda': (_sin_preparar, _busqueda),
+    'estadisticas': (_sin_preparar, _estadisticas),
+    'pronostico': (_borrar_modelos_pronostico, _pronostico),
+    'pronostico_grupos': (_borrar_modelos_pronostico, _pronostico_grupos),
+    'sentimientos': (_borrar_sentimientos, _sentimientos),
+    'segmentacion': (_borrar_modelos_segmentacion, _segmentacion),
+    'asignaciones': (_sin_preparar, _asignaciones),
+    'agenda': (_ultimo_mes, _agenda),
+    'insumos': (_ultimo_mes, _insumos),
+    'insertar': (_preparar_insertar, _insertar),
+    'modificar': (_preparar_modificar, _modificar),
+    'eliminar': (_preparar_eliminar, _eliminar),
+}
+
+
+# Medir una operación en este proceso; devuelve el resultado para el reporte
+def medir(ruta, nombre, memoria=False):
+    preparar, correr = OPERACIONES[nombre]
+    db = nucleo.abrir(ruta)
+    try:
+        for dependencia in PRECARGA.get(nombre, ()):
+            getattr(dependencias, dependencia)()
+        preparado = preparar(db)
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        detalle = correr(db, preparado)
+        segundos = time.perf_counter() - inicio
+        medida = {"segundos": round(segundos, 4), "detalle": detalle}
+        if memoria:
+            medida["memoria_pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        return medida
+    finally:
+        db.cerrar()
+
+
+# Medir en un proceso nuevo (python benchmark.py --medir ...)
+def medir_en_proceso(ruta, nombre, memoria=False):
+    comando = [sys.executable, os.path.abspath(__file__), "--medir", nombre, "--db", ruta]
+    if memoria:
+        comando.append("--memoria")
+    salida = subprocess.run(comando, capture_output=True, text=True)
+    for linea in reversed(salida.stdout.splitlines()):
+        if linea.startswith("{"):
+            return json.loads(linea)
+    return {"error": (salida.stderr.strip().splitlines() or [f"código de salida {salida.returncode}"])[-1]}
+
+
+# Medir una operación: mediana de `repeticiones` corridas y el pico de
+# memoria en una corrida aparte. Los errores (por ejemplo una dependencia
+# que falta) se registran en el reporte en lugar de detener las demás.
+def medir_operacion(ruta, nombre, repeticiones):
+    corridas = []
+    for _ in range(repeticiones):
+        medida = medir_en_proceso(ruta, nombre)
+        if "error" in medida:
+            return {"estado": "error", "error": medida["error"]}
+        corridas.append(medida)
+    memoria = medir_en_proceso(ruta, nombre, memoria=True)
+    tiempos = [medida["segundos"] for medida in corridas]
+    return {
+        "estado": "ok",
+        "segundos": round(statistics.median(tiempos), 4),
+        "segundos_min": min(tiempos),
+        "segundos_max": max(tiempos),
+        "memoria_pico_mb": memoria.get("memoria_pico_mb"),
+        "detalle": corridas[-1]["detalle"],
+    }
+
+
+# Agregar a cada operación medida la razón de tiempo y de memoria contra
+# el mismo tamaño y operación de un reporte anterior
+def comparar(reporte, anterior):
+    for tamano, datos in reporte["tamanos"].items():
+        previas = anterior.get("tamanos", {}).get(tamano, {}).get("operaciones", {})
+        for nombre, medida in datos["operaciones"].items():
+            previa = previas.get(nombre)
+            if medida["estado"] != "ok" or not previa or previa.get("estado") != "ok":
+                continue
+            if previa["segundos"]:
+                medida["razon_segundos"] = round(medida["segundos"] / previa["segundos"], 2)
+            if previa.get("memoria_pico_mb") and medida["memoria_pico_mb"] is not None:
+                medida["razon_memoria"] = round(medida["memoria_pico_mb"] / previa["memoria_pico_mb"], 2)
+
+
+def _avisar(mensaje):
+    print(mensaje, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento con datos sintéticos de taquizas")
+    parser.add_argument("--filas", type=int, nargs="+", default=list(TAMANOS), help="tamaños de base a medir")
+    parser.add_argument("--operaciones", nargs="+", choices=list(OPERACIONES), default=list(OPERACIONES))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--carpeta", default="benchmark", help="carpeta de las bases generadas")
+    parser.add_argument("--salida", default=None, help="reporte JSON (por defecto en la carpeta)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--regenerar", action="store_true", help="volver a generar las bases existentes")
+    parser.add_argument("--comparar", default=None, help="reporte anterior para comparar")
+    # Uso interno: medir una operación en este proceso
+    parser.add_argument("--medir", choices=list(OPERACIONES), help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--memoria", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        print(json.dumps(medir(args.db, args.medir, args.memoria), ensure_ascii=False))
+        return 0
+
+    os.makedirs(args.carpeta, exist_ok=True)
+    reporte = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "semilla": args.semilla,
+        "repeticiones": args.repeticiones,
+        "tamanos": {},
+    }
+    for filas in args.filas:
+        ruta = os.path.join(args.carpeta, f"taquizas_{filas}.sqlite")
+        generacion = None
+        if args.regenerar or not os.path.exists(ruta):
+            _avisar(f"Generando {filas} eventos en {ruta}")
+            generacion = round(generar(ruta, filas, args.semilla, _avisar), 2)
+        datos = {"base": ruta, "generacion_s": generacion, "operaciones": {}}
+        for nombre in args.operaciones:
+            _avisar(f"{filas}: {nombre}")
+            datos["operaciones"][nombre] = medir_operacion(ruta, nombre, args.repeticiones)
+        reporte["tamanos"][str(filas)] = datos
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            comparar(reporte, json.load(archivo))
+
+    salida = args.salida or os.path.join(args.carpeta, "resultado.json")
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
+    errores = [nombre for datos in reporte["tamanos"].values()
+               for nombre, medida in datos["operaciones"].items() if medida["estado"] != "ok"]
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+
+# Caché en memoria para resultados de consultas y DataFrames derivados.
+# Cada entrada se guarda junto con la versión de los datos con la que se
+# calculó (BaseDatos.version_datos()); si los eventos o sus asignaciones
+# cambiaron desde entonces la entrada se descarta y se vuelve a calcular,
+# así nunca se muestra un resultado viejo después de una edición. Guardar
+# puntajes o modelos no cambia la versión, así que no invalida nada.
+# Cuando hay más de `max_entradas` se elimina la usada hace más tiempo.
+#
+# Los valores guardados se comparten entre ventanas: quien los use no
+# debe modificarlos (hacer una copia antes de agregar columnas, etc.).
+class CacheResultados:
+    def __init__(self, db, max_entradas=32):
+        self.db = db
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave -> (versión, valor)
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    # Devolver el valor de `clave` para la versión actual de los datos,
+    # llamando a `calcular()` sólo si no está en caché o ya es viejo
+    def obtener(self, clave, calcular):
+        version = self.db.version_datos()
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == version:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+
+        valor = calcular()
+
+        with self._candado:
+            self._entradas[clave] = (version, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return valor
+
+    # Vaciar la caché
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
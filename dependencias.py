@@ -0,0 +1,99 @@
+import importlib
+import threading
+
+# Carga diferida de las dependencias pesadas (pandas, matplotlib,
+# statsmodels, scikit-learn, VADER). La mayoría de las sesiones sólo agrega
+# o modifica registros, así que cada librería se importa la primera vez que
+# la pide la función que la usa, y no al arrancar la aplicación.
+
+_candado_analizador = threading.Lock()
+_analizador = None
+
+
+def pandas():
+    import pandas as pd
+    return pd
+
+
+def numpy():
+    import numpy as np
+    return np
+
+
+# Figure de matplotlib y su lienzo para Tkinter (sin pyplot: las figuras
+# no quedan registradas en un estado global ni abren ventanas propias)
+def figura_tk():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return Figure, FigureCanvasTkAgg
+
+
+# Mapa de colores de matplotlib por nombre ('viridis', ...)
+def mapa_colores(nombre):
+    import matplotlib
+    return matplotlib.colormaps[nombre]
+
+
+def arima():
+    from statsmodels.tsa.arima.model import ARIMA
+    return ARIMA
+
+
+def openpyxl():
+    import openpyxl
+    return openpyxl
+
+
+# pyarrow y su módulo de Parquet
+def pyarrow():
+    import pyarrow
+    import pyarrow.parquet
+    return pyarrow, pyarrow.parquet
+
+
+def minibatch_kmeans():
+    from sklearn.cluster import MiniBatchKMeans
+    return MiniBatchKMeans
+
+
+# Analizador de sentimientos de VADER (se crea una sola vez: cargar su
+# léxico es lo más lento)
+def analizador_sentimientos():
+    global _analizador
+    with _candado_analizador:
+        if _analizador is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            _analizador = SentimentIntensityAnalyzer()
+        return _analizador
+
+
+# Módulos que se pueden precargar en segundo plano sin tocar la interfaz
+# (el lienzo TkAgg se carga en el hilo de Tk al dibujar la primera gráfica)
+MODULOS_PRECARGA = (
+    "pandas",
+    "matplotlib.figure",
+    "statsmodels.tsa.arima.model",
+    "sklearn.cluster",
+)
+
+
+# Importar en un hilo aparte los módulos pesados mientras el operador ya
+# usa la ventana, para que el primer análisis no tenga que esperarlos.
+# Las dependencias que falten se ignoran aquí; el error aparecerá al usar
+# la función que las necesita.
+def precargar(modulos=MODULOS_PRECARGA, analizador=True):
+    def cargar():
+        for nombre in modulos:
+            try:
+                importlib.import_module(nombre)
+            except ImportError:
+                pass
+        if analizador:
+            try:
+                analizador_sentimientos()
+            except ImportError:
+                pass
+
+    hilo = threading.Thread(target=cargar, name="precarga", daemon=True)
+    hilo.start()
+    return hilo
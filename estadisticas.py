@@ -0,0 +1,60 @@
+import filtros
+
+# Agregaciones para las estadísticas y gráficas. Cada resumen se calcula
+# en una sola consulta GROUP BY dentro de SQLite (resuelta con los índices
+# de cobertura de migraciones.py), así que a Python sólo llega una fila
+# por grupo y no la tabla completa. Con un filtro (ver filtros.py) sus
+# condiciones van en el WHERE de la misma consulta.
+
+# Dimensiones por las que se puede agrupar: nombre -> (encabezado, expresión SQL)
+DIMENSIONES = {
+    'zona': ("Zona", '"Zona"'),
+    'tipo_evento': ("Tipo de evento", '"Tipo de evento"'),
+    'mes': ("Mes", "strftime('%Y-%m', \"Fecha\")"),
+}
+
+# Columnas calculadas de cada resumen (después de la columna del grupo)
+COLUMNAS_RESUMEN = ("Cantidad de Eventos", "Total de Personas", "Suma de Costos")
+
+
+# Encabezados completos de un resumen: grupo + columnas calculadas
+def columnas_resumen(dimension='zona'):
+    return (DIMENSIONES[dimension][0],) + COLUMNAS_RESUMEN
+
+
+# Consulta del resumen por grupo: (grupo, eventos, personas, costos),
+# ordenada de mayor a menor cantidad de eventos (por mes para 'mes').
+# `condiciones` son condiciones SQL adicionales para el WHERE.
+def sql_resumen(dimension='zona', condiciones=()):
+    if dimension not in DIMENSIONES:
+        raise ValueError(f"Dimensión desconocida: {dimension}")
+    expresion = DIMENSIONES[dimension][1]
+    if dimension == 'mes':
+        orden = "grupo"
+    else:
+        orden = "eventos DESC, grupo"
+    return f"""
+        SELECT {expresion} AS grupo,
+               COUNT(*) AS eventos,
+               TOTAL("Cantidad de personas") AS personas,
+               TOTAL("Costo") AS costos
+        FROM taquizas
+        WHERE {" AND ".join((f"{expresion} IS NOT NULL",) + tuple(condiciones))}
+        GROUP BY grupo
+        ORDER BY {orden}
+    """
+
+
+# Conteo de eventos, total de personas y suma de costos por grupo.
+# Devuelve una lista de tuplas (grupo, eventos, personas, costos).
+def resumen_por(conexion, dimension='zona', filtro=None):
+    condiciones, parametros = filtros.condiciones(filtro)
+    return [
+        (grupo, eventos, _entero_si_exacto(personas), _entero_si_exacto(costos))
+        for grupo, eventos, personas, costos in conexion.execute(sql_resumen(dimension, condiciones), parametros)
+    ]
+
+
+# TOTAL() siempre devuelve REAL; las sumas de enteros se muestran como enteros
+def _entero_si_exacto(valor):
+    return int(valor) if float(valor).is_integer() else valor
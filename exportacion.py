@@ -0,0 +1,140 @@
+import csv
+import os
+
+import dependencias
+import estadisticas
+import registros
+from migraciones import COLUMNAS_ASIGNACION
+
+# Exportación de datos a CSV, Excel (.xlsx) y Parquet.
+#
+# Las filas se leen del cursor en lotes de tamaño fijo con `fetchmany` y se
+# escriben al archivo lote por lote, así la memoria no crece con el tamaño
+# de la tabla. El archivo se escribe con un nombre temporal y se renombra
+# al terminar, para no dejar un archivo a medias si la exportación falla o
+# se cancela.
+
+# Filas por lote leído del cursor
+TAMANO_LOTE = 5000
+
+# Tipos de columna (para Parquet, que necesita un esquema fijo)
+TEXTO, ENTERO, REAL = 'texto', 'entero', 'real'
+
+_TIPOS_GRILLA = {"Cantidad de personas": ENTERO, "Costo": ENTERO}
+_TIPOS_ASIGNACION = {'Comentario': TEXTO, 'colaboradores': TEXTO, 'puestos_tacos': ENTERO}
+_TIPOS_REGISTRO = {**_TIPOS_GRILLA, **_TIPOS_ASIGNACION}
+
+# Datos que se pueden exportar: nombre -> (título, consulta, [(columna, tipo), ...])
+CONJUNTOS = {
+    # Todas las columnas de taquizas, así el archivo se puede volver a importar
+    'registros': (
+        "Registros",
+        'SELECT rowid, ' + ", ".join(f'"{c}"' for c in registros.COLUMNAS_REGISTRO) + ' FROM taquizas ORDER BY rowid',
+        [("ID", ENTERO)] + [(c, _TIPOS_REGISTRO.get(c, TEXTO)) for c in registros.COLUMNAS_REGISTRO],
+    ),
+    'estadisticas_zona': (
+        "Estadísticas por zona",
+        estadisticas.sql_resumen('zona'),
+        list(zip(estadisticas.columnas_resumen('zona'), (TEXTO, ENTERO, REAL, REAL))),
+    ),
+    'asignaciones': (
+        "Asignaciones de colaboradores e insumos",
+        'SELECT t.id, "Nombre del solicitante", "Fecha", '
+        + ", ".join(f'"{nombre}"' for nombre, _ in COLUMNAS_ASIGNACION)
+        + ' FROM taquizas t JOIN asignaciones_taquizas a ON a.rowid_taquiza = t.id ORDER BY t.id',
+        [("ID", ENTERO), ("Nombre del solicitante", TEXTO), ("Fecha", TEXTO)]
+        + [(nombre, _TIPOS_ASIGNACION.get(nombre, REAL)) for nombre, _ in COLUMNAS_ASIGNACION],
+    ),
+}
+
+
+# Escritores: reciben la ruta, las columnas y un iterador de lotes de filas
+def _escribir_csv(ruta, columnas, lotes):
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow([nombre for nombre, _ in columnas])
+        for lote in lotes:
+            escritor.writerows(lote)
+
+
+def _escribir_xlsx(ruta, columnas, lotes):
+    # En modo write_only openpyxl escribe cada fila al disco sin guardar la hoja en memoria
+    libro = dependencias.openpyxl().Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append([nombre for nombre, _ in columnas])
+    for lote in lotes:
+        for fila in lote:
+            hoja.append(fila)
+    libro.save(ruta)
+
+
+def _escribir_parquet(ruta, columnas, lotes):
+    pa, pq = dependencias.pyarrow()
+    tipos = {TEXTO: pa.string(), ENTERO: pa.int64(), REAL: pa.float64()}
+    esquema = pa.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for lote in lotes:
+            # Cada lote se escribe como un grupo de filas columnar
+            arreglos = []
+            for i, (nombre, tipo) in enumerate(columnas):
+                valores = [fila[i] for fila in lote]
+                if tipo == TEXTO:
+                    valores = [None if v is None else str(v) for v in valores]
+                try:
+                    arreglos.append(pa.array(valores, type=tipos[tipo]))
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    raise ValueError(f"Valor no válido en la columna {nombre}: {e}")
+            escritor.write_batch(pa.record_batch(arreglos, schema=esquema))
+
+
+# Formatos: extensión -> función que escribe los lotes
+FORMATOS = {
+    '.csv': _escribir_csv,
+    '.xlsx': _escribir_xlsx,
+    '.parquet': _escribir_parquet,
+}
+
+
+# Formato según la extensión del archivo
+def formato_de(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {extension or ruta}")
+    return extension
+
+
+# Exportar un conjunto de datos al archivo `ruta` (el formato sale de la
+# extensión). Devuelve cuántas filas se escribieron.
+def exportar(db, conjunto, ruta, tamano_lote=TAMANO_LOTE, reportar=None, revisar_cancelacion=None):
+    if conjunto not in CONJUNTOS:
+        raise ValueError(f"Datos desconocidos: {conjunto}")
+    escribir = FORMATOS[formato_de(ruta)]
+    _, sql, columnas = CONJUNTOS[conjunto]
+    temporal = ruta + ".parcial"
+    escritas = 0
+
+    with db.conexion() as conexion:
+        total = conexion.execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0]
+
+        def lotes():
+            nonlocal escritas
+            cursor = conexion.execute(sql)
+            while True:
+                if revisar_cancelacion is not None:
+                    revisar_cancelacion()
+                lote = cursor.fetchmany(tamano_lote)
+                if not lote:
+                    return
+                yield lote
+                escritas += len(lote)
+                if reportar is not None and total:
+                    reportar(escritas / total, f"{escritas} de {total} filas")
+
+        try:
+            escribir(temporal, columnas, lotes())
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+    return escritas
@@ -0,0 +1,114 @@
+import datetime
+
+# Filtro compartido por la grilla y los análisis: rango de fechas, zona,
+# tipo de evento y rango de personas.
+#
+# Un filtro es un diccionario con sólo los campos que el operador llenó
+# (CAMPOS). `condiciones` lo compila a condiciones SQL con parámetros
+# sobre las columnas indexadas de taquizas, así cada consulta filtra
+# dentro de SQLite y sólo salen de la base los registros que cumplen.
+
+CAMPOS = ('desde', 'hasta', 'zona', 'tipo_evento', 'personas_min', 'personas_max')
+
+# Columnas con lista de opciones para elegir (zona y tipo de evento)
+COLUMNAS_OPCIONES = {'zona': "Zona", 'tipo_evento': "Tipo de evento"}
+
+
+def _fecha(valor, campo):
+    try:
+        return datetime.date.fromisoformat(valor).isoformat()
+    except ValueError:
+        raise ValueError(f"La fecha '{campo}' debe tener el formato AAAA-MM-DD.")
+
+
+def _entero(valor, campo):
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError(f"'{campo}' debe ser un número entero.")
+
+
+# Filtro a partir de los valores capturados (texto): quita los vacíos y
+# valida fechas y números; lanza ValueError con un mensaje para el usuario
+def normalizar(valores):
+    filtro = {}
+    for campo in CAMPOS:
+        valor = str(valores.get(campo) or "").strip()
+        if not valor:
+            continue
+        if campo in ('desde', 'hasta'):
+            valor = _fecha(valor, campo)
+        elif campo in ('personas_min', 'personas_max'):
+            valor = _entero(valor, campo)
+        filtro[campo] = valor
+    if filtro.get('desde', '') > filtro.get('hasta', '9999'):
+        raise ValueError("La fecha 'desde' es posterior a 'hasta'.")
+    if filtro.get('personas_min', 0) > filtro.get('personas_max', float('inf')):
+        raise ValueError("El mínimo de personas es mayor que el máximo.")
+    return filtro
+
+
+# Condiciones SQL del filtro y sus parámetros: ([condición, ...], [valor, ...]).
+# `alias` es el alias de taquizas en la consulta (o None).
+def condiciones(filtro, alias=None):
+    prefijo = f"{alias}." if alias else ""
+    lista, parametros = [], []
+    if not filtro:
+        return lista, parametros
+    if 'desde' in filtro:
+        lista.append(f'{prefijo}"Fecha" >= ?')
+        parametros.append(filtro['desde'])
+    if 'hasta' in filtro:
+        lista.append(f"{prefijo}\"Fecha\" < date(?, '+1 day')")
+        parametros.append(filtro['hasta'])
+    if 'zona' in filtro:
+        lista.append(f'{prefijo}"Zona" = ?')
+        parametros.append(filtro['zona'])
+    if 'tipo_evento' in filtro:
+        lista.append(f'{prefijo}"Tipo de evento" = ?')
+        parametros.append(filtro['tipo_evento'])
+    if 'personas_min' in filtro:
+        lista.append(f'{prefijo}"Cantidad de personas" >= ?')
+        parametros.append(filtro['personas_min'])
+    if 'personas_max' in filtro:
+        lista.append(f'{prefijo}"Cantidad de personas" <= ?')
+        parametros.append(filtro['personas_max'])
+    return lista, parametros
+
+
+# Cláusula WHERE completa (o "") con las condiciones del filtro más las
+# condiciones `extra` (sin parámetros); devuelve (sql, parámetros)
+def clausula(filtro, alias=None, extra=()):
+    lista, parametros = condiciones(filtro, alias)
+    lista = list(extra) + lista
+    return (" WHERE " + " AND ".join(lista) if lista else ""), parametros
+
+
+# Texto estable que identifica el filtro ("" sin filtro), para llaves de
+# caché y de modelos guardados
+def clave(filtro):
+    return ";".join(f"{campo}={filtro[campo]}" for campo in CAMPOS if campo in (filtro or {}))
+
+
+# Descripción para títulos y la barra de estado ("" sin filtro)
+def describir(filtro):
+    if not filtro:
+        return ""
+    partes = []
+    if 'desde' in filtro or 'hasta' in filtro:
+        partes.append(f"fechas {filtro.get('desde', '…')} a {filtro.get('hasta', '…')}")
+    if 'zona' in filtro:
+        partes.append(f"zona {filtro['zona']}")
+    if 'tipo_evento' in filtro:
+        partes.append(f"tipo {filtro['tipo_evento']}")
+    if 'personas_min' in filtro or 'personas_max' in filtro:
+        partes.append(f"personas {filtro.get('personas_min', '…')} a {filtro.get('personas_max', '…')}")
+    return ", ".join(partes)
+
+
+# Valores distintos de zona o tipo de evento para elegir en la interfaz
+# (se leen del índice de la columna)
+def opciones(conexion, campo):
+    columna = COLUMNAS_OPCIONES[campo]
+    return [fila[0] for fila in conexion.execute(
+        f'SELECT DISTINCT "{columna}" FROM taquizas WHERE "{columna}" IS NOT NULL ORDER BY 1')]
@@ -0,0 +1,236 @@
+import tkinter as tk
+
+import dependencias
+
+# Panel de gráficas integrado en la aplicación.
+#
+# Una sola ventana con una Figure de matplotlib y su FigureCanvasTkAgg que
+# viven toda la sesión: al cerrar la ventana sólo se oculta. Cada vista
+# (estadísticas, series, pronósticos por grupo, segmentos) crea sus ejes
+# y artistas la primera vez que se muestra; después sólo se cambian sus
+# datos (alturas de las barras, datos de las líneas, imagen de los
+# puntos) y se redibuja, sin crear figuras nuevas.
+#
+# La nube de puntos de la segmentación, que es lo caro de dibujar, se
+# rasteriza fuera del hilo de la interfaz (rasterizar_segmentos, sólo
+# numpy) y la interfaz sólo pone la imagen ya lista; quien la calcula
+# puede guardarla en la caché de resultados por versión de los datos.
+
+# Tamaño en píxeles de la imagen de los segmentos
+ANCHO_IMAGEN, ALTO_IMAGEN = 900, 500
+
+# Mapa de colores de las gráficas
+MAPA_COLORES = 'viridis'
+
+
+# Colores RGBA (0-1) para n grupos
+def colores(n):
+    mapa = dependencias.mapa_colores(MAPA_COLORES)
+    return [mapa(i / max(n - 1, 1)) for i in range(n)]
+
+
+# Imagen RGBA (alto x ancho x 4, uint8) de la nube de puntos (x, y) con el
+# color del segmento predominante en cada píxel y la opacidad según la
+# cantidad de puntos. Usa todos los puntos, no una muestra. Devuelve
+# (imagen, extensión (xmin, xmax, ymin, ymax)). No toca matplotlib ni Tk,
+# así que se puede llamar desde un hilo de trabajo.
+def rasterizar_segmentos(x, y, segmentos, k, ancho=ANCHO_IMAGEN, alto=ALTO_IMAGEN):
+    np = dependencias.numpy()
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    segmentos = np.asarray(segmentos, dtype=np.int64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y, segmentos = x[validos], y[validos], segmentos[validos]
+    imagen = np.zeros((alto, ancho, 4), dtype=np.uint8)
+    if not len(x):
+        return imagen, (0.0, 1.0, 0.0, 1.0)
+
+    xmin, xmax = float(x.min()), float(x.max())
+    ymin, ymax = float(y.min()), float(y.max())
+    xmax = xmax if xmax > xmin else xmin + 1.0
+    ymax = ymax if ymax > ymin else ymin + 1.0
+    columna = np.minimum(((x - xmin) / (xmax - xmin) * ancho).astype(np.int64), ancho - 1)
+    fila = np.minimum(((y - ymin) / (ymax - ymin) * alto).astype(np.int64), alto - 1)
+    celda = fila * ancho + columna
+
+    # Conteo de puntos por (segmento, píxel) en una sola pasada
+    conteos = np.bincount(segmentos * (ancho * alto) + celda, minlength=k * ancho * alto)
+    conteos = conteos[:k * ancho * alto].reshape(k, alto * ancho)
+    total = conteos.sum(axis=0)
+    predominante = conteos.argmax(axis=0)
+
+    paleta = (np.array(colores(k)) * 255).astype(np.uint8)
+    ocupadas = total > 0
+    pixeles = imagen.reshape(-1, 4)
+    pixeles[ocupadas] = paleta[predominante[ocupadas]]
+    # Opacidad logarítmica: un punto suelto se ve, uno denso no satura al resto
+    densidad = np.log1p(total[ocupadas]) / np.log1p(total.max())
+    pixeles[ocupadas, 3] = (90 + 165 * densidad).astype(np.uint8)
+    return imagen, (xmin, xmax, ymin, ymax)
+
+
+class PanelGraficas:
+    def __init__(self, raiz):
+        self.raiz = raiz
+        self.ventana = None
+        self.figura = None
+        self.lienzo = None
+        self.vista = None        # vista cuyos ejes y artistas están en la figura
+        self.artistas = {}
+
+    # Mostrar la ventana, creándola (con la figura y el lienzo) la primera vez
+    def _mostrar_ventana(self, titulo):
+        if self.ventana is None:
+            Figure, FigureCanvasTkAgg = dependencias.figura_tk()
+            self.ventana = tk.Toplevel(self.raiz)
+            self.ventana.geometry("1000x750")
+            self.figura = Figure(figsize=(10, 7.5), dpi=100)
+            self.lienzo = FigureCanvasTkAgg(self.figura, master=self.ventana)
+            self.lienzo.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            # Cerrar sólo oculta: la figura se reutiliza la próxima vez
+            self.ventana.protocol("WM_DELETE_WINDOW", self.ventana.withdraw)
+        self.ventana.title(titulo)
+        self.ventana.deiconify()
+        self.ventana.lift()
+
+    # Dejar en la figura los ejes de `vista`; sólo se rehacen al cambiar de vista
+    def _preparar(self, vista, construir):
+        if self.vista != vista:
+            self.figura.clear()
+            self.artistas = construir()
+            self.vista = vista
+        return self.artistas
+
+    def _redibujar(self):
+        self.figura.tight_layout()
+        self.lienzo.draw_idle()
+
+    # --- Estadísticas por zona: tres gráficas de barras ---
+
+    def _construir_estadisticas(self):
+        ejes = self.figura.subplots(3, 1)
+        return {'ejes': ejes, 'barras': [None, None, None], 'grupos': None}
+
+    # resumen: [(zona, eventos, personas, costos), ...]
+    def mostrar_estadisticas(self, resumen, titulo="Estadísticas por zona"):
+        self._mostrar_ventana(titulo)
+        artistas = self._preparar('estadisticas', self._construir_estadisticas)
+        grupos = [str(fila[0]) for fila in resumen]
+        nombres = ("Cantidad de Eventos", "Total de Personas", "Suma de Costos")
+        for i, (eje, nombre) in enumerate(zip(artistas['ejes'], nombres)):
+            valores = [fila[i + 1] for fila in resumen]
+            barras = artistas['barras'][i]
+            if barras is not None and artistas['grupos'] == grupos:
+                # Mismas zonas: sólo cambian las alturas
+                for barra, valor in zip(barras, valores):
+                    barra.set_height(valor)
+            else:
+                if barras is not None:
+                    barras.remove()
+                artistas['barras'][i] = eje.bar(grupos, valores, color=colores(len(grupos)))
+                eje.set_title(f"{nombre} por Zona")
+                eje.set_xlabel("Zona")
+                eje.set_ylabel(nombre)
+            eje.relim()
+            eje.autoscale_view()
+        artistas['grupos'] = grupos
+        self.figura.suptitle(titulo)
+        self._redibujar()
+
+    # --- Series temporales: histórico y pronóstico ---
+
+    def _construir_series(self):
+        ejes = self.figura.subplots(2, 1)
+        historico, = ejes[0].plot([], [], label='Demanda histórica')
+        historico_2, = ejes[1].plot([], [], label='Demanda histórica')
+        prediccion, = ejes[1].plot([], [], label='Predicción de demanda', color='red')
+        for eje in ejes:
+            eje.set_xlabel('Fecha')
+            eje.set_ylabel('Cantidad de personas')
+        return {'ejes': ejes, 'lineas': (historico, historico_2, prediccion)}
+
+    # serie y predicciones: pandas.Series con índice de fechas
+    def mostrar_series(self, serie, predicciones, titulo_historico, titulo_prediccion):
+        self._mostrar_ventana(titulo_historico)
+        artistas = self._preparar('series', self._construir_series)
+        historico, historico_2, prediccion = artistas['lineas']
+        fechas, valores = serie.index.to_numpy(), serie.to_numpy()
+        historico.set_data(fechas, valores)
+        historico_2.set_data(fechas, valores)
+        prediccion.set_data(predicciones.index.to_numpy(), predicciones.to_numpy())
+        ejes = artistas['ejes']
+        ejes[0].set_title(titulo_historico)
+        ejes[1].set_title(titulo_prediccion)
+        for eje in ejes:
+            eje.relim()
+            eje.autoscale_view()
+            eje.legend(loc='upper left')
+        self.figura.suptitle("")
+        self._redibujar()
+
+    # --- Pronóstico por grupo: una gráfica pequeña por zona y tipo de evento ---
+
+    def _construir_grupos(self, llaves, nombres_dimension):
+        columnas = min(3, len(llaves))
+        filas = -(-len(llaves) // columnas)
+        ejes = self.figura.subplots(filas, columnas, squeeze=False)
+        lineas = {}
+        for eje, llave in zip(ejes.flat, llaves):
+            historico, = eje.plot([], [], label='Histórico')
+            pronostico, = eje.plot([], [], label='Pronóstico', color='red')
+            eje.set_title(f"{nombres_dimension.get(llave[0], llave[0])}: {llave[1]}", fontsize=9)
+            eje.tick_params(axis='x', labelrotation=45, labelsize=7)
+            lineas[llave] = (eje, historico, pronostico)
+        for eje in list(ejes.flat)[len(llaves):]:
+            eje.set_visible(False)
+        ejes[0][0].legend(loc='upper left', fontsize=7)
+        return {'lineas': lineas}
+
+    # series y predicciones: {(dimensión, grupo): pandas.Series}. Los ejes se
+    # rehacen sólo si cambian los grupos; si no, sólo los datos de las líneas.
+    # nombres_dimension: dimensión -> nombre para los títulos ('zona' -> 'Zona')
+    def mostrar_pronosticos_por_grupo(self, series, predicciones, titulo, nombres_dimension):
+        self._mostrar_ventana(titulo)
+        llaves = sorted(predicciones, key=lambda llave: (llave[0], str(llave[1])))
+        if not llaves:
+            return
+        artistas = self._preparar(('grupos', tuple(llaves)),
+                                  lambda: self._construir_grupos(llaves, nombres_dimension))
+        for llave, (eje, historico, pronostico) in artistas['lineas'].items():
+            serie, prediccion = series[llave], predicciones[llave]
+            historico.set_data(serie.index.to_numpy(), serie.to_numpy())
+            pronostico.set_data(prediccion.index.to_numpy(), prediccion.to_numpy())
+            eje.relim()
+            eje.autoscale_view()
+        self.figura.suptitle(titulo)
+        self._redibujar()
+
+    # --- Segmentación: imagen de la nube de puntos ---
+
+    def _construir_segmentos(self):
+        eje = self.figura.subplots(1, 1)
+        np = dependencias.numpy()
+        imagen = eje.imshow(np.zeros((1, 1, 4), dtype=np.uint8), origin='lower', aspect='auto',
+                            interpolation='nearest')
+        eje.set_xlabel('Cantidad de Personas')
+        eje.set_ylabel('Costo')
+        return {'eje': eje, 'imagen': imagen, 'leyenda': None}
+
+    # imagen y extensión de rasterizar_segmentos; k segmentos
+    def mostrar_segmentos(self, imagen, extension, k, titulo):
+        self._mostrar_ventana(titulo)
+        artistas = self._preparar('segmentos', self._construir_segmentos)
+        eje = artistas['eje']
+        artistas['imagen'].set_data(imagen)
+        artistas['imagen'].set_extent(extension)
+        eje.set_xlim(extension[0], extension[1])
+        eje.set_ylim(extension[2], extension[3])
+        eje.set_title(titulo)
+        if artistas['leyenda'] is not None:
+            artistas['leyenda'].remove()
+        parches = [eje.scatter([], [], color=color, label=f"Segmento {i}") for i, color in enumerate(colores(k))]
+        artistas['leyenda'] = eje.legend(handles=parches, title='Segmento', loc='upper left')
+        for parche in parches:
+            parche.remove()
+        self.figura.suptitle("")
+        self._redibujar()
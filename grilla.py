@@ -0,0 +1,340 @@
+import bisect
+import tkinter as tk
+
+import registros
+
+
+# Grilla virtualizada para un ttk.Treeview: sólo mantiene en memoria una
+# ventana de filas alrededor de la posición visible. Al llegar al borde
+# de la ventana se lee la página siguiente o anterior por llave y se
+# descartan las filas del otro extremo, así la memoria y el tiempo de
+# dibujo no dependen del tamaño de la tabla.
+#
+# La barra de desplazamiento representa la tabla completa; el Treeview
+# sólo conoce las filas cargadas. Cada item usa el rowid como iid.
+class GrillaPaginada:
+    def __init__(self, tree, scrollbar, db, tamano_pagina=100, max_filas=300):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.db = db
+        self.tamano_pagina = tamano_pagina
+        self.max_filas = max_filas
+
+        self.orden = 'rowid'
+        self.descendente = False
+        self.busqueda = None     # consulta FTS5 activa (None = todos los registros)
+        self.filtro = {}         # filtro compartido (ver filtros.py)
+        self.total = 0
+        self.inicio = 0          # posición absoluta de la primera fila cargada
+        self.llaves = []         # llave (valor de orden, rowid) de cada fila cargada
+        self.comparables = []    # las mismas llaves en forma comparable, para la búsqueda binaria
+        self._pendiente = None   # carga programada con after_idle
+        self._cargando = False   # evita cargas en cadena mientras se modifica el Treeview
+        self.cargada = False     # la grilla se llena hasta presionar "Mostrar Registros"
+
+        self.tree.configure(yscrollcommand=self._vista_cambiada)
+        self.scrollbar.configure(command=self._desplazar)
+
+    # Volver a leer desde el principio (botón "Mostrar Registros")
+    def recargar(self):
+        with self.db.conexion() as conexion:
+            self.total = registros.contar_registros(conexion, self.busqueda, self.filtro)
+            filas = registros.leer_pagina(conexion, self.tamano_pagina, self.orden, self.descendente,
+                                          busqueda=self.busqueda, filtro=self.filtro)
+        self._reemplazar(filas, 0)
+        self.cargada = True
+        self.tree.yview_moveto(0)
+
+    # Mostrar sólo los registros que coinciden con el texto, los más
+    # relevantes primero; con texto vacío se vuelve a mostrar todo
+    def buscar(self, texto):
+        self.busqueda = registros.consulta_busqueda(texto)
+        self.orden = 'relevancia' if self.busqueda is not None else 'rowid'
+        self.descendente = False
+        self.recargar()
+
+    # Mostrar sólo los registros que cumplen el filtro (se combina con la búsqueda)
+    def filtrar(self, filtro):
+        self.filtro = dict(filtro or {})
+        if self.cargada:
+            self.recargar()
+
+    # Hay búsqueda o filtro: no se sabe sin consultar si una fila cambiada
+    # sigue mostrándose
+    def _restringida(self):
+        return self.busqueda is not None or bool(self.filtro)
+
+    # Cambiar el orden de la grilla. El orden lo resuelve SQLite con el
+    # índice de la columna (valores numéricos como números, no como texto)
+    # y sólo se vuelve a leer la primera página.
+    def ordenar(self, orden, descendente):
+        if orden == 'relevancia' and self.busqueda is None:
+            orden = 'rowid'
+        self.orden = orden
+        self.descendente = descendente
+        if self.cargada:
+            self.recargar()
+
+    # Reemplazar todas las filas cargadas
+    def _reemplazar(self, filas, inicio):
+        self.tree.delete(*self.tree.get_children())
+        self.llaves = []
+        self.comparables = []
+        self.inicio = inicio
+        self._agregar_al_final(filas)
+
+    def _agregar_al_final(self, filas):
+        for fila in filas:
+            self.tree.insert("", "end", iid=str(fila[0]), values=list(fila))
+            llave = registros.llave_de_fila(fila, self.orden)
+            self.llaves.append(llave)
+            self.comparables.append(registros.llave_comparable(llave))
+
+    def _agregar_al_principio(self, filas):
+        for indice, fila in enumerate(filas):
+            self.tree.insert("", indice, iid=str(fila[0]), values=list(fila))
+        llaves = [registros.llave_de_fila(fila, self.orden) for fila in filas]
+        self.llaves[:0] = llaves
+        self.comparables[:0] = [registros.llave_comparable(llave) for llave in llaves]
+        self.inicio -= len(filas)
+
+    # Descartar filas del principio o del final para no pasar de max_filas
+    def _recortar(self, desde_el_principio):
+        sobrantes = len(self.llaves) - self.max_filas
+        if sobrantes <= 0:
+            return
+        hijos = self.tree.get_children()
+        if desde_el_principio:
+            self.tree.delete(*hijos[:sobrantes])
+            del self.llaves[:sobrantes]
+            del self.comparables[:sobrantes]
+            self.inicio += sobrantes
+        else:
+            self.tree.delete(*hijos[-sobrantes:])
+            del self.llaves[-sobrantes:]
+            del self.comparables[-sobrantes:]
+
+    # El Treeview avisa que cambió la parte visible (valores relativos a las
+    # filas cargadas). Se traduce a la posición en la tabla completa y, si
+    # se llegó a un borde, se programa la carga de la página vecina.
+    def _vista_cambiada(self, primero, ultimo):
+        primero, ultimo = float(primero), float(ultimo)
+        cargadas = len(self.llaves)
+        if self.total and cargadas:
+            self.scrollbar.set((self.inicio + primero * cargadas) / self.total,
+                               (self.inicio + ultimo * cargadas) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+        if self._pendiente is not None or self._cargando or not cargadas:
+            return
+        if ultimo >= 1.0 and self.inicio + cargadas < self.total:
+            self._pendiente = self.tree.after_idle(self._cargar_siguiente)
+        elif primero <= 0.0 and self.inicio > 0:
+            self._pendiente = self.tree.after_idle(self._cargar_anterior)
+
+    def _cargar_siguiente(self):
+        self._pendiente = None
+        if not self.llaves:
+            return
+        with self.db.conexion() as conexion:
+            filas = registros.leer_pagina(conexion, self.tamano_pagina, self.orden, self.descendente,
+                                          despues_de=self.llaves[-1], busqueda=self.busqueda,
+                                          filtro=self.filtro)
+        if not filas:
+            self.total = self.inicio + len(self.llaves)
+            return
+        ancla = self._primera_visible()
+        self._cargando = True
+        try:
+            self._agregar_al_final(filas)
+            self._recortar(desde_el_principio=True)
+            self._mostrar_arriba(ancla)
+        finally:
+            self._cargando = False
+
+    def _cargar_anterior(self):
+        self._pendiente = None
+        if not self.llaves:
+            return
+        with self.db.conexion() as conexion:
+            filas = registros.leer_pagina(conexion, self.tamano_pagina, self.orden, self.descendente,
+                                          antes_de=self.llaves[0], busqueda=self.busqueda,
+                                          filtro=self.filtro)
+        if not filas:
+            self.inicio = 0
+            return
+        ancla = self._primera_visible()
+        self._cargando = True
+        try:
+            self._agregar_al_principio(filas)
+            self._recortar(desde_el_principio=False)
+            self.inicio = max(self.inicio, 0)
+            self._mostrar_arriba(ancla)
+        finally:
+            self._cargando = False
+
+    # Item que está en la primera línea visible del Treeview
+    def _primera_visible(self):
+        hijos = self.tree.get_children()
+        if not hijos:
+            return None
+        indice = int(round(float(self.tree.yview()[0]) * len(hijos)))
+        return hijos[min(indice, len(hijos) - 1)]
+
+    # Dejar `iid` en la primera línea visible (mantiene la vista estable
+    # cuando se agregan o descartan filas por encima)
+    def _mostrar_arriba(self, iid):
+        hijos = len(self.tree.get_children())
+        if iid is None or not hijos or not self.tree.exists(iid):
+            return
+        self.tree.yview_moveto(self.tree.index(iid) / hijos)
+
+    # Comandos de la barra de desplazamiento: los pasos (flechas, páginas)
+    # se pasan al Treeview; arrastrar a una posición fuera de la ventana
+    # cargada salta a esa posición con una nueva página.
+    def _desplazar(self, accion, *args):
+        if accion != tk.MOVETO:
+            self.tree.yview(accion, *args)
+            return
+        if not self.total:
+            return
+        fraccion = min(max(float(args[0]), 0.0), 1.0)
+        destino = int(fraccion * self.total)
+        cargadas = len(self.llaves)
+        if self.inicio <= destino < self.inicio + cargadas:
+            self.tree.yview_moveto((destino - self.inicio) / cargadas)
+        else:
+            self.saltar_a(destino)
+
+    # Cargar una ventana que empieza en la posición absoluta `destino`
+    def saltar_a(self, destino):
+        # Cerca del final se carga la última página completa
+        inicio = min(max(destino, 0), max(self.total - self.tamano_pagina, 0))
+        with self.db.conexion() as conexion:
+            # Se continúa desde la llave de la fila anterior al inicio
+            anterior = None
+            if inicio > 0:
+                anterior = registros.llave_en_posicion(conexion, inicio - 1, self.orden, self.descendente,
+                                                       self.busqueda, self.filtro)
+            filas = registros.leer_pagina(conexion, self.tamano_pagina, self.orden, self.descendente,
+                                          despues_de=anterior, busqueda=self.busqueda, filtro=self.filtro)
+        self._reemplazar(filas, inicio)
+        if filas:
+            self.tree.yview_moveto((max(destino, inicio) - inicio) / len(filas))
+
+    # --- Cambios puntuales después de agregar, modificar o eliminar ---
+    # Cada cambio toca sólo el item del rowid afectado (más una búsqueda
+    # binaria sobre las filas cargadas), sin volver a leer la tabla, y
+    # conserva el orden y la posición de desplazamiento actuales. Con una
+    # búsqueda o un filtro activos no se sabe sin consultar si la fila
+    # coincide (ni su relevancia), así que se vuelve a leer la ventana en
+    # la misma posición.
+
+    # Volver a leer la ventana cargada (con búsqueda o filtro activos)
+    def _releer(self):
+        with self.db.conexion() as conexion:
+            self.total = registros.contar_registros(conexion, self.busqueda, self.filtro)
+        ancla = self._primera_visible()
+        self.saltar_a(self.inicio)
+        self._mostrar_arriba(ancla)
+
+    # Posición donde iría la llave dentro de las filas cargadas (búsqueda
+    # binaria sobre `comparables`, que se mantiene junto con `llaves`)
+    def _posicion_de(self, llave):
+        objetivo = registros.llave_comparable(llave)
+        if not self.descendente:
+            return bisect.bisect_left(self.comparables, objetivo)
+        # En orden descendente bisect no sirve: primera llave menor que el objetivo
+        bajo, alto = 0, len(self.comparables)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self.comparables[medio] > objetivo:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    # Ubicar una fila nueva (o movida) respecto a la ventana cargada
+    def _ubicar(self, fila):
+        llave = registros.llave_de_fila(fila, self.orden)
+        posicion = self._posicion_de(llave)
+        cargadas = len(self.llaves)
+        if posicion == 0 and self.inicio > 0:
+            # Cae antes de la ventana: sólo se recorre la posición de inicio
+            self.inicio += 1
+            return
+        if posicion == cargadas and self.inicio + cargadas < self.total - 1:
+            # Cae después de la ventana y hay filas sin cargar en medio
+            return
+        self.tree.insert("", posicion, iid=str(fila[0]), values=list(fila))
+        self.llaves.insert(posicion, llave)
+        self.comparables.insert(posicion, registros.llave_comparable(llave))
+
+    # Quitar un item cargado; devuelve True si estaba en la ventana
+    def _quitar(self, rowid):
+        iid = str(rowid)
+        if not self.tree.exists(iid):
+            return False
+        posicion = self.tree.index(iid)
+        self.tree.delete(iid)
+        del self.llaves[posicion]
+        del self.comparables[posicion]
+        return True
+
+    # Registro nuevo recién insertado
+    def aplicar_insercion(self, fila):
+        if not self.cargada:
+            return
+        if self._restringida():
+            self._releer()
+            return
+        ancla = self._primera_visible()
+        self.total += 1
+        self._ubicar(fila)
+        self._recortar(desde_el_principio=False)
+        self._mostrar_arriba(ancla)
+
+    # Registro modificado: si no cambió su lugar en el orden sólo se
+    # actualizan los valores del item. Si cambió, se quita de su lugar
+    # anterior (de la ventana si estaba cargado; si no, con `anterior`, la
+    # fila antes del cambio, se recorre el inicio cuando quedaba antes de la
+    # ventana) y se ubica en su lugar nuevo como una inserción. El total no
+    # cambia.
+    def aplicar_actualizacion(self, fila, anterior=None):
+        if not self.cargada:
+            return
+        if self._restringida():
+            self._releer()
+            return
+        iid = str(fila[0])
+        llave = registros.llave_de_fila(fila, self.orden)
+        if self.tree.exists(iid) and self.llaves[self.tree.index(iid)] == llave:
+            self.tree.item(iid, values=list(fila))
+            return
+        ancla = self._primera_visible()
+        if ancla == iid:
+            ancla = None
+        if not self._quitar(fila[0]) and anterior is not None and self.llaves:
+            if self._posicion_de(registros.llave_de_fila(anterior, self.orden)) == 0:
+                self.inicio = max(self.inicio - 1, 0)
+        self._ubicar(fila)
+        self._recortar(desde_el_principio=False)
+        self._mostrar_arriba(ancla)
+
+    # Registro eliminado. Si no estaba cargado no se sabe si quedaba antes
+    # de la ventana, así que se vuelve a leer la ventana en la misma posición.
+    def aplicar_eliminacion(self, rowid):
+        if not self.cargada:
+            return
+        if self._restringida():
+            self._releer()
+            return
+        ancla = self._primera_visible()
+        if ancla == str(rowid):
+            ancla = None
+        if not self._quitar(rowid):
+            self._releer()
+            return
+        self.total -= 1
+        self._mostrar_arriba(ancla)
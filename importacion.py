@@ -0,0 +1,308 @@
+import csv
+import datetime
+import os
+import unicodedata
+
+import dependencias
+import registros
+from migraciones import COLUMNAS_BUSQUEDA
+
+# Importación masiva de registros desde Excel (.xlsx) o CSV.
+#
+# El archivo se lee por lotes (sin cargarlo completo en memoria); cada
+# fila se valida y se convierte al formato de la tabla, y los lotes
+# válidos se insertan con `executemany` dentro de una sola transacción.
+# Se leen todas las columnas de taquizas (registros.COLUMNAS_REGISTRO);
+# las columnas del archivo que no se reconocen se informan en el resultado.
+# Si el archivo trae más de un lote, los índices secundarios de `taquizas`
+# se eliminan al empezar y se vuelven a crear al final (construir un
+# índice una vez es mucho más barato que actualizarlo fila por fila).
+# Las filas rechazadas se devuelven con su número y el motivo.
+
+# Filas por lote (lectura, validación y executemany)
+TAMANO_LOTE = 1000
+
+# Columnas obligatorias del archivo (las demás de la grilla pueden faltar)
+OBLIGATORIAS = ("Nombre del solicitante", "Fecha", "Cantidad de personas")
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y")
+FORMATOS_HORA = ("%H:%M:%S.%f", "%H:%M:%S", "%H:%M", "%I:%M %p")
+
+
+# Error de validación de una fila (el mensaje es el motivo del rechazo)
+class FilaInvalida(ValueError):
+    pass
+
+
+# Nombre de columna sin mayúsculas, acentos ni espacios sobrantes
+def _normalizar(nombre):
+    texto = unicodedata.normalize("NFKD", str(nombre or "")).encode("ascii", "ignore").decode()
+    return " ".join(texto.lower().split())
+
+
+_COLUMNAS_NORMALIZADAS = {_normalizar(c): c for c in registros.COLUMNAS_REGISTRO}
+
+
+# Posición de cada columna de taquizas en el encabezado del archivo
+def mapear_encabezado(encabezado):
+    posiciones = {}
+    for i, nombre in enumerate(encabezado):
+        columna = _COLUMNAS_NORMALIZADAS.get(_normalizar(nombre))
+        if columna is not None and columna not in posiciones:
+            posiciones[columna] = i
+    faltantes = [c for c in OBLIGATORIAS if c not in posiciones]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    return posiciones
+
+
+# Nombres del encabezado que no se van a importar (columnas desconocidas o
+# repetidas), para avisar en lugar de perder esos datos sin decir nada
+def columnas_ignoradas(encabezado, posiciones):
+    usadas = set(posiciones.values())
+    return [str(nombre).strip() for i, nombre in enumerate(encabezado)
+            if i not in usadas and str(nombre or "").strip()]
+
+
+# Lectores por lotes: devuelven (número de fila en el archivo, valores)
+def _lotes_csv(ruta, tamano_lote):
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(archivo, dialecto)
+        yield from _agrupar(lector, tamano_lote)
+
+
+def _lotes_xlsx(ruta, tamano_lote):
+    libro = dependencias.openpyxl().load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from _agrupar(libro.active.iter_rows(values_only=True), tamano_lote)
+    finally:
+        libro.close()
+
+
+# Primer elemento: el encabezado; después, lotes de (número de fila, valores)
+def _agrupar(filas, tamano_lote):
+    filas = iter(filas)
+    yield next(filas, None)
+    lote = []
+    for numero, valores in enumerate(filas, start=2):
+        if not any(v not in (None, "") for v in valores):
+            continue  # filas vacías
+        lote.append((numero, valores))
+        if len(lote) == tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def leer_lotes(ruta, tamano_lote=TAMANO_LOTE):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return _lotes_xlsx(ruta, tamano_lote)
+    if extension in (".csv", ".txt"):
+        return _lotes_csv(ruta, tamano_lote)
+    raise ValueError(f"Formato no soportado: {extension or ruta}")
+
+
+# Conversión de cada tipo de columna al formato guardado en la tabla
+def _texto(valor, columna, obligatorio=False):
+    texto = "" if valor is None else str(valor).strip()
+    if not texto:
+        if obligatorio:
+            raise FilaInvalida(f"{columna} vacío")
+        return None
+    return texto
+
+
+# Interpretar un texto con el primer formato que funcione. Un archivo usa
+# casi siempre el mismo formato, así que se prueba primero el último que
+# funcionó (strptime es lento y cada intento fallido cuesta lo mismo).
+_ultimo_formato = {}
+
+
+def _interpretar(texto, formatos):
+    ultimo = _ultimo_formato.get(formatos)
+    if ultimo is not None:
+        try:
+            return datetime.datetime.strptime(texto, ultimo)
+        except ValueError:
+            pass
+    for formato in formatos:
+        try:
+            resultado = datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+        _ultimo_formato[formatos] = formato
+        return resultado
+    return None
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.replace(hour=0, minute=0, second=0, microsecond=0).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, datetime.date):
+        return valor.strftime("%Y-%m-%d 00:00:00")
+    texto = _texto(valor, "Fecha", obligatorio=True)
+    fecha = _interpretar(texto, FORMATOS_FECHA)
+    if fecha is None:
+        raise FilaInvalida(f"Fecha no reconocida: {texto}")
+    return fecha.strftime("%Y-%m-%d 00:00:00")
+
+
+def _hora(valor):
+    if isinstance(valor, (datetime.time, datetime.datetime)):
+        return valor.strftime("%H:%M:%S.%f")
+    if isinstance(valor, (int, float)) and 0 <= valor < 1:
+        # Excel guarda las horas como fracción del día
+        segundos = round(valor * 86400)
+        return (datetime.datetime.min + datetime.timedelta(seconds=segundos)).strftime("%H:%M:%S.%f")
+    texto = _texto(valor, "Horario")
+    if texto is None:
+        return None
+    hora = _interpretar(texto, FORMATOS_HORA)
+    if hora is None:
+        raise FilaInvalida(f"Horario no reconocido: {texto}")
+    return hora.strftime("%H:%M:%S.%f")
+
+
+def _entero(valor, columna, obligatorio=False, minimo=0):
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        if obligatorio:
+            raise FilaInvalida(f"{columna} vacío")
+        return None
+    try:
+        numero = float(str(valor).replace(",", "").replace("$", "").strip())
+    except ValueError:
+        raise FilaInvalida(f"{columna} no es un número: {valor}")
+    if numero != numero or not numero.is_integer():
+        raise FilaInvalida(f"{columna} debe ser entero: {valor}")
+    if numero < minimo:
+        raise FilaInvalida(f"{columna} debe ser al menos {minimo}: {valor}")
+    return int(numero)
+
+
+def _valor(valores, posiciones, columna):
+    i = posiciones.get(columna)
+    return valores[i] if i is not None and i < len(valores) else None
+
+
+# Convertir los valores de una fila del archivo a una tupla en el orden de
+# COLUMNAS_GRILLA; lanza FilaInvalida con el motivo si no se puede
+def convertir_fila(valores, posiciones):
+    def valor(columna):
+        return _valor(valores, posiciones, columna)
+
+    return (
+        _texto(valor("Nombre del solicitante"), "Nombre del solicitante", obligatorio=True),
+        _fecha(valor("Fecha")),
+        _hora(valor("Horario")),
+        _entero(valor("Cantidad de personas"), "Cantidad de personas", obligatorio=True, minimo=1),
+        _texto(valor("Direccion"), "Direccion"),
+        _texto(valor("Zona"), "Zona"),
+        _texto(valor("Tipo de evento"), "Tipo de evento"),
+        _entero(valor("Costo"), "Costo"),
+    )
+
+
+# Fila completa en el orden de COLUMNAS_REGISTRO (la de la grilla más el
+# comentario y los puestos de tacos)
+def convertir_registro(valores, posiciones):
+    return convertir_fila(valores, posiciones) + (
+        _texto(_valor(valores, posiciones, "Comentario"), "Comentario"),
+        _entero(_valor(valores, posiciones, "puestos_tacos"), "puestos_tacos") or 0,
+    )
+
+
+# Índices de `taquizas` (nombre, DDL) para recrearlos después de la carga
+def _indices_secundarios(conexion):
+    return conexion.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = 'taquizas' AND sql IS NOT NULL"
+    ).fetchall()
+
+
+# Disparador que agrega cada fila nueva al índice de búsqueda; en una
+# carga grande se quita y las filas nuevas se indexan juntas al final
+# con un solo INSERT ... SELECT (unas diez veces más rápido que fila por fila)
+def _disparador_busqueda(conexion):
+    fila = conexion.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_busqueda_insertar'"
+    ).fetchone()
+    return fila[0] if fila else None
+
+
+def _indexar_busqueda(conexion, despues_de):
+    columnas = ", ".join(f'"{c}"' for c in COLUMNAS_BUSQUEDA)
+    conexion.execute(
+        f"INSERT INTO busqueda_taquizas (rowid, {columnas}) SELECT id, {columnas} FROM taquizas WHERE id > ?",
+        (despues_de,))
+
+
+# Importar el archivo. Devuelve (insertados, rechazados, ignoradas) donde
+# rechazados es una lista de (número de fila, motivo, valores originales)
+# e ignoradas los nombres de las columnas del archivo que no se importaron.
+# Si algo falla a la mitad (o la tarea se cancela) no se guarda ninguna fila.
+def importar(db, ruta, tamano_lote=TAMANO_LOTE, reportar=None, revisar_cancelacion=None):
+    lotes = leer_lotes(ruta, tamano_lote)
+    encabezado = next(lotes)
+    if encabezado is None:
+        raise ValueError("El archivo está vacío.")
+    posiciones = mapear_encabezado(encabezado)
+    ignoradas = columnas_ignoradas(encabezado, posiciones)
+
+    insertados = 0
+    rechazados = []
+    indices = []
+    disparador = None
+    with db.transaccion() as conexion:
+        for numero_lote, lote in enumerate(lotes):
+            if revisar_cancelacion is not None:
+                revisar_cancelacion()
+            if numero_lote == 1:
+                # Hay más de un lote: diferir los índices hasta el final
+                indices = _indices_secundarios(conexion)
+                for nombre, _ in indices:
+                    conexion.execute(f'DROP INDEX "{nombre}"')
+                disparador = _disparador_busqueda(conexion)
+                if disparador is not None:
+                    # Las filas del primer lote ya las indexó el disparador
+                    indexado_hasta = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM taquizas").fetchone()[0]
+                    conexion.execute("DROP TRIGGER trg_busqueda_insertar")
+
+            validas = []
+            for numero, valores in lote:
+                try:
+                    validas.append(convertir_registro(valores, posiciones))
+                except FilaInvalida as e:
+                    rechazados.append((numero, str(e), tuple(valores)))
+            insertados += registros.insertar_registros(conexion, validas, completos=True)
+            if reportar is not None:
+                reportar(None, f"{insertados} filas importadas, {len(rechazados)} rechazadas")
+
+        if indices:
+            if reportar is not None:
+                reportar(None, "reconstruyendo índices")
+            for _, sql in indices:
+                conexion.execute(sql)
+            conexion.execute("ANALYZE taquizas")
+        if disparador is not None:
+            if reportar is not None:
+                reportar(None, "indexando para la búsqueda")
+            _indexar_busqueda(conexion, indexado_hasta)
+            conexion.execute(disparador)
+    return insertados, rechazados, ignoradas
+
+
+# Guardar las filas rechazadas en un CSV para corregirlas y volver a importarlas
+def guardar_rechazados(ruta, rechazados):
+    with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(("Fila", "Motivo", "Valores"))
+        for numero, motivo, valores in rechazados:
+            escritor.writerow((numero, motivo) + tuple(valores))
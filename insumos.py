@@ -0,0 +1,111 @@
+import dependencias
+import asignaciones
+from asignaciones import INSUMOS
+
+# Planificación de insumos a partir de la cantidad de personas.
+#
+# Las recetas (kg por persona de cada insumo, por tipo de evento) forman
+# una matriz R de tipos x insumos. Para los eventos de un rango de fechas
+# se arma la matriz P de eventos x tipos con la cantidad de personas en la
+# columna del tipo de cada evento, y los kilos de todos los eventos salen
+# de un solo producto P @ R. La lista de compras por día suma esos kilos
+# por día.
+
+# Tipo de la receta que se usa para los eventos sin receta propia
+TIPO_GENERAL = '*'
+
+
+# Recetas guardadas: (tipos, matriz) con una fila por tipo de evento y una
+# columna por insumo (en el orden de INSUMOS); la receta general va primero
+def leer_recetas(conexion):
+    np = dependencias.numpy()
+    filas = conexion.execute(
+        f"SELECT tipo_evento, {', '.join(INSUMOS)} FROM recetas "
+        f"ORDER BY tipo_evento <> ?, tipo_evento", (TIPO_GENERAL,)
+    ).fetchall()
+    if not filas or filas[0][0] != TIPO_GENERAL:
+        raise ValueError("Falta la receta general de insumos.")
+    return [fila[0] for fila in filas], np.array([fila[1:] for fila in filas], dtype=float)
+
+
+# Guardar la receta (kg por persona en el orden de INSUMOS) de un tipo de evento
+def guardar_receta(conexion, tipo_evento, kilos_por_persona):
+    conexion.execute(
+        f"INSERT OR REPLACE INTO recetas (tipo_evento, {', '.join(INSUMOS)}) "
+        f"VALUES (?, {', '.join('?' for _ in INSUMOS)})",
+        [tipo_evento] + [float(k) for k in kilos_por_persona])
+
+
+# Plan de insumos de los eventos entre `desde` y `hasta` (fechas
+# 'AAAA-MM-DD', ambas incluidas). Devuelve un diccionario con arreglos
+# alineados por evento:
+#   rowids, dias ('AAAA-MM-DD'), calculados (kg según receta),
+#   capturados (kg guardados), faltantes (sin ningún insumo capturado)
+#   y plan (capturados, o calculados si faltan)
+def planificar(conexion, desde, hasta):
+    np = dependencias.numpy()
+    tipos, recetas = leer_recetas(conexion)
+    filas = conexion.execute(f"""
+        SELECT t.id, substr("Fecha", 1, 10), "Cantidad de personas", "Tipo de evento", {', '.join(INSUMOS)}
+        FROM taquizas t JOIN asignaciones_taquizas a ON a.rowid_taquiza = t.id
+        WHERE "Fecha" >= ? AND "Fecha" < date(?, '+1 day')
+        ORDER BY "Fecha", t.id
+    """, (desde, hasta)).fetchall()
+
+    n = len(filas)
+    rowids = np.array([f[0] for f in filas], dtype=np.int64)
+    dias = np.array([f[1] for f in filas], dtype=object)
+    personas = np.array([f[2] or 0 for f in filas], dtype=float)
+    posicion_tipo = {tipo: i for i, tipo in enumerate(tipos)}
+    indice_tipo = np.array([posicion_tipo.get(f[3], 0) for f in filas], dtype=np.int64)
+    capturados = np.array([[k or 0.0 for k in f[4:]] for f in filas], dtype=float).reshape(n, len(INSUMOS))
+
+    # P: eventos x tipos, con las personas de cada evento en la columna de su tipo
+    P = np.zeros((n, len(tipos)))
+    P[np.arange(n), indice_tipo] = personas
+    calculados = np.round(P @ recetas, 2)
+
+    faltantes = ~capturados.any(axis=1)
+    plan = np.where(faltantes[:, None], calculados, capturados)
+    return {
+        'rowids': rowids, 'dias': dias, 'calculados': calculados,
+        'capturados': capturados, 'faltantes': faltantes, 'plan': plan,
+    }
+
+
+# Encabezados de la lista de compras
+COLUMNAS_COMPRAS = ("Día", "Eventos", "Sin capturar") + INSUMOS
+
+
+# Lista de compras por día: [(día, eventos, sin capturar, kg...), ...].
+# Los kilos de cada evento se suman en la fila de su día con np.add.at
+# (memoria proporcional a días + eventos, sin una matriz días x eventos).
+def lista_compras(plan):
+    np = dependencias.numpy()
+    if not len(plan['dias']):
+        return []
+    dias, indice_dia = np.unique(plan['dias'].astype(str), return_inverse=True)
+    indice_dia = indice_dia.ravel()
+    kilos = np.zeros((len(dias), plan['plan'].shape[1]))
+    np.add.at(kilos, indice_dia, plan['plan'])
+    kilos = np.round(kilos, 2)
+    eventos = np.bincount(indice_dia, minlength=len(dias))
+    sin_capturar = np.bincount(indice_dia, weights=plan['faltantes'].astype(float), minlength=len(dias)).astype(int)
+    return [
+        (dia, int(eventos[i]), int(sin_capturar[i])) + tuple(float(k) for k in kilos[i])
+        for i, dia in enumerate(dias)
+    ]
+
+
+# Guardar los kilos calculados en los eventos del rango que no tienen
+# ningún insumo capturado; devuelve cuántos eventos se llenaron
+def llenar_faltantes(db, desde, hasta):
+    with db.transaccion() as conexion:
+        plan = planificar(conexion, desde, hasta)
+        faltantes = plan['faltantes']
+        filas = [
+            tuple(float(k) for k in kilos) + (int(rowid),)
+            for rowid, kilos in zip(plan['rowids'][faltantes], plan['calculados'][faltantes])
+        ]
+        asignaciones.guardar_insumos(conexion, filas)
+    return len(filas)
@@ -0,0 +1,55 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Medir el arranque de la aplicación: se lanza `taquizas.py --medir-arranque`
+# varias veces y se informa la mediana del tiempo de importación, del
+# tiempo hasta el primer cuadro y del tiempo total del proceso (incluye
+# arrancar el intérprete). Con --limite el script termina con código 1 si
+# el primer cuadro tarda más, para detectar regresiones.
+#
+# Uso: python medir_arranque.py --repeticiones 5 --limite 1.5
+
+
+def medir_una_vez(script):
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, script, "--medir-arranque"],
+        capture_output=True, text=True, check=True, timeout=120,
+    )
+    total = time.perf_counter() - inicio
+    for linea in reversed(salida.stdout.splitlines()):
+        if linea.startswith("{"):
+            medida = json.loads(linea)
+            medida["proceso_s"] = round(total, 4)
+            return medida
+    raise RuntimeError(f"La aplicación no informó tiempos de arranque:\n{salida.stdout}{salida.stderr}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Medir el tiempo de arranque de la aplicación de taquizas")
+    parser.add_argument("--script", default="taquizas.py")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=None,
+                        help="segundos máximos permitidos hasta el primer cuadro (mediana)")
+    args = parser.parse_args(argv)
+
+    medidas = [medir_una_vez(args.script) for _ in range(args.repeticiones)]
+    resumen = {
+        clave: round(statistics.median(m[clave] for m in medidas), 4)
+        for clave in ("imports_s", "primer_cuadro_s", "proceso_s")
+    }
+    resumen["repeticiones"] = args.repeticiones
+    print(json.dumps(resumen, indent=2))
+
+    if args.limite is not None and resumen["primer_cuadro_s"] > args.limite:
+        print(f"El primer cuadro tardó {resumen['primer_cuadro_s']} s (límite {args.limite} s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
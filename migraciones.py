@@ -0,0 +1,394 @@
+import logging
+import re
+
+# Migraciones de esquema versionadas. La versión aplicada se guarda en
+# `PRAGMA user_version`, así que cualquier archivo de base de datos (nuevo
+# o de una versión anterior de la aplicación) se pone al día al arrancar.
+
+log = logging.getLogger(__name__)
+
+
+# Columnas de asignación de colaboradores e insumos (se agregaron a mano
+# en bases de datos antiguas, por eso se crean sólo si faltan)
+COLUMNAS_ASIGNACION = (
+    ('Comentario', 'TEXT'),
+    ('colaboradores', 'TEXT NULL'),
+    ('kg_tortilla', 'REAL DEFAULT 0'),
+    ('kg_queso', 'REAL DEFAULT 0'),
+    ('kg_tortilla_harina', 'REAL DEFAULT 0'),
+    ('kg_bistek', 'REAL DEFAULT 0'),
+    ('kg_chorizo', 'REAL DEFAULT 0'),
+    ('kg_pastor', 'REAL DEFAULT 0'),
+    ('kg_cebolla', 'REAL DEFAULT 0'),
+    ('kg_limones', 'REAL DEFAULT 0'),
+    ('puestos_tacos', 'INTEGER DEFAULT 0'),
+)
+
+
+# Migración 1: tabla principal de taquizas
+def _crear_tabla_taquizas(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS "taquizas" (
+            "Nombre del solicitante" TEXT,
+            "Fecha" TIMESTAMP,
+            "Horario" TIME,
+            "Cantidad de personas" INTEGER,
+            "Direccion" TEXT,
+            "Zona" TEXT,
+            "Tipo de evento" TEXT,
+            "Costo" INTEGER
+        )
+    """)
+
+
+# Migración 2: columnas de comentarios, colaboradores e insumos
+def _agregar_columnas_asignacion(conexion):
+    existentes = {fila[1] for fila in conexion.execute('PRAGMA table_info("taquizas")')}
+    for nombre, tipo in COLUMNAS_ASIGNACION:
+        if nombre not in existentes:
+            conexion.execute(f'ALTER TABLE "taquizas" ADD COLUMN "{nombre}" {tipo}')
+
+
+# Migración 3: índices de cobertura para los accesos por fecha, zona y tipo de evento.
+# Incluyen las columnas que suman las estadísticas para que las consultas
+# agregadas se resuelvan sólo con el índice, sin leer la tabla.
+def _crear_indices_analitica(conexion):
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_taquizas_fecha
+        ON taquizas ("Fecha", "Cantidad de personas", "Costo")
+    """)
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_taquizas_zona
+        ON taquizas ("Zona", "Cantidad de personas", "Costo")
+    """)
+    conexion.execute("""
+        CREATE INDEX IF NOT EXISTS idx_taquizas_tipo_evento
+        ON taquizas ("Tipo de evento", "Cantidad de personas", "Costo")
+    """)
+
+
+# Migración 4: un índice por cada columna por la que se puede ordenar la
+# grilla principal. El índice de una sola columna queda ordenado por
+# (columna, rowid), justo la llave que usa la paginación, así que ordenar
+# y avanzar de página es una búsqueda en el índice y no un ordenamiento.
+def _crear_indices_orden(conexion):
+    columnas = {
+        'nombre': "Nombre del solicitante",
+        'fecha_orden': "Fecha",
+        'horario': "Horario",
+        'personas': "Cantidad de personas",
+        'direccion': "Direccion",
+        'zona_orden': "Zona",
+        'tipo_evento_orden': "Tipo de evento",
+        'costo': "Costo",
+    }
+    for sufijo, columna in columnas.items():
+        conexion.execute(f'CREATE INDEX IF NOT EXISTS idx_taquizas_{sufijo} ON taquizas ("{columna}")')
+
+
+# Migración 5: puntajes de sentimiento guardados por registro, con el hash
+# del comentario con que se calcularon. Los disparadores borran el puntaje
+# cuando el comentario cambia o el registro se elimina, así sólo los
+# comentarios nuevos o modificados quedan pendientes de calificar.
+def _crear_tabla_sentimientos(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS sentimientos (
+            rowid_taquiza INTEGER PRIMARY KEY,
+            hash_comentario TEXT NOT NULL,
+            compuesto REAL NOT NULL,
+            sentimiento TEXT NOT NULL
+        )
+    """)
+    conexion.execute("CREATE INDEX IF NOT EXISTS idx_sentimientos_hash ON sentimientos (hash_comentario)")
+    conexion.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_sentimientos_comentario
+        AFTER UPDATE OF "Comentario" ON taquizas
+        WHEN old."Comentario" IS NOT new."Comentario"
+        BEGIN
+            DELETE FROM sentimientos WHERE rowid_taquiza = old.rowid;
+        END
+    """)
+    conexion.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_sentimientos_eliminar
+        AFTER DELETE ON taquizas
+        BEGIN
+            DELETE FROM sentimientos WHERE rowid_taquiza = old.rowid;
+        END
+    """)
+
+
+# Migración 6: modelos de pronóstico ajustados, guardados con la serie
+# (y su firma) con la que se entrenaron
+def _crear_tabla_modelos_pronostico(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS modelos_pronostico (
+            clave TEXT PRIMARY KEY,
+            orden TEXT NOT NULL,
+            firma TEXT NOT NULL,
+            serie TEXT NOT NULL,
+            meses_sin_busqueda INTEGER NOT NULL DEFAULT 0,
+            modelo BLOB NOT NULL,
+            actualizado TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+# Migración 7: centroides de la segmentación de eventos por cada k, para
+# etiquetar eventos nuevos sin volver a entrenar
+def _crear_tabla_modelos_segmentacion(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS modelos_segmentacion (
+            k INTEGER PRIMARY KEY,
+            eventos INTEGER NOT NULL,
+            modelo TEXT NOT NULL,
+            actualizado TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+# Migración 8: recetas de insumos (kg por persona) por tipo de evento; la
+# fila '*' es la receta general para los tipos sin receta propia
+RECETA_GENERAL = {
+    'kg_tortilla': 0.10,
+    'kg_queso': 0.03,
+    'kg_tortilla_harina': 0.03,
+    'kg_bistek': 0.12,
+    'kg_chorizo': 0.06,
+    'kg_pastor': 0.12,
+    'kg_cebolla': 0.04,
+    'kg_limones': 0.025,
+}
+
+
+def _crear_tabla_recetas(conexion):
+    columnas = ", ".join(f"{nombre} REAL NOT NULL DEFAULT 0" for nombre in RECETA_GENERAL)
+    conexion.execute(f"CREATE TABLE IF NOT EXISTS recetas (tipo_evento TEXT PRIMARY KEY, {columnas})")
+    conexion.execute(
+        f"INSERT OR IGNORE INTO recetas (tipo_evento, {', '.join(RECETA_GENERAL)}) "
+        f"VALUES ('*', {', '.join('?' for _ in RECETA_GENERAL)})",
+        list(RECETA_GENERAL.values()))
+
+
+# Migración 9: colaboradores e insumos normalizados. Los colaboradores
+# dejan de ser un texto libre y los insumos dejan de ser una columna por
+# insumo: se guardan en `staff` (un registro por persona), `event_staff`
+# (quién trabaja en cada taquiza) y `event_supplies` (kg de cada insumo
+# por taquiza, sólo los distintos de cero), con índices para buscar por
+# colaborador o por insumo. La tabla taquizas se reconstruye con una llave
+# `id` explícita (alias de rowid, así los rowid no cambian ni con VACUUM)
+# para que las tablas nuevas la referencien con llaves foráneas. La vista
+# asignaciones_taquizas da la forma anterior (colaboradores, kg_...).
+COLUMNAS_NORMALIZADAS = tuple(nombre for nombre, _ in COLUMNAS_ASIGNACION
+                              if nombre == 'colaboradores' or nombre.startswith('kg_'))
+
+
+# Nombres de colaboradores del texto libre de la columna anterior
+# ("Juan, Luis y Ana"). La migración tiene su propio separador para que su
+# resultado no cambie si después cambia el de la agenda. Los nombres se
+# guardan como se escribieron (sólo se quitan espacios sobrantes): staff
+# compara sin mayúsculas, así que "JUAN" y "Juan" son la misma persona y
+# un nombre repetido en el mismo evento se asigna una sola vez.
+_SEPARADORES_COLABORADORES = re.compile(r"\s*(?:[,;/\n]|\by\b)\s*")
+
+
+def _separar_colaboradores(texto):
+    nombres = (" ".join(nombre.split()) for nombre in _SEPARADORES_COLABORADORES.split(texto or ""))
+    return [nombre for nombre in nombres if nombre]
+
+
+def _normalizar_colaboradores_e_insumos(conexion):
+    conservadas = [
+        (nombre, tipo, defecto)
+        for _, nombre, tipo, _, defecto, _ in conexion.execute('PRAGMA table_info("taquizas")')
+        if nombre not in COLUMNAS_NORMALIZADAS
+    ]
+    definiciones = ", ".join(
+        f'"{nombre}" {tipo}' + (f" DEFAULT {defecto}" if defecto is not None else "")
+        for nombre, tipo, defecto in conservadas)
+    lista = ", ".join(f'"{nombre}"' for nombre, _, _ in conservadas)
+
+    conexion.execute('ALTER TABLE "taquizas" RENAME TO "taquizas_anterior"')
+    conexion.execute(f'CREATE TABLE "taquizas" (id INTEGER PRIMARY KEY, {definiciones})')
+    conexion.execute(f'INSERT INTO "taquizas" (id, {lista}) SELECT rowid, {lista} FROM "taquizas_anterior"')
+
+    conexion.execute("""
+        CREATE TABLE staff (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL UNIQUE COLLATE NOCASE
+        )
+    """)
+    conexion.execute("""
+        CREATE TABLE event_staff (
+            rowid_taquiza INTEGER NOT NULL REFERENCES taquizas (id) ON DELETE CASCADE,
+            staff_id INTEGER NOT NULL REFERENCES staff (id) ON DELETE CASCADE,
+            posicion INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (rowid_taquiza, staff_id)
+        ) WITHOUT ROWID
+    """)
+    conexion.execute("CREATE INDEX idx_event_staff_staff ON event_staff (staff_id, rowid_taquiza)")
+    conexion.execute("""
+        CREATE TABLE event_supplies (
+            rowid_taquiza INTEGER NOT NULL REFERENCES taquizas (id) ON DELETE CASCADE,
+            insumo TEXT NOT NULL,
+            kg REAL NOT NULL,
+            PRIMARY KEY (rowid_taquiza, insumo)
+        ) WITHOUT ROWID
+    """)
+    conexion.execute("CREATE INDEX idx_event_supplies_insumo ON event_supplies (insumo, rowid_taquiza, kg)")
+
+    # Pasar los datos de las columnas anteriores (si las había)
+    anteriores = {fila[1] for fila in conexion.execute('PRAGMA table_info("taquizas_anterior")')}
+    if 'colaboradores' in anteriores:
+        personal = []
+        for rowid, texto in conexion.execute(
+                'SELECT rowid, colaboradores FROM "taquizas_anterior" WHERE colaboradores <> \'\''):
+            personal.extend((rowid, nombre, posicion)
+                            for posicion, nombre in enumerate(_separar_colaboradores(texto)))
+        conexion.executemany("INSERT OR IGNORE INTO staff (nombre) VALUES (?)",
+                             [(nombre,) for _, nombre, _ in personal])
+        conexion.executemany(
+            "INSERT OR IGNORE INTO event_staff (rowid_taquiza, staff_id, posicion) "
+            "SELECT ?, id, ? FROM staff WHERE nombre = ?",
+            [(rowid, posicion, nombre) for rowid, nombre, posicion in personal])
+    for columna in COLUMNAS_NORMALIZADAS[1:]:
+        if columna in anteriores:
+            conexion.execute(
+                f'INSERT INTO event_supplies (rowid_taquiza, insumo, kg) '
+                f'SELECT rowid, ?, {columna} FROM "taquizas_anterior" WHERE {columna} <> 0',
+                (columna[3:],))
+
+    # Al borrar la tabla anterior se van sus índices y disparadores; se crean de nuevo
+    conexion.execute('DROP TABLE "taquizas_anterior"')
+    _crear_indices_analitica(conexion)
+    _crear_indices_orden(conexion)
+    _crear_tabla_sentimientos(conexion)
+
+    colaboradores = """(
+        SELECT group_concat(nombre, ', ') FROM (
+            SELECT s.nombre FROM event_staff es JOIN staff s ON s.id = es.staff_id
+            WHERE es.rowid_taquiza = t.id ORDER BY es.posicion
+        )
+    )"""
+    kilos = ", ".join(
+        f"COALESCE((SELECT kg FROM event_supplies WHERE rowid_taquiza = t.id AND insumo = '{columna[3:]}'), 0.0) AS {columna}"
+        for columna in COLUMNAS_NORMALIZADAS[1:])
+    conexion.execute(f"""
+        CREATE VIEW asignaciones_taquizas AS
+        SELECT t.id AS rowid_taquiza, {colaboradores} AS colaboradores, {kilos}
+        FROM taquizas t
+    """)
+
+
+# Migración 10: índice de texto completo (FTS5) sobre el nombre del
+# solicitante, la dirección y el comentario. Es una tabla de contenido
+# externo: el texto sigue sólo en taquizas y el índice se mantiene al día
+# con disparadores. Se ignoran acentos y mayúsculas, y se indexan los
+# prefijos de 2 y 3 letras para que las búsquedas por prefijo sean directas.
+COLUMNAS_BUSQUEDA = ("Nombre del solicitante", "Direccion", "Comentario")
+
+
+def _crear_busqueda_texto(conexion):
+    columnas = ", ".join(f'"{c}"' for c in COLUMNAS_BUSQUEDA)
+    nuevos = ", ".join(f'new."{c}"' for c in COLUMNAS_BUSQUEDA)
+    anteriores = ", ".join(f'old."{c}"' for c in COLUMNAS_BUSQUEDA)
+    conexion.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_taquizas USING fts5(
+            {columnas}, content='taquizas', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    conexion.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_busqueda_insertar AFTER INSERT ON taquizas
+        BEGIN
+            INSERT INTO busqueda_taquizas (rowid, {columnas}) VALUES (new.id, {nuevos});
+        END
+    """)
+    conexion.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_busqueda_eliminar AFTER DELETE ON taquizas
+        BEGIN
+            INSERT INTO busqueda_taquizas (busqueda_taquizas, rowid, {columnas}) VALUES ('delete', old.id, {anteriores});
+        END
+    """)
+    conexion.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_busqueda_modificar AFTER UPDATE OF {columnas} ON taquizas
+        BEGIN
+            INSERT INTO busqueda_taquizas (busqueda_taquizas, rowid, {columnas}) VALUES ('delete', old.id, {anteriores});
+            INSERT INTO busqueda_taquizas (rowid, {columnas}) VALUES (new.id, {nuevos});
+        END
+    """)
+    conexion.execute("INSERT INTO busqueda_taquizas (busqueda_taquizas) VALUES ('rebuild')")
+
+
+# Migración 11: revisión de los datos de eventos. Un contador en
+# revision_datos que los disparadores suben con cada cambio en taquizas o
+# en las tablas de asignación; es la versión con la que se invalidan las
+# cachés de resultados (BaseDatos.version_datos). Las escrituras en otras
+# tablas (puntajes de sentimiento, modelos guardados, recetas) no la cambian.
+TABLAS_REVISADAS = ("taquizas", "staff", "event_staff", "event_supplies")
+
+
+def _crear_revision_datos(conexion):
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS revision_datos (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+    """)
+    conexion.execute("INSERT OR IGNORE INTO revision_datos (id, revision) VALUES (1, 0)")
+    for tabla in TABLAS_REVISADAS:
+        for operacion in ("INSERT", "UPDATE", "DELETE"):
+            conexion.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_revision_{tabla}_{operacion.lower()}
+                AFTER {operacion} ON {tabla}
+                BEGIN
+                    UPDATE revision_datos SET revision = revision + 1 WHERE id = 1;
+                END
+            """)
+
+
+# Lista ordenada de migraciones: (versión, descripción, función)
+MIGRACIONES = [
+    (1, "Tabla taquizas", _crear_tabla_taquizas),
+    (2, "Columnas de asignación de colaboradores e insumos", _agregar_columnas_asignacion),
+    (3, "Índices por fecha, zona y tipo de evento", _crear_indices_analitica),
+    (4, "Índices para ordenar la grilla", _crear_indices_orden),
+    (5, "Tabla de puntajes de sentimiento", _crear_tabla_sentimientos),
+    (6, "Tabla de modelos de pronóstico", _crear_tabla_modelos_pronostico),
+    (7, "Tabla de modelos de segmentación", _crear_tabla_modelos_segmentacion),
+    (8, "Tabla de recetas de insumos", _crear_tabla_recetas),
+    (9, "Colaboradores e insumos normalizados", _normalizar_colaboradores_e_insumos),
+    (10, "Búsqueda de texto completo", _crear_busqueda_texto),
+    (11, "Revisión de los datos de eventos", _crear_revision_datos),
+]
+
+
+# Versión de esquema que espera esta versión de la aplicación
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+# Obtener la versión de esquema guardada en el archivo
+def version_esquema(db):
+    with db.conexion() as conexion:
+        return conexion.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Aplicar las migraciones pendientes, cada una en su propia transacción,
+# y actualizar las estadísticas del planificador si hubo cambios.
+# Devuelve la lista de versiones aplicadas.
+def aplicar_migraciones(db):
+    aplicadas = []
+    actual = version_esquema(db)
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= actual:
+            continue
+        log.info("Aplicando migración %s: %s", version, descripcion)
+        with db.transaccion() as conexion:
+            migracion(conexion)
+            conexion.execute(f"PRAGMA user_version = {int(version)}")
+        aplicadas.append(version)
+
+    if aplicadas:
+        # ANALYZE llena sqlite_stat1 para que el planificador elija los índices nuevos
+        with db.transaccion() as conexion:
+            conexion.execute("ANALYZE")
+    return aplicadas
@@ -0,0 +1,90 @@
+import base_datos
+import estadisticas
+import pronosticos
+import segmentacion
+import sentimientos
+from migraciones import aplicar_migraciones
+
+# Núcleo sin interfaz de la aplicación: abrir la base de datos y generar
+# los reportes de análisis. No importa Tk, así que lo pueden usar la
+# ventana (taquizas.py), la línea de comandos (reportes.py) y las pruebas.
+#
+# Cada reporte devuelve (tablas, resumen): `tablas` es un diccionario
+# nombre -> (encabezados, filas) y `resumen` un diccionario con los datos
+# principales para mostrar o guardar como JSON.
+
+
+# Abrir la base de datos con el esquema al día
+def abrir(ruta=base_datos.RUTA_DB, tamano_pool=4):
+    db = base_datos.BaseDatos(ruta, tamano_pool)
+    aplicar_migraciones(db)
+    return db
+
+
+# Eventos, personas y costos por zona, tipo de evento y mes
+def reporte_estadisticas(db, **_):
+    tablas = {}
+    with db.conexion() as conexion:
+        for dimension in estadisticas.DIMENSIONES:
+            tablas[f"estadisticas_{dimension}"] = (
+                estadisticas.columnas_resumen(dimension), estadisticas.resumen_por(conexion, dimension))
+    resumen = {nombre: len(filas) for nombre, (_, filas) in tablas.items()}
+    return tablas, resumen
+
+
+# Pronóstico de personas por mes: total y por zona / tipo de evento
+def reporte_pronostico(db, pasos=12, reportar=None, revisar_cancelacion=None, **_):
+    _, prediccion, orden, modo = pronosticos.pronosticar(
+        db, pasos, reportar=reportar, revisar_cancelacion=revisar_cancelacion)
+    tabla, _, predicciones = pronosticos.pronosticar_por_grupo(
+        db, pasos=pasos, reportar=reportar, revisar_cancelacion=revisar_cancelacion)
+    tablas = {
+        "pronostico_total": (("Mes", "Personas"),
+                             [(fecha.strftime('%Y-%m'), float(valor)) for fecha, valor in prediccion.items()]),
+        "pronostico_grupos": (pronosticos.COLUMNAS_LOTE,
+                              [tuple(fila) for fila in tabla.itertuples(index=False)]),
+        "pronostico_grupos_mensual": (("Dimensión", "Grupo", "Mes", "Personas"), [
+            (dimension, grupo, fecha.strftime('%Y-%m'), float(valor))
+            for (dimension, grupo), serie in predicciones.items()
+            for fecha, valor in serie.items()
+        ]),
+    }
+    resumen = {"orden": list(orden), "modelo": modo, "series_por_grupo": len(predicciones)}
+    return tablas, resumen
+
+
+# Sentimiento de cada comentario (se califican sólo los pendientes)
+def reporte_sentimientos(db, reportar=None, revisar_cancelacion=None, **_):
+    calificados = sentimientos.actualizar_puntajes(db, reportar, revisar_cancelacion)
+    with db.conexion() as conexion:
+        resultados = sentimientos.leer_resultados(conexion)
+    conteos = {}
+    for _, _, _, sentimiento in resultados:
+        conteos[sentimiento] = conteos.get(sentimiento, 0) + 1
+    tablas = {
+        "sentimientos": (("ID", "Nombre del Solicitante", "Comentario", "Sentimiento"), resultados),
+        "sentimientos_resumen": (("Sentimiento", "Comentarios"), sorted(conteos.items())),
+    }
+    return tablas, {"calificados_ahora": calificados, "por_sentimiento": conteos}
+
+
+# Segmentos de eventos con K-Means
+def reporte_segmentacion(db, k=segmentacion.K_POR_DEFECTO, reportar=None, revisar_cancelacion=None, **_):
+    df, descripcion, entrenado = segmentacion.segmentar(
+        db, k, reportar=reportar, revisar_cancelacion=revisar_cancelacion)
+    tablas = {
+        "segmentos": (segmentacion.COLUMNAS_DESCRIPCION,
+                      [tuple(fila) for fila in descripcion.itertuples(index=False)]),
+        "segmentos_eventos": (("ID", "Segmento"),
+                              [(int(rowid), int(segmento)) for rowid, segmento in df['Segmento'].items()]),
+    }
+    return tablas, {"k": k, "entrenado": entrenado, "eventos": len(df)}
+
+
+# Reportes disponibles: nombre -> función(db, **opciones)
+REPORTES = {
+    'estadisticas': reporte_estadisticas,
+    'pronostico': reporte_pronostico,
+    'sentimientos': reporte_sentimientos,
+    'segmentacion': reporte_segmentacion,
+}
@@ -0,0 +1,360 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dependencias
+import estadisticas
+import filtros
+
+# Servicio de pronóstico de demanda (personas por mes) con ARIMA.
+#
+# - El orden (p, d, q) se elige por AIC probando los candidatos en
+#   paralelo en un pool de procesos.
+# - El modelo ajustado se guarda en la tabla `modelos_pronostico` junto con
+#   la serie mensual con que se entrenó y su firma (hash). Si la serie no
+#   cambió se reutiliza tal cual; si sólo llegaron meses nuevos (o cambió
+#   el último mes, que suele estar incompleto) se aplican los mismos
+#   parámetros a la serie nueva sin volver a optimizar. Sólo se busca y
+#   ajusta desde cero cuando cambian meses anteriores o se acumularon
+#   demasiados meses sin reajuste.
+# - Con un filtro (ver filtros.py) las series se calculan sólo con los
+#   eventos que lo cumplen y su modelo se guarda con otra clave.
+
+# Órdenes candidatos (p, d, q)
+ORDENES_CANDIDATOS = [orden for orden in itertools.product(range(3), range(2), range(3))]
+
+# Orden que se usaba antes de la búsqueda; se usa si ningún candidato ajusta
+ORDEN_POR_DEFECTO = (1, 1, 1)
+
+# Meses nuevos que se aceptan extendiendo el ajuste anterior antes de
+# volver a buscar el orden
+MAX_MESES_SIN_BUSQUEDA = 6
+
+# Dimensiones con pronóstico por grupo (ver estadisticas.DIMENSIONES)
+DIMENSIONES_LOTE = ('zona', 'tipo_evento')
+
+# Meses mínimos de historia para pronosticar una serie
+MIN_MESES = 3
+
+# Modelos en memoria para no leer ni deserializar en cada clic: clave -> (firma, resultados, orden)
+_memoria = {}
+_candado_memoria = threading.Lock()
+
+
+# Serie mensual de personas calculada en SQLite (una fila por mes, con el
+# índice de Fecha) y completada con ceros en los meses sin eventos
+def serie_mensual(conexion, filtro=None):
+    pd = dependencias.pandas()
+    where, parametros = filtros.clausula(filtro, extra=('"Fecha" IS NOT NULL', "mes IS NOT NULL"))
+    filas = conexion.execute(f"""
+        SELECT strftime('%Y-%m', "Fecha") AS mes, TOTAL("Cantidad de personas")
+        FROM taquizas
+        {where}
+        GROUP BY mes
+        ORDER BY mes
+    """, parametros).fetchall()
+    if not filas:
+        return pd.Series([], dtype=float, name='Cantidad de personas')
+    serie = pd.Series([valor for _, valor in filas], index=[mes for mes, _ in filas], name='Cantidad de personas')
+    return _completar_meses(serie)
+
+
+# Reindexar por mes (índice 'AAAA-MM') con ceros en los meses faltantes
+# y pasar a fechas de fin de mes con frecuencia mensual, como espera ARIMA.
+# Los meses se completan como periodos ('M' de periodo es válido en todas
+# las versiones de pandas) y la frecuencia de las fechas se da con el
+# objeto MonthEnd: el alias 'M' para fechas está en desuso desde pandas
+# 2.2 (ahora es 'ME', que las versiones anteriores no conocen).
+def _completar_meses(datos):
+    pd = dependencias.pandas()
+    meses = pd.PeriodIndex(datos.index, freq='M')
+    datos = datos.set_axis(meses).reindex(pd.period_range(meses.min(), meses.max(), freq='M'), fill_value=0.0)
+    datos.index = pd.DatetimeIndex(datos.index.to_timestamp(how='end').normalize(), freq=pd.offsets.MonthEnd())
+    return datos
+
+
+# Series mensuales de personas por grupo (zona o tipo de evento) en una
+# sola consulta GROUP BY (grupo, mes), pivoteadas a un DataFrame con un
+# mes por fila y un grupo por columna
+def series_por_grupo(conexion, dimension, filtro=None):
+    if dimension not in DIMENSIONES_LOTE:
+        raise ValueError(f"Dimensión desconocida: {dimension}")
+    pd = dependencias.pandas()
+    expresion = estadisticas.DIMENSIONES[dimension][1]
+    where, parametros = filtros.clausula(filtro, extra=("grupo IS NOT NULL", "mes IS NOT NULL"))
+    filas = conexion.execute(f"""
+        SELECT {expresion} AS grupo, strftime('%Y-%m', "Fecha") AS mes, TOTAL("Cantidad de personas")
+        FROM taquizas
+        {where}
+        GROUP BY grupo, mes
+    """, parametros).fetchall()
+    if not filas:
+        return pd.DataFrame(dtype=float)
+    largo = pd.DataFrame(filas, columns=['grupo', 'mes', 'personas'])
+    tabla = largo.pivot(index='mes', columns='grupo', values='personas').sort_index()
+    return _completar_meses(tabla.fillna(0.0))
+
+
+# Firma de la serie: identifica los datos con que se entrenó un modelo
+def _puntos(serie):
+    return [[fecha.strftime('%Y-%m'), float(valor)] for fecha, valor in serie.items()]
+
+
+def firma_serie(puntos):
+    return hashlib.sha1(json.dumps(puntos).encode('utf-8')).hexdigest()
+
+
+# Ajustar un orden y devolver su AIC (infinito si no converge).
+# Es una función de módulo para poder enviarla a otros procesos.
+def evaluar_orden(serie, orden):
+    ARIMA = dependencias.arima()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return orden, float(ARIMA(serie, order=orden).fit().aic)
+    except Exception:
+        return orden, float('inf')
+
+
+# Probar los órdenes candidatos en paralelo y devolver el de menor AIC
+def buscar_orden(serie, procesos=None, revisar_cancelacion=None):
+    # Con pocos datos los órdenes altos no se pueden estimar
+    candidatos = [orden for orden in ORDENES_CANDIDATOS if sum(orden) + 2 < len(serie)]
+    if not candidatos:
+        return ORDEN_POR_DEFECTO
+    procesos = procesos or min(len(candidatos), os.cpu_count() or 1)
+    if procesos <= 1:
+        resultados = []
+        for orden in candidatos:
+            if revisar_cancelacion is not None:
+                revisar_cancelacion()
+            resultados.append(evaluar_orden(serie, orden))
+    else:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            futuros = [pool.submit(evaluar_orden, serie, orden) for orden in candidatos]
+            resultados = []
+            try:
+                for futuro in futuros:
+                    if revisar_cancelacion is not None:
+                        revisar_cancelacion()
+                    resultados.append(futuro.result())
+            except BaseException:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+    orden, aic = min(resultados, key=lambda r: r[1])
+    return orden if aic != float('inf') else ORDEN_POR_DEFECTO
+
+
+def _ajustar(serie, orden):
+    ARIMA = dependencias.arima()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARIMA(serie, order=orden).fit()
+
+
+def _leer_guardado(db, clave):
+    with db.conexion() as conexion:
+        return conexion.execute(
+            "SELECT orden, firma, serie, meses_sin_busqueda, modelo FROM modelos_pronostico WHERE clave = ?",
+            (clave,)).fetchone()
+
+
+def _guardar(db, clave, orden, firma, puntos, meses_sin_busqueda, resultados):
+    with db.transaccion() as conexion:
+        conexion.execute("""
+            INSERT OR REPLACE INTO modelos_pronostico
+                (clave, orden, firma, serie, meses_sin_busqueda, modelo, actualizado)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (clave, json.dumps(list(orden)), firma, json.dumps(puntos), meses_sin_busqueda,
+              pickle.dumps(resultados)))
+
+
+# Buscar el orden y ajustar una serie en un mismo proceso. La usan los
+# lotes por grupo, donde el paralelismo es entre series y no entre órdenes.
+def buscar_y_ajustar(serie):
+    orden = buscar_orden(serie, procesos=1)
+    return orden, _ajustar(serie, orden)
+
+
+# Modelo ya entrenado que sirve para la serie (reutilizado o extendido con
+# los meses nuevos), o None si hay que buscar el orden y ajustar de nuevo
+def _modelo_guardado(db, clave, serie, puntos, firma, reportar=None):
+    with _candado_memoria:
+        en_memoria = _memoria.get(clave)
+    if en_memoria is not None and en_memoria[0] == firma:
+        return en_memoria[1], en_memoria[2], 'reutilizado'
+
+    guardado = _leer_guardado(db, clave)
+    if guardado is None:
+        return None
+    orden_guardado, firma_guardada, serie_guardada, meses_sin_busqueda, modelo = guardado
+    orden_guardado = tuple(json.loads(orden_guardado))
+    if firma_guardada == firma:
+        resultados = pickle.loads(modelo)
+        modo = 'reutilizado'
+    else:
+        anteriores = json.loads(serie_guardada)
+        # Meses cerrados iguales: todo menos el último mes guardado,
+        # que pudo seguir recibiendo eventos
+        cerrados = anteriores[:-1]
+        nuevos = len(puntos) - len(anteriores)
+        if puntos[:len(cerrados)] != cerrados or nuevos < 0 or \
+                meses_sin_busqueda + nuevos > MAX_MESES_SIN_BUSQUEDA:
+            return None
+        if reportar is not None:
+            reportar(None, "extendiendo el modelo con los meses nuevos")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            resultados = pickle.loads(modelo).apply(serie, refit=False)
+        _guardar(db, clave, orden_guardado, firma, puntos, meses_sin_busqueda + nuevos, resultados)
+        modo = 'extendido'
+    with _candado_memoria:
+        _memoria[clave] = (firma, resultados, orden_guardado)
+    return resultados, orden_guardado, modo
+
+
+def _recordar_ajuste(db, clave, firma, puntos, orden, resultados):
+    _guardar(db, clave, orden, firma, puntos, 0, resultados)
+    with _candado_memoria:
+        _memoria[clave] = (firma, resultados, orden)
+
+
+# Modelo ajustado para la serie: reutiliza, extiende o vuelve a ajustar
+# según lo que haya cambiado desde el último entrenamiento. Devuelve
+# (resultados, orden, modo) con modo 'reutilizado', 'extendido' o 'ajustado'.
+def modelo_para(db, serie, clave='total', procesos=None, reportar=None, revisar_cancelacion=None):
+    puntos = _puntos(serie)
+    firma = firma_serie(puntos)
+
+    guardado = _modelo_guardado(db, clave, serie, puntos, firma, reportar)
+    if guardado is not None:
+        return guardado
+
+    if reportar is not None:
+        reportar(None, f"buscando el mejor orden entre {len(ORDENES_CANDIDATOS)} candidatos")
+    orden = buscar_orden(serie, procesos, revisar_cancelacion)
+    if revisar_cancelacion is not None:
+        revisar_cancelacion()
+    if reportar is not None:
+        reportar(None, f"ajustando ARIMA{orden}")
+    resultados = _ajustar(serie, orden)
+    _recordar_ajuste(db, clave, firma, puntos, orden, resultados)
+    return resultados, orden, 'ajustado'
+
+
+# Clave del modelo guardado de una serie; con filtro se agrega su clave
+def _clave_modelo(base, filtro):
+    return f"{base}|{filtros.clave(filtro)}" if filtro else base
+
+
+# Pronóstico de la demanda total para los próximos `pasos` meses.
+# Devuelve (serie histórica, predicciones, orden, modo).
+def pronosticar(db, pasos=12, procesos=None, reportar=None, revisar_cancelacion=None, filtro=None):
+    with db.conexion() as conexion:
+        serie = serie_mensual(conexion, filtro)
+    if len(serie) < MIN_MESES:
+        raise ValueError(f"Se necesitan al menos {MIN_MESES} meses de datos para pronosticar.")
+    resultados, orden, modo = modelo_para(db, serie, _clave_modelo('total', filtro), procesos, reportar,
+                                          revisar_cancelacion)
+    return serie, resultados.forecast(steps=pasos), orden, modo
+
+
+# Columnas de la tabla de resultados del pronóstico por grupo
+COLUMNAS_LOTE = ("Dimensión", "Grupo", "Meses", "Orden", "Modelo",
+                 "Promedio mensual", "Promedio pronosticado", "Total pronosticado")
+
+
+# Pronóstico de personas por mes para cada zona y cada tipo de evento.
+# Las series de cada dimensión salen de una sola consulta; los modelos que
+# ya sirven se reutilizan o extienden, y los que hay que buscar y ajustar
+# se reparten entre un pool de procesos (una serie por tarea).
+# Devuelve (tabla, series, predicciones): la tabla es un DataFrame con
+# COLUMNAS_LOTE y series/predicciones son diccionarios con llave
+# (dimension, grupo).
+def pronosticar_por_grupo(db, dimensiones=DIMENSIONES_LOTE, pasos=12, procesos=None,
+                          reportar=None, revisar_cancelacion=None, filtro=None):
+    pd = dependencias.pandas()
+    if reportar is not None:
+        reportar(None, "leyendo series por grupo")
+    series = {}
+    with db.conexion() as conexion:
+        for dimension in dimensiones:
+            tabla = series_por_grupo(conexion, dimension, filtro)
+            for grupo in tabla.columns:
+                serie = tabla[grupo]
+                # Cada grupo empieza en su primer mes con eventos
+                serie = serie.loc[serie.ne(0).idxmax():]
+                series[(dimension, grupo)] = serie.rename('Cantidad de personas')
+
+    modelos = {}
+    por_ajustar = {}
+    for llave, serie in series.items():
+        if len(serie) < MIN_MESES:
+            continue
+        puntos = _puntos(serie)
+        firma = firma_serie(puntos)
+        clave = _clave_modelo(f"{llave[0]}:{llave[1]}", filtro)
+        guardado = _modelo_guardado(db, clave, serie, puntos, firma)
+        if guardado is not None:
+            modelos[llave] = guardado
+        else:
+            por_ajustar[llave] = (clave, firma, puntos)
+
+    total = len(por_ajustar)
+    hechos = 0
+
+    def recibir(llave, orden, resultados):
+        nonlocal hechos
+        clave, firma, puntos = por_ajustar[llave]
+        _recordar_ajuste(db, clave, firma, puntos, orden, resultados)
+        modelos[llave] = (resultados, orden, 'ajustado')
+        hechos += 1
+        if reportar is not None:
+            reportar(hechos / total, f"{hechos} de {total} series ajustadas")
+
+    if total:
+        if reportar is not None:
+            reportar(0.0, f"0 de {total} series ajustadas")
+        procesos = procesos or min(total, os.cpu_count() or 1)
+        if procesos <= 1:
+            for llave in por_ajustar:
+                if revisar_cancelacion is not None:
+                    revisar_cancelacion()
+                recibir(llave, *buscar_y_ajustar(series[llave]))
+        else:
+            contexto = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+                futuros = {pool.submit(buscar_y_ajustar, series[llave]): llave for llave in por_ajustar}
+                try:
+                    for futuro in as_completed(futuros):
+                        if revisar_cancelacion is not None:
+                            revisar_cancelacion()
+                        recibir(futuros[futuro], *futuro.result())
+                except BaseException:
+                    for futuro in futuros:
+                        futuro.cancel()
+                    raise
+
+    filas = []
+    predicciones = {}
+    for llave, serie in series.items():
+        dimension, grupo = llave
+        encabezado = estadisticas.DIMENSIONES[dimension][0]
+        if llave not in modelos:
+            filas.append((encabezado, grupo, len(serie), None, 'datos insuficientes',
+                          float(serie.mean()), None, None))
+            continue
+        resultados, orden, modo = modelos[llave]
+        prediccion = resultados.forecast(steps=pasos)
+        predicciones[llave] = prediccion
+        filas.append((encabezado, grupo, len(serie), f"ARIMA{orden}", modo,
+                      float(serie.mean()), float(prediccion.mean()), float(prediccion.sum())))
+    return pd.DataFrame(filas, columns=COLUMNAS_LOTE), series, predicciones
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+# Prueba de carga del servicio de pedidos (servidor.py): varios clientes
+# concurrentes crean, consultan, modifican y eliminan eventos durante un
+# tiempo fijo. Informa en JSON las peticiones por segundo, la latencia
+# (mediana y percentiles 95/99) por operación y los errores; termina con
+# código 1 si hubo errores de servidor (5xx), por ejemplo `database is locked`.
+#
+# Uso: python servidor.py --db /tmp/copia.sqlite &
+#      python prueba_carga.py --clientes 20 --segundos 10
+
+ZONAS = ("norte", "sur", "centro", "alrededores")
+TIPOS = ("boda", "cumpleaños", "xv años", "infantil", "graduacion", "empresarial")
+
+
+def evento_aleatorio(numero):
+    return {
+        "Nombre del solicitante": f"Cliente de prueba {numero}",
+        "Fecha": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+        "Horario": f"{random.randint(12, 22)}:00",
+        "Cantidad de personas": random.randint(20, 250),
+        "Direccion": "Calle de prueba",
+        "Zona": random.choice(ZONAS),
+        "Tipo de evento": random.choice(TIPOS),
+        "Costo": random.randint(20, 250) * 70,
+    }
+
+
+# Cliente HTTP/1.1 mínimo con conexión persistente
+class Cliente:
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self._lector = self._escritor = None
+
+    async def pedir(self, metodo, ruta, datos=None):
+        if self._escritor is None:
+            self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        cuerpo = b"" if datos is None else json.dumps(datos).encode("utf-8")
+        self._escritor.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo)
+        await self._escritor.drain()
+        estado = int((await self._lector.readline()).split()[1])
+        largo = 0
+        while True:
+            linea = await self._lector.readline()
+            if linea in (b"\r\n", b""):
+                break
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            if nombre.lower() == "content-length":
+                largo = int(valor)
+        respuesta = await self._lector.readexactly(largo) if largo else b""
+        return estado, json.loads(respuesta) if respuesta else None
+
+    def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+async def trabajar(cliente, fin, latencias, errores, creados):
+    numero = 0
+    while time.perf_counter() < fin:
+        numero += 1
+        # Mezcla típica: la mayoría consulta, una parte crea, pocos modifican o eliminan
+        sorteo = random.random()
+        if sorteo < 0.3 or not creados:
+            operacion, metodo, ruta, datos = "crear", "POST", "/eventos", evento_aleatorio(numero)
+        elif sorteo < 0.75:
+            operacion, metodo, ruta, datos = "listar", "GET", "/eventos?limite=50&orden=Fecha&desc=1", None
+        elif sorteo < 0.85:
+            operacion, metodo, ruta, datos = "obtener", "GET", f"/eventos/{random.choice(creados)}", None
+        elif sorteo < 0.95:
+            operacion, metodo, ruta, datos = "modificar", "PUT", f"/eventos/{random.choice(creados)}", evento_aleatorio(numero)
+        else:
+            operacion, metodo, ruta, datos = "eliminar", "DELETE", f"/eventos/{creados.pop(random.randrange(len(creados)))}", None
+
+        inicio = time.perf_counter()
+        try:
+            estado, respuesta = await cliente.pedir(metodo, ruta, datos)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            errores.append((operacion, type(e).__name__))
+            cliente.cerrar()
+            cliente._escritor = None
+            continue
+        latencias.setdefault(operacion, []).append(time.perf_counter() - inicio)
+        if estado >= 500:
+            errores.append((operacion, respuesta.get("error") if respuesta else estado))
+        elif operacion == "crear" and estado == 201:
+            creados.append(respuesta["id"])
+
+
+def percentil(valores, fraccion):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+async def correr(host, puerto, clientes, segundos):
+    fin = time.perf_counter() + segundos
+    latencias, errores, creados = {}, [], []
+    conexiones = [Cliente(host, puerto) for _ in range(clientes)]
+    inicio = time.perf_counter()
+    try:
+        await asyncio.gather(*(trabajar(c, fin, latencias, errores, creados) for c in conexiones))
+    finally:
+        for cliente in conexiones:
+            cliente.cerrar()
+    duracion = time.perf_counter() - inicio
+    total = sum(len(v) for v in latencias.values())
+    return {
+        "clientes": clientes,
+        "segundos": round(duracion, 2),
+        "peticiones": total,
+        "peticiones_por_segundo": round(total / duracion, 1),
+        "errores": len(errores),
+        "ejemplos_de_error": errores[:5],
+        "latencia_ms": {
+            operacion: {
+                "n": len(valores),
+                "mediana": round(statistics.median(valores) * 1000, 2),
+                "p95": round(percentil(valores, 0.95) * 1000, 2),
+                "p99": round(percentil(valores, 0.99) * 1000, 2),
+            }
+            for operacion, valores in sorted(latencias.items())
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de pedidos de taquizas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--segundos", type=float, default=10)
+    args = parser.parse_args(argv)
+
+    resultado = asyncio.run(correr(args.host, args.puerto, args.clientes, args.segundos))
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 1 if resultado["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import re
+
+import filtros
+
+# Consultas de los registros de taquizas que muestra la grilla principal.
+# Todas las páginas se leen con paginación por llave (keyset): en lugar de
+# OFFSET se continúa desde la última llave (valor de orden, rowid) vista,
+# así cada página cuesta lo mismo sin importar qué tan grande sea la tabla.
+#
+# Con una búsqueda (consulta FTS5, ver consulta_busqueda) las páginas se
+# limitan a los registros que coinciden, y se pueden ordenar por
+# relevancia ('relevancia', el rank de FTS5 con su rowid como llave).
+# Con un filtro (ver filtros.py) sus condiciones se agregan al WHERE.
+
+# Columnas que se muestran en la grilla principal (después del rowid)
+COLUMNAS_GRILLA = (
+    "Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas",
+    "Direccion", "Zona", "Tipo de evento", "Costo",
+)
+
+# Todas las columnas de taquizas además del id: las de la grilla, el
+# comentario y los puestos de tacos (importación y exportación completas)
+COLUMNAS_REGISTRO = COLUMNAS_GRILLA + ("Comentario", "puestos_tacos")
+
+_SELECT_GRILLA = "SELECT t.rowid, " + ", ".join(f't."{c}"' for c in COLUMNAS_GRILLA) + " FROM taquizas t"
+
+_JOIN_BUSQUEDA = " JOIN busqueda_taquizas ON busqueda_taquizas.rowid = t.rowid"
+
+_PALABRA = re.compile(r"\w+")
+
+
+# Consulta FTS5 para el texto que escribe el usuario: cada palabra como
+# prefijo y todas obligatorias ("jose mart" -> '"jose"* "mart"*').
+# Devuelve None si no hay nada que buscar.
+def consulta_busqueda(texto):
+    palabras = _PALABRA.findall(texto or "")
+    if not palabras:
+        return None
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+# FROM y condiciones base de la grilla, con o sin búsqueda y filtro
+def _desde(busqueda, filtro=None):
+    condiciones, parametros = filtros.condiciones(filtro, 't')
+    if busqueda is None:
+        return _SELECT_GRILLA, condiciones, parametros
+    return (_SELECT_GRILLA + _JOIN_BUSQUEDA, ["busqueda_taquizas MATCH ?"] + condiciones,
+            [busqueda] + parametros)
+
+
+# Expresión SQL de la columna de orden
+def _expresion_orden(orden):
+    if orden == 'rowid':
+        return 't.rowid'
+    if orden == 'relevancia':
+        return 'busqueda_taquizas.rank'
+    if orden not in COLUMNAS_GRILLA:
+        raise ValueError(f"Columna de orden desconocida: {orden}")
+    return f't."{orden}"'
+
+
+# Cláusula ORDER BY; el rowid siempre desempata para que la llave sea única
+def _clausula_orden(orden, descendente):
+    direccion = "DESC" if descendente else "ASC"
+    if orden == 'rowid':
+        return f"ORDER BY t.rowid {direccion}"
+    return f"ORDER BY {_expresion_orden(orden)} {direccion}, t.rowid {direccion}"
+
+
+# Condiciones para continuar después (o antes) de una llave (valor, rowid).
+# Se usan comparaciones de fila `(columna, rowid) > (?, ?)` para que SQLite
+# busque directamente en el índice de la columna en lugar de recorrerlo.
+# SQLite ordena NULL antes que cualquier valor y esas comparaciones no
+# incluyen NULL, así que el tramo de NULL va como un segmento aparte; los
+# segmentos se leen en orden hasta completar la página.
+def _segmentos_llave(orden, descendente, llave, hacia_adelante):
+    valor, rowid = llave
+    mayor = hacia_adelante != descendente
+    op = ">" if mayor else "<"
+    if orden == 'rowid':
+        return [(f"t.rowid {op} ?", [rowid])]
+
+    columna = _expresion_orden(orden)
+    if orden == 'relevancia':
+        # El rank nunca es NULL
+        return [(f"({columna}, t.rowid) {op} (?, ?)", [valor, rowid])]
+    if valor is None:
+        segmentos = [(f"{columna} IS NULL AND t.rowid {op} ?", [rowid])]
+        if mayor:
+            segmentos.append((f"{columna} IS NOT NULL", []))
+        return segmentos
+    segmentos = [(f"({columna}, t.rowid) {op} (?, ?)", [valor, rowid])]
+    if not mayor:
+        segmentos.append((f"{columna} IS NULL", []))
+    return segmentos
+
+
+# Llave (valor de orden, rowid) de una fila devuelta por leer_pagina; en
+# orden de relevancia el rank viene como última columna de la fila
+def llave_de_fila(fila, orden):
+    if orden == 'rowid':
+        return (fila[0], fila[0])
+    if orden == 'relevancia':
+        return (fila[-1], fila[0])
+    return (fila[1 + COLUMNAS_GRILLA.index(orden)], fila[0])
+
+
+# Contar registros de la tabla (o los que coinciden con la búsqueda y el filtro)
+def contar_registros(conexion, busqueda=None, filtro=None):
+    if not filtro:
+        if busqueda is None:
+            return conexion.execute("SELECT COUNT(*) FROM taquizas").fetchone()[0]
+        return conexion.execute(
+            "SELECT COUNT(*) FROM busqueda_taquizas WHERE busqueda_taquizas MATCH ?", (busqueda,)).fetchone()[0]
+    sql = "SELECT COUNT(*) FROM taquizas t"
+    if busqueda is not None:
+        sql += _JOIN_BUSQUEDA
+    _, condiciones, parametros = _desde(busqueda, filtro)
+    return conexion.execute(sql + " WHERE " + " AND ".join(condiciones), parametros).fetchone()[0]
+
+
+# Leer una página de la grilla. Con `despues_de` se continúa hacia
+# adelante desde esa llave; con `antes_de` se leen las filas anteriores
+# (devueltas también en el orden normal de la grilla). Con `busqueda` y
+# `filtro` sólo se leen los registros que coinciden.
+def leer_pagina(conexion, limite, orden='rowid', descendente=False, despues_de=None, antes_de=None,
+                busqueda=None, filtro=None):
+    hacia_adelante = antes_de is None
+    llave = antes_de if antes_de is not None else despues_de
+    segmentos = [(None, [])] if llave is None else _segmentos_llave(orden, descendente, llave, hacia_adelante)
+    # Para leer hacia atrás se invierte el orden y luego se voltea el resultado
+    clausula = _clausula_orden(orden, descendente if hacia_adelante else not descendente)
+
+    select, condiciones, parametros_base = _desde(busqueda, filtro)
+    if orden == 'relevancia':
+        select = select.replace(" FROM ", ", busqueda_taquizas.rank FROM ", 1)
+
+    filas = []
+    for condicion, parametros in segmentos:
+        faltan = limite - len(filas)
+        if faltan <= 0:
+            break
+        sql = select
+        todas = condiciones + ([condicion] if condicion else [])
+        if todas:
+            sql += " WHERE " + " AND ".join(todas)
+        sql += f" {clausula} LIMIT ?"
+        filas.extend(conexion.execute(sql, parametros_base + parametros + [faltan]).fetchall())
+
+    if not hacia_adelante:
+        filas.reverse()
+    return filas
+
+
+# Llave de la fila que ocupa la posición `posicion` en el orden dado.
+# Se usa sólo al arrastrar la barra de desplazamiento a un punto lejano;
+# a partir de esa llave se vuelve a paginar por llave.
+def llave_en_posicion(conexion, posicion, orden='rowid', descendente=False, busqueda=None, filtro=None):
+    _, condiciones, parametros = _desde(busqueda, filtro)
+    sql = f"SELECT {_expresion_orden(orden)}, t.rowid FROM taquizas t"
+    if busqueda is not None:
+        sql += _JOIN_BUSQUEDA
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += f" {_clausula_orden(orden, descendente)} LIMIT 1 OFFSET ?"
+    fila = conexion.execute(sql, parametros + [max(posicion, 0)]).fetchone()
+    return tuple(fila) if fila else None
+
+
+# Leer una sola fila de la grilla por rowid (búsqueda directa por llave primaria)
+def leer_registro(conexion, rowid):
+    return conexion.execute(_SELECT_GRILLA + " WHERE t.rowid = ?", (rowid,)).fetchone()
+
+
+# Valor comparable en Python con el mismo orden que usa SQLite:
+# NULL < números < texto (el texto se compara por código, igual que BINARY)
+def _valor_comparable(valor):
+    if valor is None:
+        return (0, 0)
+    if isinstance(valor, (int, float)):
+        return (1, valor)
+    return (2, str(valor))
+
+
+# Llave comparable para ubicar una fila dentro de las filas cargadas
+def llave_comparable(llave):
+    return (_valor_comparable(llave[0]), llave[1])
+
+
+def _sql_insertar(columnas):
+    return ("INSERT INTO taquizas (" + ", ".join(f'"{c}"' for c in columnas) + ") "
+            "VALUES (" + ", ".join("?" for _ in columnas) + ")")
+
+
+_INSERT_REGISTRO = _sql_insertar(COLUMNAS_GRILLA)
+_INSERT_COMPLETO = _sql_insertar(COLUMNAS_REGISTRO)
+_UPDATE_REGISTRO = (
+    "UPDATE taquizas SET " + ", ".join(f'"{c}" = ?' for c in COLUMNAS_GRILLA) + " WHERE rowid = ?"
+)
+
+
+# Insertar un registro (valores en el orden de COLUMNAS_GRILLA); devuelve su rowid
+def insertar_registro(conexion, valores):
+    return conexion.execute(_INSERT_REGISTRO, list(valores)).lastrowid
+
+
+# Agregar varios registros con una sola sentencia preparada; devuelve
+# cuántos se insertaron (la transacción la abre quien llama). Con
+# `completos` las filas traen todas las columnas de COLUMNAS_REGISTRO.
+def insertar_registros(conexion, filas, completos=False):
+    return conexion.executemany(_INSERT_COMPLETO if completos else _INSERT_REGISTRO, filas).rowcount
+
+
+# Modificar un registro; devuelve la cantidad de filas afectadas
+def actualizar_registro(conexion, rowid, valores):
+    return conexion.execute(_UPDATE_REGISTRO, list(valores) + [rowid]).rowcount
+
+
+# Eliminar un registro; devuelve la cantidad de filas afectadas
+def eliminar_registro(conexion, rowid):
+    return conexion.execute("DELETE FROM taquizas WHERE rowid = ?", (rowid,)).rowcount
@@ -0,0 +1,87 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import nucleo
+from base_datos import RUTA_DB
+from segmentacion import K_POR_DEFECTO
+
+# Generar los reportes de análisis sin interfaz gráfica (por ejemplo, cada
+# noche desde cron). Los reportes son independientes entre sí y corren en
+# paralelo en un pool de hilos; el pronóstico y los sentimientos además
+# reparten su trabajo pesado en procesos. Cada tabla se guarda como CSV en
+# la carpeta de salida y `resumen.json` registra el resultado, la duración
+# y los errores de cada reporte.
+#
+# Uso: python reportes.py --salida reportes/2024-10-01 --reportes estadisticas pronostico
+
+
+def escribir_tablas(carpeta, tablas):
+    archivos = []
+    for nombre, (encabezados, filas) in tablas.items():
+        ruta = os.path.join(carpeta, f"{nombre}.csv")
+        with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(encabezados)
+            escritor.writerows(filas)
+        archivos.append(os.path.basename(ruta))
+    return archivos
+
+
+# Correr un reporte y guardar sus tablas; los errores se registran en el
+# resumen en lugar de detener a los demás reportes
+def correr_reporte(db, nombre, carpeta, opciones):
+    inicio = time.perf_counter()
+    try:
+        tablas, resumen = nucleo.REPORTES[nombre](db, **opciones)
+        archivos = escribir_tablas(carpeta, tablas)
+    except Exception as e:
+        return {"estado": "error", "error": f"{type(e).__name__}: {e}",
+                "segundos": round(time.perf_counter() - inicio, 3)}
+    return {"estado": "ok", "archivos": archivos, "resumen": resumen,
+            "segundos": round(time.perf_counter() - inicio, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar los reportes de taquizas sin interfaz gráfica")
+    parser.add_argument("--db", default=RUTA_DB)
+    parser.add_argument("--salida", default="reportes")
+    parser.add_argument("--reportes", nargs="+", choices=sorted(nucleo.REPORTES), default=list(nucleo.REPORTES))
+    parser.add_argument("--hilos", type=int, default=4, help="reportes que corren al mismo tiempo")
+    parser.add_argument("--pasos", type=int, default=12, help="meses a pronosticar")
+    parser.add_argument("--k", type=int, default=K_POR_DEFECTO, help="segmentos de eventos")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.salida, exist_ok=True)
+    opciones = {"pasos": args.pasos, "k": args.k}
+    db = nucleo.abrir(args.db, tamano_pool=max(4, args.hilos))
+    inicio = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.hilos, thread_name_prefix="reporte") as pool:
+            futuros = {nombre: pool.submit(correr_reporte, db, nombre, args.salida, opciones)
+                       for nombre in args.reportes}
+            resultados = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+    finally:
+        db.cerrar()
+
+    resumen = {
+        "base_datos": os.path.abspath(args.db),
+        "generado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "reportes": resultados,
+    }
+    with open(os.path.join(args.salida, "resumen.json"), "w", encoding="utf-8") as archivo:
+        json.dump(resumen, archivo, ensure_ascii=False, indent=2, default=str)
+
+    for nombre, resultado in resultados.items():
+        detalle = resultado.get("error") or ", ".join(resultado["archivos"])
+        print(f"{nombre}: {resultado['estado']} ({resultado['segundos']} s) {detalle}")
+    return 0 if all(r["estado"] == "ok" for r in resultados.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
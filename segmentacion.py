@@ -0,0 +1,181 @@
+import json
+import threading
+
+import dependencias
+import filtros
+
+# Segmentación de eventos con K-Means sobre personas, costo, zona y tipo
+# de evento.
+#
+# - Las columnas numéricas se estandarizan (media 0, desviación 1) y las
+#   categóricas se codifican one-hot, todo con operaciones de columna.
+# - El entrenamiento usa MiniBatchKMeans, que procesa los datos por lotes
+#   y escala a cientos de miles de eventos.
+# - El modelo (medias, escalas, categorías y centroides) se guarda por k en
+#   la tabla `modelos_segmentacion`; etiquetar eventos nuevos es sólo medir
+#   la distancia a los centroides, sin volver a entrenar.
+# - Con un filtro (ver filtros.py) sólo se leen y etiquetan los eventos
+#   que lo cumplen, con los centroides guardados si los hay (si no, se
+#   entrena con esos eventos sin guardar el modelo).
+
+# Columnas numéricas y categóricas que describen un evento
+NUMERICAS = ("Cantidad de personas", "Costo")
+CATEGORICAS = ("Zona", "Tipo de evento")
+
+K_POR_DEFECTO = 3
+
+# Proporción de eventos nuevos (respecto a los del entrenamiento) a partir
+# de la cual se vuelve a entrenar en lugar de sólo etiquetar
+CRECIMIENTO_PARA_REENTRENAR = 0.2
+
+# Eventos por lote de MiniBatchKMeans
+TAMANO_LOTE = 4096
+
+# Modelos en memoria: k -> (eventos con que se entrenó, modelo)
+_memoria = {}
+_candado_memoria = threading.Lock()
+
+
+# Eventos con las columnas de la segmentación como DataFrame (una consulta)
+def leer_eventos(conexion, filtro=None):
+    pd = dependencias.pandas()
+    columnas = ", ".join(f'"{c}"' for c in ("Nombre del solicitante",) + CATEGORICAS + NUMERICAS)
+    where, parametros = filtros.clausula(filtro)
+    return pd.read_sql_query(f"SELECT rowid AS id, {columnas} FROM taquizas{where}", conexion,
+                             params=parametros, index_col="id")
+
+
+# Matriz de características: numéricas estandarizadas + one-hot de cada
+# categórica. Los valores faltantes toman la media (numéricas) o quedan
+# en ceros (categorías desconocidas o nulas).
+def caracteristicas(df, modelo):
+    np, pd = dependencias.numpy(), dependencias.pandas()
+    numericas = df[list(NUMERICAS)].astype(float).to_numpy()
+    medias = np.asarray(modelo['medias'])
+    numericas = np.where(np.isnan(numericas), medias, numericas)
+    bloques = [(numericas - medias) / np.asarray(modelo['escalas'])]
+    for columna in CATEGORICAS:
+        categorias = modelo['categorias'][columna]
+        codigos = pd.Categorical(df[columna].astype('string'), categories=categorias).codes
+        identidad = np.vstack([np.eye(len(categorias)), np.zeros((1, len(categorias)))])
+        # El código -1 (nulo o desconocido) cae en la última fila: ceros
+        bloques.append(identidad[codigos])
+    return np.hstack(bloques)
+
+
+# Ajustar escalas, categorías y centroides para k segmentos
+def entrenar(df, k=K_POR_DEFECTO):
+    np = dependencias.numpy()
+    if len(df) < k:
+        raise ValueError(f"Se necesitan al menos {k} eventos para formar {k} segmentos.")
+    numericas = df[list(NUMERICAS)].astype(float)
+    escalas = numericas.std(ddof=0).fillna(0.0).to_numpy()
+    modelo = {
+        'k': k,
+        'medias': numericas.mean().fillna(0.0).tolist(),
+        'escalas': np.where(escalas > 0, escalas, 1.0).tolist(),
+        'categorias': {c: sorted(df[c].dropna().astype(str).unique().tolist()) for c in CATEGORICAS},
+    }
+    X = caracteristicas(df, modelo)
+    MiniBatchKMeans = dependencias.minibatch_kmeans()
+    kmeans = MiniBatchKMeans(n_clusters=k, batch_size=TAMANO_LOTE, n_init=3, random_state=0).fit(X)
+    # Numerar los segmentos de menos a más personas para que las etiquetas
+    # sean estables y fáciles de leer
+    centroides = kmeans.cluster_centers_[np.argsort(kmeans.cluster_centers_[:, 0])]
+    modelo['centroides'] = centroides.tolist()
+    return modelo
+
+
+# Segmento más cercano de cada evento: argmin de |x|² - 2 x·c + |c|²
+# (|x|² no cambia el mínimo), sin formar la matriz de diferencias
+def etiquetar(df, modelo):
+    np = dependencias.numpy()
+    X = caracteristicas(df, modelo)
+    centroides = np.asarray(modelo['centroides'])
+    distancias = (centroides ** 2).sum(axis=1) - 2 * X @ centroides.T
+    return distancias.argmin(axis=1)
+
+
+def _leer_guardado(db, k):
+    with db.conexion() as conexion:
+        fila = conexion.execute("SELECT eventos, modelo FROM modelos_segmentacion WHERE k = ?", (k,)).fetchone()
+    if fila is None:
+        return None
+    return fila[0], json.loads(fila[1])
+
+
+def _guardar(db, k, eventos, modelo):
+    with db.transaccion() as conexion:
+        conexion.execute(
+            "INSERT OR REPLACE INTO modelos_segmentacion (k, eventos, modelo, actualizado) "
+            "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            (k, eventos, json.dumps(modelo)))
+
+
+# Modelo para k segmentos: el guardado si los eventos no crecieron
+# demasiado desde que se entrenó, o uno nuevo. Con guardar=False (eventos
+# filtrados) el modelo nuevo no reemplaza al guardado. Devuelve (modelo, entrenado).
+def modelo_para(db, df, k=K_POR_DEFECTO, reentrenar=False, guardar=True):
+    if not reentrenar:
+        with _candado_memoria:
+            guardado = _memoria.get(k)
+        if guardado is None:
+            guardado = _leer_guardado(db, k)
+        if guardado is not None:
+            eventos, modelo = guardado
+            if len(df) <= eventos * (1 + CRECIMIENTO_PARA_REENTRENAR):
+                with _candado_memoria:
+                    _memoria[k] = guardado
+                return modelo, False
+    modelo = entrenar(df, k)
+    if not guardar:
+        return modelo, True
+    _guardar(db, k, len(df), modelo)
+    with _candado_memoria:
+        _memoria[k] = (len(df), modelo)
+    return modelo, True
+
+
+# Columnas de la descripción de cada segmento
+COLUMNAS_DESCRIPCION = ("Segmento", "Eventos", "Promedio de Personas", "Costo Promedio",
+                        "Zona Predominante", "Tipo de Evento Predominante")
+
+
+# Eventos con su segmento y descripción de cada segmento (con agregaciones
+# por grupo). Devuelve (df con columna 'Segmento', descripción, entrenado).
+def segmentar(db, k=K_POR_DEFECTO, reentrenar=False, reportar=None, revisar_cancelacion=None, filtro=None):
+    pd = dependencias.pandas()
+    if reportar is not None:
+        reportar(None, "leyendo eventos")
+    with db.conexion() as conexion:
+        df = leer_eventos(conexion, filtro)
+    if revisar_cancelacion is not None:
+        revisar_cancelacion()
+
+    if reportar is not None:
+        reportar(None, f"preparando {k} segmentos")
+    modelo, entrenado = modelo_para(db, df, k, reentrenar, guardar=not filtro)
+    if revisar_cancelacion is not None:
+        revisar_cancelacion()
+
+    if reportar is not None:
+        reportar(None, "etiquetando eventos")
+    df['Segmento'] = etiquetar(df, modelo)
+
+    grupos = df.groupby('Segmento')
+    descripcion = pd.DataFrame({
+        "Eventos": grupos.size(),
+        "Promedio de Personas": grupos["Cantidad de personas"].mean(),
+        "Costo Promedio": grupos["Costo"].mean(),
+        "Zona Predominante": _predominante(df, "Zona"),
+        "Tipo de Evento Predominante": _predominante(df, "Tipo de evento"),
+    }).reset_index()
+    return df, descripcion[list(COLUMNAS_DESCRIPCION)], entrenado
+
+
+# Valor más frecuente de una columna dentro de cada segmento
+def _predominante(df, columna):
+    conteos = df.groupby(['Segmento', columna]).size()
+    if conteos.empty:
+        return None
+    return conteos.sort_values(ascending=False).reset_index(level=1).groupby(level=0)[columna].first()
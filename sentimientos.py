@@ -0,0 +1,149 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dependencias
+import filtros
+
+# Análisis de sentimientos de los comentarios con puntajes persistentes.
+# El puntaje compuesto de VADER y su etiqueta se guardan en la tabla
+# `sentimientos` (ver migraciones.py) junto con el hash del comentario.
+# Sólo se califican los comentarios nuevos o modificados; los textos
+# repetidos reutilizan el puntaje ya calculado para el mismo hash, y los
+# rezagos grandes se reparten en lotes entre varios procesos. Con un
+# filtro (ver filtros.py) sólo se califican y leen los registros que lo cumplen.
+
+# A partir de cuántos comentarios pendientes conviene usar procesos
+UMBRAL_PARALELO = 2000
+
+# Comentarios por lote (para procesos y para cada transacción de guardado)
+TAMANO_LOTE = 500
+
+
+# Etiqueta según el puntaje compuesto de VADER
+def clasificar(polaridad):
+    if polaridad >= 0.05:
+        return 'Positivo'
+    elif polaridad <= -0.05:
+        return 'Negativo'
+    return 'Neutral'
+
+
+# Hash del texto del comentario
+def hash_comentario(texto):
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+# Calificar un lote de textos; devuelve los puntajes compuestos.
+# Es una función de módulo para poder enviarla a otros procesos: cada
+# proceso crea su propio analizador la primera vez.
+def puntuar_lote(textos):
+    analyzer = dependencias.analizador_sentimientos()
+    return [analyzer.polarity_scores(texto)['compound'] for texto in textos]
+
+
+# Comentarios que todavía no tienen puntaje: [(rowid, comentario), ...]
+def leer_pendientes(conexion, filtro=None):
+    where, parametros = filtros.clausula(
+        filtro, 't', extra=('t."Comentario" IS NOT NULL', "s.rowid_taquiza IS NULL"))
+    return conexion.execute(f"""
+        SELECT t.rowid, t."Comentario"
+        FROM taquizas t
+        LEFT JOIN sentimientos s ON s.rowid_taquiza = t.rowid
+        {where}
+    """, parametros).fetchall()
+
+
+# Resultados para mostrar: [(rowid, nombre, comentario, sentimiento), ...]
+def leer_resultados(conexion, filtro=None):
+    where, parametros = filtros.clausula(filtro, 't')
+    return conexion.execute(f"""
+        SELECT t.rowid, t."Nombre del solicitante", t."Comentario", s.sentimiento
+        FROM sentimientos s
+        JOIN taquizas t ON t.rowid = s.rowid_taquiza
+        {where}
+        ORDER BY t.rowid
+    """, parametros).fetchall()
+
+
+def _guardar(db, filas):
+    with db.transaccion() as conexion:
+        conexion.executemany(
+            "INSERT OR REPLACE INTO sentimientos (rowid_taquiza, hash_comentario, compuesto, sentimiento) "
+            "VALUES (?, ?, ?, ?)",
+            filas,
+        )
+
+
+# Calificar los comentarios pendientes y guardar sus puntajes.
+# `reportar(fraccion, mensaje)` y `revisar_cancelacion()` son opcionales
+# (los usa la interfaz con tareas.Tarea). Devuelve cuántos registros se
+# calificaron. Lo ya guardado se conserva aunque la tarea se cancele.
+def actualizar_puntajes(db, reportar=None, revisar_cancelacion=None, procesos=None, filtro=None):
+    with db.conexion() as conexion:
+        pendientes = leer_pendientes(conexion, filtro)
+    if not pendientes:
+        return 0
+
+    # Agrupar por hash: cada texto distinto se califica una sola vez
+    por_hash = {}
+    for rowid, comentario in pendientes:
+        por_hash.setdefault(hash_comentario(comentario), (comentario, []))[1].append(rowid)
+
+    # Reutilizar los puntajes ya guardados para textos idénticos
+    conocidos = {}
+    hashes = list(por_hash)
+    with db.conexion() as conexion:
+        for inicio in range(0, len(hashes), TAMANO_LOTE):
+            lote = hashes[inicio:inicio + TAMANO_LOTE]
+            marcas = ", ".join("?" for _ in lote)
+            for hash_texto, compuesto in conexion.execute(
+                    f"SELECT hash_comentario, compuesto FROM sentimientos WHERE hash_comentario IN ({marcas})", lote):
+                conocidos[hash_texto] = compuesto
+
+    def filas_de(hash_texto, compuesto):
+        etiqueta = clasificar(compuesto)
+        return [(rowid, hash_texto, compuesto, etiqueta) for rowid in por_hash[hash_texto][1]]
+
+    if conocidos:
+        _guardar(db, [fila for h, c in conocidos.items() for fila in filas_de(h, c)])
+
+    faltantes = [h for h in hashes if h not in conocidos]
+    lotes = [faltantes[i:i + TAMANO_LOTE] for i in range(0, len(faltantes), TAMANO_LOTE)]
+    total = len(faltantes)
+    hechos = 0
+
+    def avanzar(lote, puntajes):
+        nonlocal hechos
+        _guardar(db, [fila for h, c in zip(lote, puntajes) for fila in filas_de(h, c)])
+        hechos += len(lote)
+        if reportar is not None:
+            reportar(hechos / total, f"{hechos} de {total} comentarios")
+
+    if reportar is not None and total:
+        reportar(0.0, f"0 de {total} comentarios")
+
+    if total < UMBRAL_PARALELO or len(lotes) < 2:
+        for lote in lotes:
+            if revisar_cancelacion is not None:
+                revisar_cancelacion()
+            avanzar(lote, puntuar_lote([por_hash[h][0] for h in lote]))
+        return len(pendientes)
+
+    # Rezago grande: un lote por tarea en un pool de procesos. Se usa
+    # "spawn" para no copiar los hilos de la interfaz en los procesos hijos.
+    procesos = procesos or min(len(lotes), os.cpu_count() or 1)
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+        futuros = {pool.submit(puntuar_lote, [por_hash[h][0] for h in lote]): lote for lote in lotes}
+        try:
+            for futuro in as_completed(futuros):
+                if revisar_cancelacion is not None:
+                    revisar_cancelacion()
+                avanzar(futuros[futuro], futuro.result())
+        except BaseException:
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+    return len(pendientes)
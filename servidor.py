@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import importacion
+import nucleo
+import registros
+from base_datos import RUTA_DB
+
+# Servicio HTTP/JSON local para tomar pedidos desde varios puestos a la vez
+# (operadores telefónicos, formulario web) sobre el mismo archivo de base
+# de datos que usa la ventana.
+#
+# - El servidor es asyncio puro (sin dependencias): cada conexión es una
+#   corrutina y las consultas se mandan a hilos para no bloquear el ciclo.
+# - Las lecturas usan el pool de conexiones de BaseDatos en varios hilos.
+# - Todas las escrituras pasan por un único escritor: una cola que atiende
+#   un solo hilo y que confirma en una misma transacción los pedidos que
+#   llegaron juntos (cada uno en su SAVEPOINT, así un pedido inválido no
+#   afecta a los demás). Como nunca hay dos escritores, las peticiones no
+#   se encuentran con `database is locked`.
+#
+# Rutas:
+#   GET    /salud
+#   GET    /eventos?limite=50&orden=Fecha&desc=1&despues=<llave JSON>
+#   GET    /eventos/<id>
+#   POST   /eventos            (cuerpo: objeto JSON con las columnas)
+#   PUT    /eventos/<id>
+#   DELETE /eventos/<id>
+#
+# Uso: python servidor.py --puerto 8765
+
+PUERTO = 8765
+MAX_CUERPO = 1024 * 1024
+MAX_LIMITE = 500
+
+# Pedidos de escritura que el escritor confirma como máximo en una transacción
+MAX_LOTE_ESCRITURA = 64
+
+
+# Error con código HTTP para responder al cliente
+class ErrorHttp(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# Registro como objeto JSON
+def _evento(fila):
+    return dict(zip(("id",) + registros.COLUMNAS_GRILLA, fila))
+
+
+# Valores de un evento (en el orden de COLUMNAS_GRILLA) a partir del cuerpo
+# JSON, con la misma validación que la importación masiva
+def _valores(cuerpo):
+    if not isinstance(cuerpo, dict):
+        raise ErrorHttp(HTTPStatus.BAD_REQUEST, "El cuerpo debe ser un objeto JSON.")
+    try:
+        posiciones = importacion.mapear_encabezado(list(cuerpo))
+        return importacion.convertir_fila(list(cuerpo.values()), posiciones)
+    except ValueError as e:
+        raise ErrorHttp(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+
+
+# Escritor único: un hilo que toma pedidos de una cola y los confirma por
+# lotes. Cada pedido es una función(conexion) y un futuro de asyncio donde
+# se entrega su resultado.
+class Escritor:
+    def __init__(self, db, ciclo):
+        self.db = db
+        self.ciclo = ciclo
+        self._pedidos = []
+        self._hay_pedidos = threading.Condition()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._atender, name="escritor", daemon=True)
+        self._hilo.start()
+
+    # Encolar una escritura y esperar su resultado sin bloquear el ciclo
+    def escribir(self, operacion):
+        futuro = self.ciclo.create_future()
+        with self._hay_pedidos:
+            self._pedidos.append((operacion, futuro))
+            self._hay_pedidos.notify()
+        return futuro
+
+    def _atender(self):
+        while True:
+            with self._hay_pedidos:
+                while not self._pedidos and self._activo:
+                    self._hay_pedidos.wait()
+                if not self._pedidos:
+                    return
+                lote = self._pedidos[:MAX_LOTE_ESCRITURA]
+                del self._pedidos[:MAX_LOTE_ESCRITURA]
+            resultados = []
+            try:
+                with self.db.transaccion() as conexion:
+                    for operacion, futuro in lote:
+                        conexion.execute("SAVEPOINT pedido")
+                        try:
+                            resultado = operacion(conexion)
+                        except Exception as e:
+                            conexion.execute("ROLLBACK TO pedido")
+                            resultados.append((futuro, None, e))
+                        else:
+                            resultados.append((futuro, resultado, None))
+                        conexion.execute("RELEASE pedido")
+            except Exception as e:
+                # Falló el COMMIT: ninguno de los pedidos del lote se guardó
+                resultados = [(futuro, None, e) for _, futuro in lote]
+            for futuro, resultado, error in resultados:
+                self.ciclo.call_soon_threadsafe(_entregar, futuro, resultado, error)
+
+    def cerrar(self):
+        with self._hay_pedidos:
+            self._activo = False
+            self._hay_pedidos.notify()
+        self._hilo.join()
+
+
+def _entregar(futuro, resultado, error):
+    if futuro.cancelled():
+        return
+    if error is not None:
+        futuro.set_exception(error)
+    else:
+        futuro.set_result(resultado)
+
+
+class Servidor:
+    def __init__(self, db, lectores=4):
+        self.db = db
+        self._lectores = ThreadPoolExecutor(max_workers=lectores, thread_name_prefix="lector")
+        self.escritor = None
+
+    # Ejecutar una lectura en el pool de lectores
+    def leer(self, consulta):
+        def correr():
+            with self.db.conexion() as conexion:
+                return consulta(conexion)
+        return asyncio.get_running_loop().run_in_executor(self._lectores, correr)
+
+    # --- Rutas ---
+
+    async def listar(self, consulta):
+        try:
+            limite = max(1, min(int(consulta.get("limite", ["50"])[0]), MAX_LIMITE))
+            orden = consulta.get("orden", ["rowid"])[0]
+            descendente = consulta.get("desc", ["0"])[0] in ("1", "true")
+            despues = consulta.get("despues", [None])[0]
+            despues = tuple(json.loads(despues)) if despues else None
+        except (ValueError, TypeError) as e:
+            raise ErrorHttp(HTTPStatus.BAD_REQUEST, f"Parámetros no válidos: {e}")
+        if orden != 'rowid' and orden not in registros.COLUMNAS_GRILLA:
+            raise ErrorHttp(HTTPStatus.BAD_REQUEST, f"Columna de orden desconocida: {orden}")
+        if despues is not None and len(despues) != 2:
+            raise ErrorHttp(HTTPStatus.BAD_REQUEST, "La llave debe ser [valor, id].")
+        filas = await self.leer(lambda c: registros.leer_pagina(c, limite, orden, descendente, despues_de=despues))
+        siguiente = registros.llave_de_fila(filas[-1], orden) if len(filas) == limite else None
+        return HTTPStatus.OK, {"eventos": [_evento(f) for f in filas], "siguiente": siguiente}
+
+    async def obtener(self, rowid):
+        fila = await self.leer(lambda c: registros.leer_registro(c, rowid))
+        if fila is None:
+            raise ErrorHttp(HTTPStatus.NOT_FOUND, f"No existe el evento {rowid}.")
+        return HTTPStatus.OK, _evento(fila)
+
+    async def crear(self, cuerpo):
+        valores = _valores(cuerpo)
+
+        def insertar(conexion):
+            return registros.leer_registro(conexion, registros.insertar_registro(conexion, valores))
+        return HTTPStatus.CREATED, _evento(await self.escritor.escribir(insertar))
+
+    async def actualizar(self, rowid, cuerpo):
+        valores = _valores(cuerpo)
+
+        def actualizar(conexion):
+            if registros.actualizar_registro(conexion, rowid, valores) == 0:
+                return None
+            return registros.leer_registro(conexion, rowid)
+        fila = await self.escritor.escribir(actualizar)
+        if fila is None:
+            raise ErrorHttp(HTTPStatus.NOT_FOUND, f"No existe el evento {rowid}.")
+        return HTTPStatus.OK, _evento(fila)
+
+    async def eliminar(self, rowid):
+        if await self.escritor.escribir(lambda c: registros.eliminar_registro(c, rowid)) == 0:
+            raise ErrorHttp(HTTPStatus.NOT_FOUND, f"No existe el evento {rowid}.")
+        return HTTPStatus.NO_CONTENT, None
+
+    async def despachar(self, metodo, ruta, cuerpo):
+        partes = urlsplit(ruta)
+        segmentos = [s for s in partes.path.split("/") if s]
+        if segmentos == ["salud"] and metodo == "GET":
+            return HTTPStatus.OK, {"estado": "ok"}
+        if not segmentos or segmentos[0] != "eventos" or len(segmentos) > 2:
+            raise ErrorHttp(HTTPStatus.NOT_FOUND, "Ruta desconocida.")
+        if len(segmentos) == 1:
+            if metodo == "GET":
+                return await self.listar(parse_qs(partes.query))
+            if metodo == "POST":
+                return await self.crear(_json(cuerpo))
+        else:
+            try:
+                rowid = int(segmentos[1])
+            except ValueError:
+                raise ErrorHttp(HTTPStatus.NOT_FOUND, "Ruta desconocida.")
+            if metodo == "GET":
+                return await self.obtener(rowid)
+            if metodo == "PUT":
+                return await self.actualizar(rowid, _json(cuerpo))
+            if metodo == "DELETE":
+                return await self.eliminar(rowid)
+        raise ErrorHttp(HTTPStatus.METHOD_NOT_ALLOWED, f"Método {metodo} no permitido.")
+
+    # --- HTTP ---
+
+    # Atender una conexión; con HTTP/1.1 se mantiene abierta entre peticiones
+    async def atender(self, lector, escritor):
+        try:
+            while True:
+                try:
+                    peticion = await _leer_peticion(lector)
+                except ErrorHttp as e:
+                    escritor.write(_respuesta(e.estado, {"error": str(e)}, False))
+                    await escritor.drain()
+                    break
+                if peticion is None:
+                    break
+                metodo, ruta, version, encabezados, cuerpo = peticion
+                try:
+                    estado, respuesta = await self.despachar(metodo, ruta, cuerpo)
+                except ErrorHttp as e:
+                    estado, respuesta = e.estado, {"error": str(e)}
+                except sqlite3.Error as e:
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Error de base de datos: {e}"}
+                except Exception as e:
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+                mantener = version == "HTTP/1.1" and encabezados.get("connection", "").lower() != "close"
+                escritor.write(_respuesta(estado, respuesta, mantener))
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host="127.0.0.1", puerto=PUERTO):
+        self.escritor = Escritor(self.db, asyncio.get_running_loop())
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        print(f"Sirviendo en http://{host}:{puerto}", flush=True)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self.escritor.cerrar()
+            self._lectores.shutdown()
+
+
+def _json(cuerpo):
+    try:
+        return json.loads(cuerpo or b"null")
+    except ValueError:
+        raise ErrorHttp(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido.")
+
+
+# Leer una petición: (método, ruta, versión, encabezados, cuerpo) o None
+# si el cliente cerró la conexión
+async def _leer_peticion(lector):
+    linea = await lector.readline()
+    if not linea:
+        return None
+    try:
+        metodo, ruta, version = linea.decode("latin-1").split()
+    except ValueError:
+        raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Línea de petición no válida.")
+    encabezados = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+    try:
+        largo = int(encabezados.get("content-length", 0) or 0)
+    except ValueError:
+        raise ErrorHttp(HTTPStatus.BAD_REQUEST, "Content-Length no válido.")
+    if largo > MAX_CUERPO:
+        raise ErrorHttp(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo demasiado grande.")
+    cuerpo = await lector.readexactly(largo) if largo else b""
+    return metodo.upper(), ruta, version, encabezados, cuerpo
+
+
+def _respuesta(estado, datos, mantener):
+    cuerpo = b"" if datos is None else json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    encabezados = [
+        f"HTTP/1.1 {estado.value} {estado.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(cuerpo)}",
+        f"Connection: {'keep-alive' if mantener else 'close'}",
+    ]
+    return ("\r\n".join(encabezados) + "\r\n\r\n").encode("latin-1") + cuerpo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de pedidos de taquizas")
+    parser.add_argument("--db", default=RUTA_DB)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--lectores", type=int, default=4, help="hilos de lectura")
+    args = parser.parse_args(argv)
+
+    # Una conexión por lector más la del escritor
+    db = nucleo.abrir(args.db, tamano_pool=args.lectores + 1)
+    try:
+        asyncio.run(Servidor(db, args.lectores).servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.cerrar()
+
+
+if __name__ == "__main__":
+    main()
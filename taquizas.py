@@ -1,79 +1,116 @@
-import pandas as pd
+import time
+
+# Marca de tiempo para medir el arranque (ver medir_arranque.py)
+T_INICIO = time.perf_counter()
+
+import sys
+import json
 import tkinter as tk
-from tkinter import messagebox, filedialog,Toplevel, ttk
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from tkinter import messagebox, filedialog, simpledialog, Toplevel, ttk
 import sqlite3
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-
-# Asegurarse de que se utiliza el backend TkAgg para mostrar gráficos en Tkinter
-matplotlib.use("TkAgg")
-
-# Función para conectar a la base de datos
-def conectar_db():
+import dependencias
+import nucleo
+from grilla import GrillaPaginada
+import registros
+import filtros
+import estadisticas
+import sentimientos
+import asignaciones
+import insumos
+import agenda
+import pronosticos
+import segmentacion
+import importacion
+import exportacion
+import graficas
+from cache import CacheResultados
+from tareas import EjecutorTareas
+
+# Las librerías pesadas (pandas, matplotlib, statsmodels, VADER...) se cargan
+# al usarlas por primera vez, desde el módulo dependencias
+T_IMPORTS = time.perf_counter()
+
+# Límite de filas para mostrar resultados grandes en la interfaz
+MAX_FILAS_TABLA = 2000
+
+
+# Resumen por zona, tipo de evento o mes (con el filtro actual) pasando por la caché
+def leer_resumen(dimension):
+    filtro = dict(filtro_actual)
+    def calcular():
+        with db.conexion() as conexion:
+            return estadisticas.resumen_por(conexion, dimension, filtro)
+    return cache.obtener(('resumen', dimension, filtros.clave(filtro)), calcular)
+
+
+# Título de una ventana con la descripción del filtro actual
+def titulo_con_filtro(titulo):
+    descripcion = filtros.describir(filtro_actual)
+    return f"{titulo} ({descripcion})" if descripcion else titulo
+
+
+# Aplicar el filtro capturado en la barra de filtros a la grilla; los
+# análisis lo toman de filtro_actual al ejecutarse
+def aplicar_filtros():
     try:
-        conexion = sqlite3.connect('taquizas_db.sqlite')
-        return conexion
-    except sqlite3.Error as e:
-        messagebox.showerror("Error de conexión", f"No se pudo conectar a la base de datos: {str(e)}")
-        return None
-
+        nuevo = filtros.normalizar({campo: entrada.get() for campo, entrada in entradas_filtro.items()})
+    except ValueError as e:
+        messagebox.showerror("Filtro", str(e))
+        return
+    filtro_actual.clear()
+    filtro_actual.update(nuevo)
+    etiqueta_filtro.config(text=filtros.describir(filtro_actual) or "Sin filtro")
+    try:
+        grilla.filtrar(filtro_actual)
+    except Exception as e:
+        messagebox.showerror("Error", f"Ocurrió un error al filtrar los registros: {str(e)}")
 
-# Crear un analizador de sentimientos de VADER
-analyzer = SentimentIntensityAnalyzer()
 
-# Función para mostrar todos los registros
-def mostrar_registros():
-    try:
-        conexion = conectar_db()
-        if conexion is None:
-            return  # No continuar si no se pudo conectar
+# Quitar todos los filtros
+def quitar_filtros():
+    for entrada in entradas_filtro.values():
+        entrada.delete(0, tk.END)
+    aplicar_filtros()
 
-        df = pd.read_sql_query("SELECT rowid, * FROM taquizas", conexion)  # Asegúrate de seleccionar rowid
 
-        # Limpiar el Treeview antes de mostrar nuevos datos
-        for item in tree.get_children():
-            tree.delete(item)
+# Opciones de zona y tipo de evento para las listas de la barra de filtros
+def cargar_opciones_filtro(campo):
+    with db.conexion() as conexion:
+        entradas_filtro[campo]['values'] = [""] + filtros.opciones(conexion, campo)
 
-        # Insertar nuevos datos con rowid
-        for index, row in df.iterrows():
-            tree.insert("", "end", values=[row['rowid']] + list(row[1:]))  # Usamos rowid como primer valor
 
+# Función para mostrar los registros (sólo se leen las páginas visibles de la grilla)
+def mostrar_registros():
+    try:
+        grilla.recargar()
     except Exception as e:
         messagebox.showerror("Error", f"Ocurrió un error al mostrar los registros: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
 
 
-# Función para mostrar estadísticas
-def mostrar_estadisticas():
+# Buscar registros por nombre, dirección o comentario (búsqueda de texto
+# completo); los resultados, más relevantes primero, llenan la grilla
+def buscar_registros(event=None):
     try:
-        conexion = conectar_db()
-        if conexion is None:
-            return  # No continuar si no se pudo conectar
+        grilla.buscar(entry_busqueda.get())
+    except Exception as e:
+        messagebox.showerror("Error", f"Ocurrió un error al buscar los registros: {str(e)}")
 
-        df = pd.read_sql_query("SELECT * FROM taquizas", conexion)
 
-        # Contar la cantidad de eventos por zona
-        df_eventos = df['Zona'].value_counts().reset_index()
-        df_eventos.columns = ['Zona', 'Cantidad de Eventos']
+# Quitar la búsqueda y volver a mostrar todos los registros
+def limpiar_busqueda():
+    entry_busqueda.delete(0, tk.END)
+    buscar_registros()
 
-        # Sumar la cantidad de personas por zona
-        df_personas = df.groupby('Zona')['Cantidad de personas'].sum().reset_index()
-        df_personas.columns = ['Zona', 'Total de Personas']
 
-        # Sumar el costo por zona
-        df_costos = df.groupby('Zona')['Costo'].sum().reset_index()
-        df_costos.columns = ['Zona', 'Suma de Costos']
+# Función para mostrar estadísticas
+def mostrar_estadisticas():
+    try:
+        # Contar eventos y sumar personas y costos por zona en una sola consulta
+        resumen = leer_resumen('zona')
 
         # Crear una nueva ventana para mostrar estadísticas
         ventana_estadisticas = tk.Toplevel()
-        ventana_estadisticas.title("Estadísticas por zona")
+        ventana_estadisticas.title(titulo_con_filtro("Estadísticas por zona"))
 
         # Crear un Treeview para mostrar las estadísticas
         tabla_estadisticas = ttk.Treeview(ventana_estadisticas, columns=("Zona", "Cantidad de Eventos", "Total de Personas", "Suma de Costos"), show='headings')
@@ -83,285 +120,311 @@ def mostrar_estadisticas():
         tabla_estadisticas.heading("Suma de Costos", text="Suma de Costos")
 
         # Insertar datos en la tabla
-        for i in range(len(df_eventos)):
-            tabla_estadisticas.insert("", "end", values=(df_eventos.iloc[i]["Zona"], df_eventos.iloc[i]["Cantidad de Eventos"],
-                                                         df_personas[df_personas["Zona"] == df_eventos.iloc[i]["Zona"]]["Total de Personas"].values[0],
-                                                         df_costos[df_costos["Zona"] == df_eventos.iloc[i]["Zona"]]["Suma de Costos"].values[0]))
+        for fila in resumen:
+            tabla_estadisticas.insert("", "end", values=fila)
 
         tabla_estadisticas.pack(fill=tk.BOTH, expand=True)
         ventana_estadisticas.geometry("600x400")
 
     except Exception as e:
         messagebox.showerror("Error", f"Ocurrió un error al mostrar las estadísticas: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
 
-# Función para mostrar gráficos de estadísticas en una sola ventana
+# Función para mostrar gráficos de estadísticas en el panel de gráficas
+# (la misma figura se reutiliza: sólo cambian las alturas de las barras)
 def mostrar_graficas_estadisticas():
     try:
-        conexion = conectar_db()
-        if conexion is None:
-            return  # No continuar si no se pudo conectar
-
-        df = pd.read_sql_query("SELECT * FROM taquizas", conexion)
-
-        # Contar la cantidad de eventos por zona
-        df_eventos = df['Zona'].value_counts().reset_index()
-        df_eventos.columns = ['Zona', 'Cantidad de Eventos']
-
-        # Sumar la cantidad de personas por zona
-        df_personas = df.groupby('Zona')['Cantidad de personas'].sum().reset_index()
-        df_personas.columns = ['Zona', 'Total de Personas']
-
-        # Sumar el costo por zona
-        df_costos = df.groupby('Zona')['Costo'].sum().reset_index()
-        df_costos.columns = ['Zona', 'Suma de Costos']
+        # Resumen por zona calculado en la base de datos (una fila por zona)
+        panel_graficas.mostrar_estadisticas(leer_resumen('zona'), titulo_con_filtro("Estadísticas por zona"))
 
-        # Crear subplots
-        fig, axes = plt.subplots(3, 1, figsize=(10, 15))  # 3 filas, 1 columna
+    except Exception as e:
+        messagebox.showerror("Error", f"Ocurrió un error al mostrar las gráficas: {str(e)}")
 
-        # Gráfico de barras para la cantidad de eventos por zona
-        sns.barplot(ax=axes[0], x='Zona', y='Cantidad de Eventos', data=df_eventos, palette='viridis')
-        axes[0].set_title('Cantidad de Eventos por Zona')
-        axes[0].set_xlabel('Zona')
-        axes[0].set_ylabel('Cantidad de Eventos')
 
-        # Gráfico de barras para el total de personas por zona
-        sns.barplot(ax=axes[1], x='Zona', y='Total de Personas', data=df_personas, palette='viridis')
-        axes[1].set_title('Total de Personas por Zona')
-        axes[1].set_xlabel('Zona')
-        axes[1].set_ylabel('Total de Personas')
+# Función para aplicar análisis predictivo de series temporales.
+# El ajuste del modelo corre en segundo plano; las gráficas se actualizan
+# en el panel de gráficas cuando el resultado está listo.
+def analizar_series_temporales():
+    filtro = dict(filtro_actual)
+
+    def trabajo(tarea):
+        # Serie mensual desde SQLite y modelo ARIMA reutilizado, extendido o
+        # ajustado (con búsqueda del orden por AIC) según hayan cambiado los datos
+        tarea.reportar(None, "leyendo demanda mensual")
+        df_mensual, predicciones, orden, _ = pronosticos.pronosticar(
+            db, pasos=12, reportar=tarea.reportar, revisar_cancelacion=tarea.revisar_cancelacion, filtro=filtro)
+        return df_mensual, predicciones, orden
+
+    def mostrar(resultado):
+        df_mensual, predicciones, orden = resultado
+        try:
+            # Histórico y predicción en el panel de gráficas (se actualizan las líneas)
+            panel_graficas.mostrar_series(
+                df_mensual, predicciones,
+                titulo_con_filtro('Demanda histórica de taquizas por mes'),
+                f'Predicción de demanda de taquizas para los próximos 12 meses (ARIMA{orden})')
 
-        # Gráfico de barras para la suma de costos por zona
-        sns.barplot(ax=axes[2], x='Zona', y='Suma de Costos', data=df_costos, palette='viridis')
-        axes[2].set_title('Suma de Costos por Zona')
-        axes[2].set_xlabel('Zona')
-        axes[2].set_ylabel('Suma de Costos')
+        except Exception as e:
+            mostrar_error_analisis("realizar el análisis de series temporales", e)
 
-        # Ajustar los espacios entre gráficos
-        plt.tight_layout()
+    ejecutor.ejecutar("Series temporales", trabajo, mostrar,
+                      lambda e: mostrar_error_analisis("realizar el análisis de series temporales", e))
 
-        # Mostrar todas las gráficas en una sola ventana
-        plt.show()
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Ocurrió un error al mostrar las gráficas: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
+# Pronóstico de demanda por zona y por tipo de evento. Todas las series se
+# ajustan en segundo plano (repartidas entre procesos); al terminar se
+# muestra la tabla de resultados y una gráfica por grupo en el panel.
+def analizar_pronostico_por_grupo():
+    filtro = dict(filtro_actual)
 
+    def trabajo(tarea):
+        return pronosticos.pronosticar_por_grupo(
+            db, pasos=12, reportar=tarea.reportar, revisar_cancelacion=tarea.revisar_cancelacion, filtro=filtro)
 
-# Función para aplicar análisis predictivo de series temporales
-def analizar_series_temporales():
-    try:
-        conexion = conectar_db()
-        if conexion is None:
-            return  # No continuar si no se pudo conectar
-
-        # Leer datos históricos de pedidos
-        df = pd.read_sql_query("SELECT Fecha, `Cantidad de personas` FROM taquizas", conexion)
-
-        # Convertir la columna Fecha a formato datetime
-        df['Fecha'] = pd.to_datetime(df['Fecha'])
+    def mostrar(resultado):
+        tabla, series, predicciones = resultado
+        try:
+            # Tabla de resultados
+            ventana_resultados = Toplevel()
+            ventana_resultados.title(titulo_con_filtro("Pronóstico por zona y tipo de evento"))
+            ventana_resultados.geometry("900x400")
+            tree_resultados = ttk.Treeview(ventana_resultados, columns=pronosticos.COLUMNAS_LOTE, show='headings')
+            for columna in pronosticos.COLUMNAS_LOTE:
+                tree_resultados.heading(columna, text=columna)
+                tree_resultados.column(columna, width=110)
+            # Celdas vacías para los grupos sin pronóstico (None / NaN)
+            def celda(valor):
+                if isinstance(valor, float):
+                    return "" if valor != valor else round(valor, 1)
+                return "" if valor is None else valor
+
+            for fila in tabla.itertuples(index=False):
+                tree_resultados.insert("", "end", values=[celda(valor) for valor in fila])
+            tree_resultados.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+            # Una gráfica pequeña por grupo en el panel de gráficas
+            panel_graficas.mostrar_pronosticos_por_grupo(
+                series, predicciones, titulo_con_filtro("Personas por mes por zona y tipo de evento"),
+                {dimension: estadisticas.DIMENSIONES[dimension][0] for dimension in pronosticos.DIMENSIONES_LOTE})
 
-        # Establecer la columna Fecha como índice
-        df.set_index('Fecha', inplace=True)
+        except Exception as e:
+            mostrar_error_analisis("pronosticar por grupo", e)
 
-        # Agrupar la cantidad de personas por mes para análisis de demanda mensual
-        df_mensual = df.resample('M').sum()
+    ejecutor.ejecutar("Pronóstico por grupo", trabajo, mostrar,
+                      lambda e: mostrar_error_analisis("pronosticar por grupo", e))
 
-        # Crear la figura y los subplots
-        fig, axes = plt.subplots(2, 1, figsize=(10, 12))  # 2 filas, 1 columna
 
-        # Gráfico de la demanda histórica
-        axes[0].plot(df_mensual, label='Demanda histórica')
-        axes[0].set_title('Demanda histórica de taquizas por mes')
-        axes[0].set_xlabel('Fecha')
-        axes[0].set_ylabel('Cantidad de personas')
-        axes[0].legend()
+# Función para segmentar los eventos con K-Means (personas, costo, zona y
+# tipo de evento). El operador elige k; si ya hay centroides guardados
+# para ese k se reutilizan y sólo se etiquetan los eventos.
+def realizar_clustering():
+    k = simpledialog.askinteger("Clustering", "Número de segmentos (k):",
+                                initialvalue=segmentacion.K_POR_DEFECTO, minvalue=2, maxvalue=12,
+                                parent=ventana_principal)
+    if k is None:
+        return
+    filtro = dict(filtro_actual)
+
+    # Segmentos e imagen de la nube de puntos (con todos los eventos) se
+    # calculan en segundo plano y quedan en la caché para la versión actual
+    # de los datos; volver a pedir el mismo k y filtro no recalcula nada
+    def trabajo(tarea):
+        def calcular():
+            df, cluster_descripcion, entrenado = segmentacion.segmentar(
+                db, k, reportar=tarea.reportar, revisar_cancelacion=tarea.revisar_cancelacion, filtro=filtro)
+            tarea.reportar(None, "dibujando segmentos")
+            imagen, extension = graficas.rasterizar_segmentos(
+                df['Cantidad de personas'].to_numpy(), df['Costo'].to_numpy(), df['Segmento'].to_numpy(), k)
+            return df, cluster_descripcion, entrenado, imagen, extension
+        return cache.obtener(('segmentos', k, filtros.clave(filtro)), calcular)
+
+    def mostrar(resultado):
+        df, cluster_descripcion, entrenado, imagen, extension = resultado
+        try:
+            # Visualización de los segmentos: la imagen ya rasterizada en el panel
+            panel_graficas.mostrar_segmentos(imagen, extension, k,
+                                             titulo_con_filtro(f'Segmentación de eventos en {k} grupos'))
+
+            # Crear una ventana para mostrar la descripción de cada segmento
+            descripcion_ventana = tk.Toplevel()
+            descripcion_ventana.title(titulo_con_filtro(
+                "Descripción de Segmentos" + ("" if entrenado else " (centroides guardados)")))
+
+            # Tabla para mostrar las características promedio de cada segmento
+            tabla_descripcion = ttk.Treeview(descripcion_ventana, columns=segmentacion.COLUMNAS_DESCRIPCION, show='headings')
+            for columna in segmentacion.COLUMNAS_DESCRIPCION:
+                tabla_descripcion.heading(columna, text=columna)
+            for fila in cluster_descripcion.itertuples(index=False):
+                tabla_descripcion.insert("", "end", values=[round(v, 2) if isinstance(v, float) else v for v in fila])
+            tabla_descripcion.pack(fill=tk.BOTH, expand=True)
+
+            # Tabla con cada evento y su segmento (las primeras filas si son muchos)
+            columnas = ("Nombre del solicitante", "Zona", "Tipo de evento", "Cantidad de personas", "Costo", "Segmento")
+            tabla_personas = ttk.Treeview(descripcion_ventana, columns=columnas, show='headings')
+            for columna in columnas:
+                tabla_personas.heading(columna, text=columna)
+            for fila in df[list(columnas)].head(MAX_FILAS_TABLA).itertuples(index=False):
+                tabla_personas.insert("", "end", values=fila)
+            tabla_personas.pack(fill=tk.BOTH, expand=True)
+            if len(df) > MAX_FILAS_TABLA:
+                ttk.Label(descripcion_ventana, text=f"Mostrando {MAX_FILAS_TABLA} de {len(df)} eventos").pack()
+            descripcion_ventana.geometry("800x600")
 
-        # Crear y entrenar el modelo ARIMA
-        model = ARIMA(df_mensual, order=(1, 1, 1))  # Ajustar el orden según sea necesario
-        model_fit = model.fit()
+        except Exception as e:
+            mostrar_error_analisis("realizar el clustering", e)
 
-        # Hacer predicciones a futuro (por ejemplo, los próximos 12 meses)
-        predicciones = model_fit.forecast(steps=12)
+    ejecutor.ejecutar("Clustering", trabajo, mostrar,
+                      lambda e: mostrar_error_analisis("realizar el clustering", e))
 
-        # Gráfico de predicciones
-        axes[1].plot(df_mensual, label='Demanda histórica')
-        axes[1].plot(predicciones, label='Predicción de demanda', color='red')
-        axes[1].set_title('Predicción de demanda de taquizas para los próximos 12 meses')
-        axes[1].set_xlabel('Fecha')
-        axes[1].set_ylabel('Cantidad de personas')
-        axes[1].legend()
+# Función para realizar el análisis de sentimientos y mostrar en un Treeview.
+# La calificación de comentarios corre en segundo plano con avance y se
+# puede cancelar; la ventana se llena al terminar.
+def analizar_sentimientos():
+    filtro = dict(filtro_actual)
 
-        # Ajustar los espacios entre los subplots
-        plt.tight_layout()
+    def trabajo(tarea):
+        # Calificar sólo los comentarios nuevos o modificados (los puntajes
+        # anteriores están guardados en la base de datos)
+        tarea.reportar(None, "buscando comentarios nuevos")
+        sentimientos.actualizar_puntajes(db, tarea.reportar, tarea.revisar_cancelacion, filtro=filtro)
 
-        # Mostrar ambas gráficas en la misma ventana
-        plt.show()
+        # Leer los comentarios con su sentimiento ya calculado
+        with db.conexion() as conexion:
+            return sentimientos.leer_resultados(conexion, filtro)
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Ocurrió un error al realizar el análisis de series temporales: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
+    def mostrar(resultados):
+        try:
+            # Crear una nueva ventana para mostrar resultados
+            ventana_resultados = Toplevel()
+            ventana_resultados.title(titulo_con_filtro("Resultados del Análisis de Sentimientos"))
+            ventana_resultados.geometry("800x500")
+
+            # Crear un Treeview para mostrar resultados
+            tree_resultados = ttk.Treeview(
+                ventana_resultados, 
+                columns=("ID", "Nombre del Solicitante", "Comentario", "Sentimiento"), 
+                show='headings'
+            )
+            tree_resultados.heading("ID", text="ID")
+            tree_resultados.heading("Nombre del Solicitante", text="Nombre del Solicitante")
+            tree_resultados.heading("Comentario", text="Comentario")
+            tree_resultados.heading("Sentimiento", text="Sentimiento")
+            tree_resultados.column("ID", width=50)
+            tree_resultados.column("Nombre del Solicitante", width=200)
+            tree_resultados.column("Comentario", width=400)
+            tree_resultados.column("Sentimiento", width=100)
+            tree_resultados.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+            # Aplicar estilos de color con etiquetas (tags)
+            tree_resultados.tag_configure("Positivo", background="#d4edda", foreground="#155724")  # Verde
+            tree_resultados.tag_configure("Negativo", background="#f8d7da", foreground="#721c24")  # Rojo
+            tree_resultados.tag_configure("Neutral", background="#fff3cd", foreground="#856404")  # Amarillo
+
+            # Insertar datos en el Treeview con la etiqueta del sentimiento
+            for rowid, nombre, comentario, sentimiento in resultados:
+                tree_resultados.insert("", "end", values=(rowid, nombre, comentario, sentimiento), tags=(sentimiento,))
 
+        except Exception as e:
+            mostrar_error_analisis("analizar los sentimientos", e)
 
-def realizar_clustering():
-    try:
-        conexion = conectar_db()
-        if conexion is None:
-            return  # No continuar si no se pudo conectar
-
-        # Leer datos relevantes de la base de datos
-        df = pd.read_sql_query("SELECT `Nombre del solicitante`, Zona, `Cantidad de personas`, Costo FROM taquizas", conexion)
-
-        # Crear clusters basados en la cantidad de personas
-        def clasificar_cluster(cantidad):
-            if 20 <= cantidad <= 70:
-                return 0  # Cluster 0: Zonas con menor cantidad de personas
-            elif 71 <= cantidad <= 149:
-                return 1  # Cluster 1: Zonas con cantidad moderada de personas
-            elif cantidad > 150:
-                return 2  # Cluster 2: Zonas con taquizas grandes
-            else:
-                return -1  # Cluster no válido
-
-        # Aplicar la función de clasificación
-        df['Cluster'] = df['Cantidad de personas'].apply(clasificar_cluster)
-
-        # Filtrar solo los clusters válidos
-        df = df[df['Cluster'] != -1]
-
-        # Descripción de cada cluster
-        cluster_descripcion = df.groupby('Cluster').agg({
-            'Zona': 'first',  # Puedes ajustar esto según necesites
-            'Cantidad de personas': 'mean',
-            'Costo': 'mean'
-        }).rename(columns={
-            'Zona': 'Zona Promedio',
-            'Cantidad de personas': 'Promedio de Personas',
-            'Costo': 'Costo Promedio'
-        })
-
-        # Visualización de los clusters
-        plt.figure(figsize=(10, 6))
-        sns.scatterplot(x='Zona', y='Cantidad de personas', hue='Cluster', data=df, palette='viridis')
-
-        # Añadir leyenda personalizada para las zonas
-        plt.title('Clustering de Clientes por Cantidad de Personas')
-        plt.xlabel('Zona')
-        plt.ylabel('Cantidad de Personas')
-        plt.tight_layout()  # Asegura que los elementos no se superpongan
-        plt.show()
-
-        # Crear una ventana para mostrar la descripción de cada cluster
-        descripcion_ventana = tk.Toplevel()
-        descripcion_ventana.title("Descripción de Clusters")
-
-        # Tabla para mostrar las características promedio de cada cluster
-        tabla_descripcion = ttk.Treeview(descripcion_ventana, columns=("Cluster", "Zona Promedio", "Promedio de Personas", "Costo Promedio"), show='headings')
-        tabla_descripcion.heading("Cluster", text="Cluster")
-        tabla_descripcion.heading("Zona Promedio", text="Zona Promedio")
-        tabla_descripcion.heading("Promedio de Personas", text="Promedio de Personas")
-        tabla_descripcion.heading("Costo Promedio", text="Costo Promedio")
-
-        # Insertar los datos agregados de cada cluster en la tabla
-        for index, row in cluster_descripcion.iterrows():
-            tabla_descripcion.insert("", "end", values=(index, row['Zona Promedio'], row['Promedio de Personas'], row['Costo Promedio']))
-        
-        tabla_descripcion.pack(fill=tk.BOTH, expand=True)
+    ejecutor.ejecutar("Análisis de sentimientos", trabajo, mostrar,
+                      lambda e: mostrar_error_analisis("analizar los sentimientos", e))
 
-        # Tabla para mostrar a cada persona y su cluster asignado
-        tabla_personas = ttk.Treeview(descripcion_ventana, columns=("Nombre del solicitante", "Zona", "Cantidad de personas", "Costo", "Cluster"), show='headings')
-        tabla_personas.heading("Nombre del solicitante", text="Nombre del Solicitante")
-        tabla_personas.heading("Zona", text="Zona")
-        tabla_personas.heading("Cantidad de personas", text="Cantidad de Personas")
-        tabla_personas.heading("Costo", text="Costo")
-        tabla_personas.heading("Cluster", text="Cluster")
 
-        # Insertar cada cliente con su cluster en la tabla
-        for _, row in df.iterrows():
-            tabla_personas.insert("", "end", values=(row['Nombre del solicitante'], row['Zona'], row['Cantidad de personas'], row['Costo'], row['Cluster']))
+# Mensaje de error común para los análisis en segundo plano
+def mostrar_error_analisis(accion, e):
+    messagebox.showerror("Error", f"Ocurrió un error al {accion}: {str(e)}")
 
-        tabla_personas.pack(fill=tk.BOTH, expand=True)
-        descripcion_ventana.geometry("800x600")
+# Importar registros desde un archivo de Excel o CSV. La carga corre en
+# segundo plano en una sola transacción; al terminar se recarga la grilla
+# y se ofrecen las filas rechazadas para corregirlas; las columnas del
+# archivo que no se reconocieron se avisan.
+def importar_registros():
+    ruta = filedialog.askopenfilename(
+        title="Importar registros",
+        filetypes=[("Excel o CSV", "*.xlsx *.xlsm *.csv *.txt"), ("Todos los archivos", "*.*")])
+    if not ruta:
+        return
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Ocurrió un error al realizar el clustering: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
+    def trabajo(tarea):
+        return importacion.importar(db, ruta, reportar=tarea.reportar,
+                                    revisar_cancelacion=tarea.revisar_cancelacion)
+
+    def mostrar(resultado):
+        insertados, rechazados, ignoradas = resultado
+        grilla.recargar()
+        aviso = ""
+        if ignoradas:
+            aviso = f"Columnas no reconocidas (no se importaron): {', '.join(ignoradas)}"
+        if not rechazados:
+            messagebox.showinfo("Importación", f"Se importaron {insertados} registros." + (f"\n\n{aviso}" if aviso else ""))
+            return
 
-# Función para realizar el análisis de sentimientos y mostrar en un Treeview
-def analizar_sentimientos():
-    try:
-        # Conectar a la base de datos
-        conexion = conectar_db()
-        if conexion is None:
+        # Ventana con las filas rechazadas y su motivo
+        ventana_rechazos = Toplevel()
+        ventana_rechazos.title(f"Importación: {insertados} importados, {len(rechazados)} rechazados")
+        ventana_rechazos.geometry("700x400")
+        if aviso:
+            tk.Label(ventana_rechazos, text=aviso, wraplength=680, justify=tk.LEFT).pack(anchor="w", padx=10, pady=5)
+        tabla_rechazos = ttk.Treeview(ventana_rechazos, columns=("Fila", "Motivo"), show='headings')
+        tabla_rechazos.heading("Fila", text="Fila")
+        tabla_rechazos.heading("Motivo", text="Motivo")
+        tabla_rechazos.column("Fila", width=80)
+        tabla_rechazos.column("Motivo", width=580)
+        for numero, motivo, _ in rechazados[:MAX_FILAS_TABLA]:
+            tabla_rechazos.insert("", "end", values=(numero, motivo))
+        tabla_rechazos.pack(fill=tk.BOTH, expand=True)
+
+        def guardar():
+            destino = filedialog.asksaveasfilename(
+                parent=ventana_rechazos, defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+            if destino:
+                try:
+                    importacion.guardar_rechazados(destino, rechazados)
+                except OSError as e:
+                    messagebox.showerror("Error", f"No se pudo guardar el archivo: {str(e)}")
+
+        tk.Button(ventana_rechazos, text="Guardar filas rechazadas", command=guardar).pack(pady=5)
+
+    ejecutor.ejecutar("Importación", trabajo, mostrar,
+                      lambda e: mostrar_error_analisis("importar los registros", e))
+
+
+# Exportar registros, estadísticas por zona o asignaciones a CSV, Excel o
+# Parquet. La escritura corre en segundo plano por lotes.
+def exportar_datos():
+    ventana_exportar = Toplevel(ventana_principal)
+    ventana_exportar.title("Exportar datos")
+
+    titulos = {titulo: nombre for nombre, (titulo, _, _) in exportacion.CONJUNTOS.items()}
+    tk.Label(ventana_exportar, text="Datos").grid(row=0, column=0, padx=10, pady=5)
+    combo_datos = ttk.Combobox(ventana_exportar, values=list(titulos), state="readonly", width=40)
+    combo_datos.current(0)
+    combo_datos.grid(row=0, column=1, padx=10, pady=5)
+
+    def exportar():
+        conjunto = titulos[combo_datos.get()]
+        ruta = filedialog.asksaveasfilename(
+            parent=ventana_exportar, title="Exportar datos", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx"), ("Parquet", "*.parquet")])
+        if not ruta:
             return
+        try:
+            exportacion.formato_de(ruta)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=ventana_exportar)
+            return
+        ventana_exportar.destroy()
 
-        # Leer todos los comentarios y nombres de la base de datos
-        df = pd.read_sql_query("""
-            SELECT rowid, "Nombre del solicitante", "Comentario" 
-            FROM taquizas 
-            WHERE "Comentario" IS NOT NULL
-        """, conexion)
-
-        # Crear una nueva ventana para mostrar resultados
-        ventana_resultados = Toplevel()
-        ventana_resultados.title("Resultados del Análisis de Sentimientos")
-        ventana_resultados.geometry("800x500")
-
-        # Crear un Treeview para mostrar resultados
-        tree_resultados = ttk.Treeview(
-            ventana_resultados, 
-            columns=("ID", "Nombre del Solicitante", "Comentario", "Sentimiento"), 
-            show='headings'
-        )
-        tree_resultados.heading("ID", text="ID")
-        tree_resultados.heading("Nombre del Solicitante", text="Nombre del Solicitante")
-        tree_resultados.heading("Comentario", text="Comentario")
-        tree_resultados.heading("Sentimiento", text="Sentimiento")
-        tree_resultados.column("ID", width=50)
-        tree_resultados.column("Nombre del Solicitante", width=200)
-        tree_resultados.column("Comentario", width=400)
-        tree_resultados.column("Sentimiento", width=100)
-        tree_resultados.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Aplicar estilos de color con etiquetas (tags)
-        tree_resultados.tag_configure("Positivo", background="#d4edda", foreground="#155724")  # Verde
-        tree_resultados.tag_configure("Negativo", background="#f8d7da", foreground="#721c24")  # Rojo
-        tree_resultados.tag_configure("Neutral", background="#fff3cd", foreground="#856404")  # Amarillo
-
-        # Analizar sentimiento de cada comentario
-        for index, row in df.iterrows():
-            comentario = row['Comentario']
-            nombre = row['Nombre del solicitante']
-            sentiment_score = analyzer.polarity_scores(comentario)
-            polaridad = sentiment_score['compound']
-
-            # Determinar sentimiento y asignar etiqueta
-            if polaridad >= 0.05:
-                sentimiento = 'Positivo'
-                etiqueta = "Positivo"
-            elif polaridad <= -0.05:
-                sentimiento = 'Negativo'
-                etiqueta = "Negativo"
-            else:
-                sentimiento = 'Neutral'
-                etiqueta = "Neutral"
+        def trabajo(tarea):
+            return exportacion.exportar(db, conjunto, ruta, reportar=tarea.reportar,
+                                        revisar_cancelacion=tarea.revisar_cancelacion)
 
-            # Insertar datos en el Treeview con la etiqueta
-            tree_resultados.insert("", "end", values=(row['rowid'], nombre, comentario, sentimiento), tags=(etiqueta,))
+        ejecutor.ejecutar("Exportación", trabajo,
+                          lambda filas: messagebox.showinfo("Exportación", f"Se exportaron {filas} filas a {ruta}."),
+                          lambda e: mostrar_error_analisis("exportar los datos", e))
+
+    tk.Button(ventana_exportar, text="Exportar...", command=exportar).grid(row=1, columnspan=2, pady=10)
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Ocurrió un error al analizar los sentimientos: {str(e)}")
-    finally:
-        if conexion is not None:
-            conexion.close()
 
 # Función para agregar un nuevo registro a la base de datos
 def agregar_nuevo_registro():
@@ -376,28 +439,15 @@ def agregar_nuevo_registro():
         costo = entry_costo.get()
         
         try:
-            conexion = conectar_db()
-            if conexion is None:
-                return
-
-            cursor = conexion.cursor()
-            cursor.execute(
-                """
-                INSERT INTO taquizas 
-                ("Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas", 
-                 "Direccion", "Zona", "Tipo de evento", "Costo")
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (nombre, fecha, horario, cantidad_personas, direccion, zona, tipo_evento, costo)
-            )
-            conexion.commit()
+            with db.transaccion() as conexion:
+                rowid = registros.insertar_registro(
+                    conexion, (nombre, fecha, horario, cantidad_personas, direccion, zona, tipo_evento, costo))
+                fila = registros.leer_registro(conexion, rowid)
+            grilla.aplicar_insercion(fila)  # Mostrar sólo la fila nueva en la grilla
             messagebox.showinfo("Éxito", "Registro agregado correctamente.")
             ventana_agregar.destroy()
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo agregar el registro: {str(e)}")
-        finally:
-            if conexion:
-                conexion.close()
 
     # Crear ventana para agregar un nuevo registro
     ventana_agregar = tk.Toplevel()
@@ -429,43 +479,6 @@ def agregar_nuevo_registro():
     boton_guardar.grid(row=len(campos), columnspan=2, pady=10)
 
 
-# Crear la ventana principal
-ventana_principal = tk.Tk()
-ventana_principal.title("Sistema de Taquizas a Domicilio")
-
-# Crear un Treeview para mostrar registros
-tree = ttk.Treeview(
-    ventana_principal,
-    columns=("ID", "Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas", "Direccion", "Zona", "Tipo de evento", "Costo"),
-    show='headings'
-)
-
-# Definir encabezados de columna
-tree.heading("ID", text="ID", command=lambda: ordenar_treeview("ID", False))  # Nuevo encabezado para ID
-tree.heading("Nombre del solicitante", text="Nombre del solicitante", command=lambda: ordenar_treeview("Nombre del solicitante", False))
-tree.heading("Fecha", text="Fecha", command=lambda: ordenar_treeview("Fecha", False))
-tree.heading("Horario", text="Horario", command=lambda: ordenar_treeview("Horario", False))
-tree.heading("Cantidad de personas", text="Cantidad de personas", command=lambda: ordenar_treeview("Cantidad de personas", False))
-tree.heading("Direccion", text="Direccion", command=lambda: ordenar_treeview("Direccion", False))
-tree.heading("Zona", text="Zona", command=lambda: ordenar_treeview("Zona", False))
-tree.heading("Tipo de evento", text="Tipo de evento", command=lambda: ordenar_treeview("Tipo de evento", False))
-tree.heading("Costo", text="Costo", command=lambda: ordenar_treeview("Costo", False))
-
-# Ajustar el ancho de cada columna
-tree.column("ID", width=50)  # Columna para ID
-tree.column("Nombre del solicitante", width=200)
-tree.column("Fecha", width=100)
-tree.column("Horario", width=100)
-tree.column("Cantidad de personas", width=150)
-tree.column("Direccion", width=250)
-tree.column("Zona", width=100)
-tree.column("Tipo de evento", width=150)
-tree.column("Costo", width=100)
-
-# Empaquetar el Treeview
-tree.pack(fill=tk.BOTH, expand=True)
-
-
 def modificar_registro():
     seleccionado = tree.selection()
     if not seleccionado:
@@ -477,7 +490,6 @@ def modificar_registro():
 
     # Verificar que el rowid es el correcto
     rowid = valores[0]  # Asumiendo que el rowid está en la primera posición
-    print(f"El rowid del registro seleccionado es: {rowid}")
 
     def guardar_modificaciones():
         nombre = entradas["Nombre del solicitante"].get()
@@ -490,38 +502,23 @@ def modificar_registro():
         costo = entradas["Costo"].get()
 
         try:
-            conexion = conectar_db()
-            if conexion is None:
-                return  # No continuar si no se pudo conectar
-
-            cursor = conexion.cursor()
-
-            print(f"Actualizando registro con id {rowid}: {nombre}, {fecha}, {horario}, {cantidad_personas}, {direccion}, {zona}, {tipo_evento}, {costo}")
-
-            cursor.execute(
-                """
-                UPDATE taquizas
-                SET "Nombre del solicitante" = ?, "Fecha" = ?, "Horario" = ?, "Cantidad de personas" = ?,
-                    "Direccion" = ?, "Zona" = ?, "Tipo de evento" = ?, "Costo" = ?
-                WHERE rowid = ?
-                """,
-                (nombre, fecha, horario, cantidad_personas, direccion, zona, tipo_evento, costo, rowid)  # rowid correcto
-            )
-            conexion.commit()
-
-            if cursor.rowcount > 0:
+            with db.transaccion() as conexion:
+                anterior = registros.leer_registro(conexion, rowid)
+                modificados = registros.actualizar_registro(
+                    conexion, rowid,  # rowid correcto
+                    (nombre, fecha, horario, cantidad_personas, direccion, zona, tipo_evento, costo))
+                fila = registros.leer_registro(conexion, rowid)
+
+            if modificados > 0:
+                grilla.aplicar_actualizacion(fila, anterior)  # Actualizar sólo la fila modificada
                 messagebox.showinfo("Éxito", "Registro modificado correctamente.")
             else:
                 messagebox.showwarning("Advertencia", "No se realizó ninguna actualización.")
             
             ventana_modificar.destroy()
-            mostrar_registros()  # Actualizar la vista de registros
 
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo modificar el registro: {str(e)}")
-        finally:
-            if conexion:
-                conexion.close()
 
     # Ventana para modificar el registro
     ventana_modificar = tk.Toplevel()
@@ -574,102 +571,224 @@ def eliminar_registro():
         return
 
     try:
-        conexion = conectar_db()
-        if conexion is None:
-            return
-
-        cursor = conexion.cursor()
-        cursor.execute("DELETE FROM taquizas WHERE rowid = ?", (rowid,))
-        conexion.commit()
+        with db.transaccion() as conexion:
+            eliminados = registros.eliminar_registro(conexion, rowid)
 
-        if cursor.rowcount > 0:
+        if eliminados > 0:
+            grilla.aplicar_eliminacion(rowid)  # Quitar sólo la fila eliminada
             messagebox.showinfo("Éxito", "Registro eliminado correctamente.")
-            mostrar_registros()  # Refrescar la vista
         else:
             messagebox.showwarning("Advertencia", "No se encontró el registro para eliminar.")
 
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo eliminar el registro: {str(e)}")
-    finally:
-        if conexion:
-            conexion.close()
 
+# Pantalla de asignación de colaboradores e insumos con edición en lote:
+# doble clic en una celda de colaboradores o kilos la edita en la misma
+# tabla, "Rellenar hacia abajo" copia los valores de la primera fila
+# seleccionada a las demás, y "Guardar cambios" escribe todas las filas
+# modificadas en una sola transacción (si alguna no es válida no se guarda
+# ninguna). Doble clic en el solicitante, la fecha o la cantidad abre la
+# ventana de detalles de esa taquiza.
 def asignar_evento():
     # Crear una ventana nueva
     ventana_asignacion = Toplevel(ventana_principal)
-    ventana_asignacion.title("Asignación de colaboradores e insumos")
-    ventana_asignacion.geometry("800x500")
-    
-    # Conectar a la base de datos
-    conexion = conectar_db()
-    if conexion:
-        cursor = conexion.cursor()
-        
-        # Consulta SQL para obtener los campos deseados
-        cursor.execute("""
-            SELECT rowid, "Nombre del solicitante", Fecha, "Cantidad de personas", 
-                   colaboradores, kg_tortilla, kg_queso, kg_tortilla_harina, 
-                   kg_bistek, kg_chorizo, kg_pastor, kg_cebolla, kg_limones
-            FROM taquizas
-        """)
-        taquizas = cursor.fetchall()
-
-        # Crear un contenedor de marco para el Treeview y el Scroll
-        frame_treeview = tk.Frame(ventana_asignacion)
-        frame_treeview.pack(fill=tk.BOTH, expand=True)
-
-        # Crear un Treeview para mostrar los datos
-        tree = ttk.Treeview(frame_treeview, columns=(
-            "Solicitante", "Fecha", "Cantidad", "Colaboradores", "kg_tortilla", 
-            "kg_queso", "kg_tortilla_harina", "kg_bistek", "kg_chorizo", 
-            "kg_pastor", "kg_cebolla", "kg_limones"), show="headings")
-        
-        # Definir los encabezados
-        tree.heading("Solicitante", text="Nombre del Solicitante")
-        tree.heading("Fecha", text="Fecha")
-        tree.heading("Cantidad", text="Cantidad de Personas")
-        tree.heading("Colaboradores", text="Colaboradores")
-        tree.heading("kg_tortilla", text="Kg Tortilla")
-        tree.heading("kg_queso", text="Kg Queso")
-        tree.heading("kg_tortilla_harina", text="Kg Tortilla Harina")
-        tree.heading("kg_bistek", text="Kg Bistek")
-        tree.heading("kg_chorizo", text="Kg Chorizo")
-        tree.heading("kg_pastor", text="Kg Pastor")
-        tree.heading("kg_cebolla", text="Kg Cebolla")
-        tree.heading("kg_limones", text="Kg Limones")
-        
-        # Agregar las columnas y configurar el Treeview
-        tree.column("Solicitante", width=150)
-        tree.column("Fecha", width=100)
-        tree.column("Cantidad", width=100)
-        tree.column("Colaboradores", width=150)
-        tree.column("kg_tortilla", width=100)
-        tree.column("kg_queso", width=100)
-        tree.column("kg_tortilla_harina", width=120)
-        tree.column("kg_bistek", width=100)
-        tree.column("kg_chorizo", width=100)
-        tree.column("kg_pastor", width=100)
-        tree.column("kg_cebolla", width=100)
-        tree.column("kg_limones", width=100)
-
-        # Crear scrollbar horizontal
-        scrollbar_x = tk.Scrollbar(frame_treeview, orient="horizontal", command=tree.xview)
-        tree.config(xscrollcommand=scrollbar_x.set)
-        scrollbar_x.pack(side="bottom", fill="x")
-
-        tree.pack(fill=tk.BOTH, expand=True)
-
-        # Agregar los registros de taquizas al Treeview
-        for taquiza in taquizas:
-            tree.insert("", "end", values=taquiza[1:])  # taquiza[1:] omite el rowid
-
-        # Función que se ejecuta cuando seleccionas una taquiza
-        def seleccionar_taquiza(event):
-            item = tree.selection()[0]  # Obtener el ID de la taquiza seleccionada
-            rowid_taquiza = taquizas[tree.index(item)][0]  # El rowid está en la primera columna de taquizas
-            abrir_detalles_taquiza(rowid_taquiza)
-
-        tree.bind("<Double-1>", seleccionar_taquiza)  # Al hacer doble clic en una taquiza, se abre la ventana de detalles
+    ventana_asignacion.title(titulo_con_filtro("Asignación de colaboradores e insumos"))
+    ventana_asignacion.geometry("1000x550")
+
+    # Consulta SQL para obtener los campos deseados (con el filtro actual)
+    try:
+        with db.conexion() as conexion:
+            taquizas = asignaciones.leer_asignaciones(conexion, filtro_actual)
+    except sqlite3.Error as e:
+        messagebox.showerror("Error de conexión", f"No se pudo leer la base de datos: {str(e)}")
+        ventana_asignacion.destroy()
+        return
+
+    columnas = ("Solicitante", "Fecha", "Cantidad", "Colaboradores") + asignaciones.INSUMOS
+    # Columnas que se editan en la tabla (colaboradores y kilos)
+    editables = columnas[3:]
+
+    # Crear un contenedor de marco para el Treeview y el Scroll
+    frame_treeview = tk.Frame(ventana_asignacion)
+    frame_treeview.pack(fill=tk.BOTH, expand=True)
+
+    # Crear un Treeview para mostrar los datos (selección de varias filas)
+    tree = ttk.Treeview(frame_treeview, columns=columnas, show="headings", selectmode="extended")
+
+    # Definir los encabezados
+    tree.heading("Solicitante", text="Nombre del Solicitante")
+    tree.heading("Fecha", text="Fecha")
+    tree.heading("Cantidad", text="Cantidad de Personas")
+    tree.heading("Colaboradores", text="Colaboradores")
+    for insumo in asignaciones.INSUMOS:
+        tree.heading(insumo, text="Kg " + insumo[3:].replace("_", " ").title())
+        tree.column(insumo, width=120 if insumo == "kg_tortilla_harina" else 100)
+
+    # Agregar las columnas y configurar el Treeview
+    tree.column("Solicitante", width=150)
+    tree.column("Fecha", width=100)
+    tree.column("Cantidad", width=100)
+    tree.column("Colaboradores", width=150)
+
+    # Filas modificadas y filas con error
+    tree.tag_configure("modificada", background="#fff3cd")
+    tree.tag_configure("invalida", background="#f8d7da")
+
+    # Crear scrollbar horizontal y vertical
+    scrollbar_x = tk.Scrollbar(frame_treeview, orient="horizontal", command=tree.xview)
+    scrollbar_y = tk.Scrollbar(frame_treeview, orient="vertical", command=tree.yview)
+    tree.config(xscrollcommand=scrollbar_x.set, yscrollcommand=scrollbar_y.set)
+    scrollbar_x.pack(side="bottom", fill="x")
+    scrollbar_y.pack(side="right", fill="y")
+
+    tree.pack(fill=tk.BOTH, expand=True)
+
+    # Agregar los registros de taquizas al Treeview; el rowid es el iid de cada fila
+    for taquiza in taquizas:
+        valores = ["" if valor is None else valor for valor in taquiza[1:]]
+        tree.insert("", "end", iid=str(taquiza[0]), values=valores)
+
+    # Cambios pendientes: rowid -> [colaboradores, kg...] como texto
+    cambios = {}
+    estado = tk.Label(ventana_asignacion, text="Sin cambios", anchor="w")
+
+    def actualizar_estado():
+        estado.config(text=f"{len(cambios)} filas modificadas" if cambios else "Sin cambios")
+
+    def poner_valor(iid, columna, valor):
+        tree.set(iid, columna, valor)
+        rowid = int(iid)
+        cambios[rowid] = [tree.set(iid, c) for c in editables]
+        tree.item(iid, tags=("modificada",))
+        actualizar_estado()
+
+    # Edición de una celda con un Entry encima de ella
+    editor = {}
+
+    def cerrar_editor(guardar):
+        entrada = editor.pop('entrada', None)
+        if entrada is None:
+            return
+        if guardar:
+            valor = entrada.get().strip()
+            if valor != tree.set(editor['iid'], editor['columna']):
+                poner_valor(editor['iid'], editor['columna'], valor)
+        entrada.destroy()
+
+    def editar_celda(event):
+        iid = tree.identify_row(event.y)
+        columna_id = tree.identify_column(event.x)
+        if not iid or not columna_id:
+            return
+        columna = columnas[int(columna_id[1:]) - 1]
+        if columna not in editables:
+            abrir_detalles_taquiza(int(iid))
+            return
+        cerrar_editor(True)
+        x, y, ancho, alto = tree.bbox(iid, columna_id)
+        entrada = tk.Entry(tree)
+        entrada.insert(0, tree.set(iid, columna))
+        entrada.select_range(0, tk.END)
+        entrada.place(x=x, y=y, width=ancho, height=alto)
+        entrada.focus_set()
+        entrada.bind("<Return>", lambda e: cerrar_editor(True))
+        entrada.bind("<Tab>", lambda e: cerrar_editor(True))
+        entrada.bind("<FocusOut>", lambda e: cerrar_editor(True))
+        entrada.bind("<Escape>", lambda e: cerrar_editor(False))
+        editor.update(entrada=entrada, iid=iid, columna=columna)
+
+    tree.bind("<Double-1>", editar_celda)
+    # Al desplazar la tabla el editor quedaría fuera de su celda
+    tree.bind("<MouseWheel>", lambda e: cerrar_editor(True), add="+")
+
+    # Barra de acciones de la edición en lote
+    frame_acciones = tk.Frame(ventana_asignacion)
+    frame_acciones.pack(fill=tk.X, padx=10, pady=5)
+    tk.Label(frame_acciones, text="Rellenar:").pack(side=tk.LEFT)
+    columna_relleno = ttk.Combobox(frame_acciones, state="readonly", width=20,
+                                   values=("Todas",) + editables)
+    columna_relleno.current(0)
+    columna_relleno.pack(side=tk.LEFT, padx=5)
+
+    # Copiar los valores de la primera fila seleccionada (en el orden de la
+    # tabla) a las demás filas seleccionadas
+    def rellenar_hacia_abajo():
+        cerrar_editor(True)
+        seleccion = sorted(tree.selection(), key=tree.index)
+        if len(seleccion) < 2:
+            messagebox.showinfo("Rellenar", "Selecciona al menos dos filas (Ctrl o Shift + clic).",
+                                parent=ventana_asignacion)
+            return
+        elegidas = editables if columna_relleno.get() == "Todas" else (columna_relleno.get(),)
+        origen = seleccion[0]
+        for iid in seleccion[1:]:
+            for columna in elegidas:
+                poner_valor(iid, columna, tree.set(origen, columna))
+
+    # Guardar todas las filas modificadas en una sola transacción
+    def guardar_lote():
+        cerrar_editor(True)
+        if not cambios:
+            messagebox.showinfo("Guardar", "No hay cambios por guardar.", parent=ventana_asignacion)
+            return
+        filas, errores = asignaciones.validar_cambios(cambios)
+        if errores:
+            for rowid, _ in errores:
+                tree.item(str(rowid), tags=("invalida",))
+            tree.see(str(errores[0][0]))
+            detalle = "\n".join(f"{tree.set(str(rowid), 'Solicitante')}: {mensaje}"
+                                for rowid, mensaje in errores[:10])
+            messagebox.showerror("Error", f"No se guardó ningún cambio. Corrige estas filas:\n{detalle}",
+                                 parent=ventana_asignacion)
+            return
+        try:
+            with db.conexion() as conexion:
+                choques = agenda.choques_en_cambios(conexion, {rowid: c[0] for rowid, c in cambios.items()})
+            if choques and not messagebox.askyesno(
+                    "Choque de horario",
+                    "Hay colaboradores en dos eventos a la misma hora:\n"
+                    + "\n".join(f"{nombre} el {dia} (eventos {a} y {b})" for nombre, dia, a, b in choques[:10])
+                    + "\n\n¿Guardar de todos modos?", parent=ventana_asignacion):
+                return
+            with db.transaccion() as conexion:
+                guardados = asignaciones.guardar_asignaciones(conexion, filas)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"No se guardó ningún cambio: {str(e)}", parent=ventana_asignacion)
+            return
+        for rowid in cambios:
+            tree.item(str(rowid), tags=())
+        cambios.clear()
+        actualizar_estado()
+        messagebox.showinfo("Éxito", f"Se guardaron {guardados} asignaciones.", parent=ventana_asignacion)
+
+    # Descartar los cambios pendientes volviendo a leer las filas modificadas
+    def descartar():
+        cerrar_editor(False)
+        if not cambios:
+            return
+        with db.conexion() as conexion:
+            for rowid in cambios:
+                guardada = asignaciones.leer_asignacion(conexion, rowid)
+                for columna, valor in zip(editables, guardada or ()):
+                    tree.set(str(rowid), columna, "" if valor is None else valor)
+                tree.item(str(rowid), tags=())
+        cambios.clear()
+        actualizar_estado()
+
+    tk.Button(frame_acciones, text="Rellenar hacia abajo", command=rellenar_hacia_abajo).pack(side=tk.LEFT)
+    tk.Button(frame_acciones, text="Guardar cambios", command=guardar_lote).pack(side=tk.LEFT, padx=5)
+    tk.Button(frame_acciones, text="Descartar cambios", command=descartar).pack(side=tk.LEFT)
+    estado.pack(fill=tk.X, padx=10, pady=(0, 5))
+
+    # Avisar antes de cerrar con cambios sin guardar
+    def cerrar_ventana():
+        if cambios and not messagebox.askyesno(
+                "Cambios sin guardar", "Hay cambios sin guardar. ¿Cerrar de todos modos?", parent=ventana_asignacion):
+            return
+        ventana_asignacion.destroy()
+
+    ventana_asignacion.protocol("WM_DELETE_WINDOW", cerrar_ventana)
 
 
 def abrir_detalles_taquiza(rowid_taquiza):
@@ -678,81 +797,75 @@ def abrir_detalles_taquiza(rowid_taquiza):
     ventana_detalles.title("Detalles de la Taquiza")
     ventana_detalles.geometry("600x400")
 
-    # Conectar a la base de datos
-    conexion = conectar_db()
-    if conexion:
-        cursor = conexion.cursor()
-
-        # Obtener los detalles de la taquiza seleccionada
-        cursor.execute("""
-            SELECT colaboradores, kg_tortilla, kg_queso, kg_tortilla_harina,
-                   kg_bistek, kg_chorizo, kg_pastor, kg_cebolla, kg_limones
-            FROM taquizas
-            WHERE rowid = ?
-        """, (rowid_taquiza,))
-        
-        taquiza = cursor.fetchone()  # Trae los datos de la taquiza seleccionada
+    # Obtener los detalles de la taquiza seleccionada
+    try:
+        with db.conexion() as conexion:
+            taquiza = asignaciones.leer_asignacion(conexion, rowid_taquiza)  # Trae los datos de la taquiza seleccionada
+    except sqlite3.Error as e:
+        messagebox.showerror("Error de conexión", f"No se pudo leer la base de datos: {str(e)}")
+        ventana_detalles.destroy()
+        return
 
-        if taquiza:
-            # Reemplazar valores None por valores predeterminados
-            taquiza = [valor if valor is not None else "" for valor in taquiza]
+    if taquiza:
+        # Reemplazar valores None por valores predeterminados
+        taquiza = [valor if valor is not None else "" for valor in taquiza]
 
-            # Crear campos de entrada para cada valor
-            colaboradores_entry = tk.Entry(ventana_detalles)
-            colaboradores_entry.insert(0, taquiza[0])  # Colaboradores
+        # Crear campos de entrada para cada valor
+        colaboradores_entry = tk.Entry(ventana_detalles)
+        colaboradores_entry.insert(0, taquiza[0])  # Colaboradores
 
-            kg_tortilla_entry = tk.Entry(ventana_detalles)
-            kg_tortilla_entry.insert(0, taquiza[1])  # kg_tortilla
-            
-            kg_queso_entry = tk.Entry(ventana_detalles)
-            kg_queso_entry.insert(0, taquiza[2])  # kg_queso
-            
-            kg_tortilla_harina_entry = tk.Entry(ventana_detalles)
-            kg_tortilla_harina_entry.insert(0, taquiza[3])  # kg_tortilla_harina
-
-            kg_bistek_entry = tk.Entry(ventana_detalles)
-            kg_bistek_entry.insert(0, taquiza[4])  # kg_bistek
-
-            kg_chorizo_entry = tk.Entry(ventana_detalles)
-            kg_chorizo_entry.insert(0, taquiza[5])  # kg_chorizo
-
-            kg_pastor_entry = tk.Entry(ventana_detalles)
-            kg_pastor_entry.insert(0, taquiza[6])  # kg_pastor
-
-            kg_cebolla_entry = tk.Entry(ventana_detalles)
-            kg_cebolla_entry.insert(0, taquiza[7])  # kg_cebolla
-
-            kg_limones_entry = tk.Entry(ventana_detalles)
-            kg_limones_entry.insert(0, taquiza[8])  # kg_limones
-
-            # Empacar los campos
-            colaboradores_entry.grid(row=0, column=1, padx=10, pady=5)
-            kg_tortilla_entry.grid(row=1, column=1, padx=10, pady=5)
-            kg_queso_entry.grid(row=2, column=1, padx=10, pady=5)
-            kg_tortilla_harina_entry.grid(row=3, column=1, padx=10, pady=5)
-            kg_bistek_entry.grid(row=4, column=1, padx=10, pady=5)
-            kg_chorizo_entry.grid(row=5, column=1, padx=10, pady=5)
-            kg_pastor_entry.grid(row=6, column=1, padx=10, pady=5)
-            kg_cebolla_entry.grid(row=7, column=1, padx=10, pady=5)
-            kg_limones_entry.grid(row=8, column=1, padx=10, pady=5)
-
-            # Etiquetas para cada campo
-            tk.Label(ventana_detalles, text="Colaboradores:").grid(row=0, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg de Tortilla:").grid(row=1, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg de Queso:").grid(row=2, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Tortilla Harina:").grid(row=3, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Bistek:").grid(row=4, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Chorizo:").grid(row=5, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Pastor:").grid(row=6, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Cebolla:").grid(row=7, column=0, padx=10, pady=5)
-            tk.Label(ventana_detalles, text="Kg Limones:").grid(row=8, column=0, padx=10, pady=5)
-
-            # Botón para guardar los cambios
-            guardar_button = tk.Button(ventana_detalles, text="Guardar Cambios", command=lambda: guardar_cambios(
-                rowid_taquiza, colaboradores_entry, kg_tortilla_entry, kg_queso_entry, kg_tortilla_harina_entry,
-                kg_bistek_entry, kg_chorizo_entry, kg_pastor_entry, kg_cebolla_entry, kg_limones_entry,
-                ventana_detalles))
-            guardar_button.grid(row=9, column=0, columnspan=2, pady=10)
+        kg_tortilla_entry = tk.Entry(ventana_detalles)
+        kg_tortilla_entry.insert(0, taquiza[1])  # kg_tortilla
+        
+        kg_queso_entry = tk.Entry(ventana_detalles)
+        kg_queso_entry.insert(0, taquiza[2])  # kg_queso
+        
+        kg_tortilla_harina_entry = tk.Entry(ventana_detalles)
+        kg_tortilla_harina_entry.insert(0, taquiza[3])  # kg_tortilla_harina
+
+        kg_bistek_entry = tk.Entry(ventana_detalles)
+        kg_bistek_entry.insert(0, taquiza[4])  # kg_bistek
+
+        kg_chorizo_entry = tk.Entry(ventana_detalles)
+        kg_chorizo_entry.insert(0, taquiza[5])  # kg_chorizo
+
+        kg_pastor_entry = tk.Entry(ventana_detalles)
+        kg_pastor_entry.insert(0, taquiza[6])  # kg_pastor
+
+        kg_cebolla_entry = tk.Entry(ventana_detalles)
+        kg_cebolla_entry.insert(0, taquiza[7])  # kg_cebolla
+
+        kg_limones_entry = tk.Entry(ventana_detalles)
+        kg_limones_entry.insert(0, taquiza[8])  # kg_limones
+
+        # Empacar los campos
+        colaboradores_entry.grid(row=0, column=1, padx=10, pady=5)
+        kg_tortilla_entry.grid(row=1, column=1, padx=10, pady=5)
+        kg_queso_entry.grid(row=2, column=1, padx=10, pady=5)
+        kg_tortilla_harina_entry.grid(row=3, column=1, padx=10, pady=5)
+        kg_bistek_entry.grid(row=4, column=1, padx=10, pady=5)
+        kg_chorizo_entry.grid(row=5, column=1, padx=10, pady=5)
+        kg_pastor_entry.grid(row=6, column=1, padx=10, pady=5)
+        kg_cebolla_entry.grid(row=7, column=1, padx=10, pady=5)
+        kg_limones_entry.grid(row=8, column=1, padx=10, pady=5)
+
+        # Etiquetas para cada campo
+        tk.Label(ventana_detalles, text="Colaboradores:").grid(row=0, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg de Tortilla:").grid(row=1, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg de Queso:").grid(row=2, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Tortilla Harina:").grid(row=3, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Bistek:").grid(row=4, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Chorizo:").grid(row=5, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Pastor:").grid(row=6, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Cebolla:").grid(row=7, column=0, padx=10, pady=5)
+        tk.Label(ventana_detalles, text="Kg Limones:").grid(row=8, column=0, padx=10, pady=5)
+
+        # Botón para guardar los cambios
+        guardar_button = tk.Button(ventana_detalles, text="Guardar Cambios", command=lambda: guardar_cambios(
+            rowid_taquiza, colaboradores_entry, kg_tortilla_entry, kg_queso_entry, kg_tortilla_harina_entry,
+            kg_bistek_entry, kg_chorizo_entry, kg_pastor_entry, kg_cebolla_entry, kg_limones_entry,
+            ventana_detalles))
+        guardar_button.grid(row=9, column=0, columnspan=2, pady=10)
 
 
 # Función para guardar los cambios
@@ -770,95 +883,359 @@ def guardar_cambios(rowid_taquiza, colaboradores_entry, kg_tortilla_entry, kg_qu
     kg_cebolla_nuevos = kg_cebolla_entry.get()
     kg_limones_nuevos = kg_limones_entry.get()
 
-    # Mostrar los datos obtenidos en la consola para depurar
-    print("Datos a guardar:")
-    print(f"Colaboradores: {colaboradores_nuevos}")
-    print(f"Kg Tortilla: {kg_tortilla_nuevos}")
-    print(f"Kg Queso: {kg_queso_nuevos}")
-    print(f"Kg Tortilla Harina: {kg_tortilla_harina_nuevos}")
-    print(f"Kg Bistek: {kg_bistek_nuevos}")
-    print(f"Kg Chorizo: {kg_chorizo_nuevos}")
-    print(f"Kg Pastor: {kg_pastor_nuevos}")
-    print(f"Kg Cebolla: {kg_cebolla_nuevos}")
-    print(f"Kg Limones: {kg_limones_nuevos}")
-
     # Validar que los valores numéricos sean correctos
     try:
-        kg_tortilla_nuevos = float(kg_tortilla_nuevos)
-        kg_queso_nuevos = float(kg_queso_nuevos)
-        kg_tortilla_harina_nuevos = float(kg_tortilla_harina_nuevos)
-        kg_bistek_nuevos = float(kg_bistek_nuevos)
-        kg_chorizo_nuevos = float(kg_chorizo_nuevos)
-        kg_pastor_nuevos = float(kg_pastor_nuevos)
-        kg_cebolla_nuevos = float(kg_cebolla_nuevos)
-        kg_limones_nuevos = float(kg_limones_nuevos)
-
-        # Conectar a la base de datos
-        conexion = conectar_db()
-        if conexion:
-            cursor = conexion.cursor()
-            cursor.execute("""
-                UPDATE taquizas
-                SET colaboradores = ?, kg_tortilla = ?, kg_queso = ?, kg_tortilla_harina = ?, kg_bistek = ?,
-                    kg_chorizo = ?, kg_pastor = ?, kg_cebolla = ?, kg_limones = ?
-                WHERE rowid = ?
-            """, (colaboradores_nuevos, kg_tortilla_nuevos, kg_queso_nuevos, kg_tortilla_harina_nuevos,
-                  kg_bistek_nuevos, kg_chorizo_nuevos, kg_pastor_nuevos, kg_cebolla_nuevos, kg_limones_nuevos,
-                  rowid_taquiza))
-            conexion.commit()
-            messagebox.showinfo("Éxito", "Los cambios se han guardado correctamente.")
-            ventana_detalles.destroy()
-        else:
-            messagebox.showerror("Error", "No se pudo conectar a la base de datos.")
+        kilos = asignaciones.convertir_insumos((
+            kg_tortilla_nuevos, kg_queso_nuevos, kg_tortilla_harina_nuevos, kg_bistek_nuevos,
+            kg_chorizo_nuevos, kg_pastor_nuevos, kg_cebolla_nuevos, kg_limones_nuevos))
+
+        # Avisar si alguno de los colaboradores ya está en otro evento a esa hora
+        with db.conexion() as conexion:
+            choques = agenda.choques_al_asignar(conexion, rowid_taquiza, colaboradores_nuevos)
+        if choques and not messagebox.askyesno(
+                "Choque de horario",
+                "Estos colaboradores ya tienen otro evento a esa hora:\n"
+                + "\n".join(f"{nombre} (evento {otro})" for nombre, otro in choques)
+                + "\n\n¿Guardar de todos modos?", parent=ventana_detalles):
+            return
+
+        with db.transaccion() as conexion:
+            asignaciones.guardar_asignacion(conexion, rowid_taquiza, colaboradores_nuevos, kilos)
+        messagebox.showinfo("Éxito", "Los cambios se han guardado correctamente.")
+        ventana_detalles.destroy()
     except ValueError:
         messagebox.showerror("Error", "Por favor ingresa valores numéricos válidos para los insumos.")
+    except sqlite3.Error as e:
+        messagebox.showerror("Error", f"No se pudieron guardar los cambios: {str(e)}")
+
+
+
+# Planificar los insumos de un rango de fechas: kilos por evento según las
+# recetas por persona y lista de compras por día. Los eventos sin insumos
+# capturados se pueden llenar con los kilos calculados.
+def planificar_insumos():
+    ventana_plan = Toplevel(ventana_principal)
+    ventana_plan.title("Planificación de insumos")
+    ventana_plan.geometry("1000x450")
+
+    marco_fechas = tk.Frame(ventana_plan)
+    marco_fechas.pack(fill=tk.X, padx=10, pady=5)
+    tk.Label(marco_fechas, text="Desde (AAAA-MM-DD):").pack(side=tk.LEFT)
+    entry_desde = tk.Entry(marco_fechas, width=12)
+    entry_desde.pack(side=tk.LEFT, padx=5)
+    tk.Label(marco_fechas, text="Hasta:").pack(side=tk.LEFT)
+    entry_hasta = tk.Entry(marco_fechas, width=12)
+    entry_hasta.pack(side=tk.LEFT, padx=5)
+    hoy = time.strftime("%Y-%m-%d")
+    entry_desde.insert(0, hoy)
+    entry_hasta.insert(0, time.strftime("%Y-%m-%d", time.localtime(time.time() + 7 * 86400)))
+
+    tabla_compras = ttk.Treeview(ventana_plan, columns=insumos.COLUMNAS_COMPRAS, show='headings')
+    for columna in insumos.COLUMNAS_COMPRAS:
+        tabla_compras.heading(columna, text=columna)
+        tabla_compras.column(columna, width=90)
+    tabla_compras.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    def rango():
+        return entry_desde.get().strip(), entry_hasta.get().strip()
+
+    def calcular():
+        desde, hasta = rango()
+
+        def trabajo(tarea):
+            with db.conexion() as conexion:
+                return insumos.lista_compras(insumos.planificar(conexion, desde, hasta))
+
+        def mostrar(filas):
+            tabla_compras.delete(*tabla_compras.get_children())
+            for fila in filas:
+                tabla_compras.insert("", "end", values=fila)
+
+        ejecutor.ejecutar("Planificación de insumos", trabajo, mostrar,
+                          lambda e: mostrar_error_analisis("planificar los insumos", e))
+
+    def llenar():
+        desde, hasta = rango()
+
+        def terminado(llenados):
+            messagebox.showinfo("Insumos", f"Se llenaron los insumos de {llenados} eventos.", parent=ventana_plan)
+            calcular()
+
+        ejecutor.ejecutar("Llenar insumos", lambda tarea: insumos.llenar_faltantes(db, desde, hasta), terminado,
+                          lambda e: mostrar_error_analisis("llenar los insumos", e))
+
+    tk.Button(marco_fechas, text="Calcular", command=calcular).pack(side=tk.LEFT, padx=5)
+    tk.Button(marco_fechas, text="Llenar eventos sin capturar", command=llenar).pack(side=tk.LEFT, padx=5)
+    calcular()
+
+
+# Revisar la agenda de colaboradores de un rango de fechas: choques de
+# horario (la misma persona en dos eventos que se cruzan) y propuestas
+# para completar el personal de cada evento repartiendo la carga.
+def revisar_agenda():
+    ventana_agenda = Toplevel(ventana_principal)
+    ventana_agenda.title("Agenda de colaboradores")
+    ventana_agenda.geometry("800x550")
+
+    marco_fechas = tk.Frame(ventana_agenda)
+    marco_fechas.pack(fill=tk.X, padx=10, pady=5)
+    tk.Label(marco_fechas, text="Desde (AAAA-MM-DD):").pack(side=tk.LEFT)
+    entry_desde = tk.Entry(marco_fechas, width=12)
+    entry_desde.pack(side=tk.LEFT, padx=5)
+    tk.Label(marco_fechas, text="Hasta:").pack(side=tk.LEFT)
+    entry_hasta = tk.Entry(marco_fechas, width=12)
+    entry_hasta.pack(side=tk.LEFT, padx=5)
+    entry_desde.insert(0, time.strftime("%Y-%m-%d"))
+    entry_hasta.insert(0, time.strftime("%Y-%m-%d", time.localtime(time.time() + 30 * 86400)))
+
+    tk.Label(ventana_agenda, text="Choques de horario").pack(anchor="w", padx=10)
+    columnas_choques = ("Colaborador", "Día", "Evento", "Se cruza con")
+    tabla_choques = ttk.Treeview(ventana_agenda, columns=columnas_choques, show='headings', height=8)
+    for columna in columnas_choques:
+        tabla_choques.heading(columna, text=columna)
+    tabla_choques.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    tk.Label(ventana_agenda, text="Propuestas de asignación").pack(anchor="w", padx=10)
+    columnas_propuestas = ("Evento", "Día", "Colaboradores", "Faltan")
+    tabla_propuestas = ttk.Treeview(ventana_agenda, columns=columnas_propuestas, show='headings', height=8)
+    for columna in columnas_propuestas:
+        tabla_propuestas.heading(columna, text=columna)
+    tabla_propuestas.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+    propuesta_actual = []
+
+    def revisar():
+        desde, hasta = entry_desde.get().strip(), entry_hasta.get().strip()
+
+        def trabajo(tarea):
+            with db.conexion() as conexion:
+                agenda_eventos = agenda.Agenda.leer(conexion, desde, hasta)
+            choques = agenda_eventos.conflictos()
+            propuestas = agenda_eventos.proponer()
+            # Texto final de colaboradores de cada evento con propuesta
+            cambios = [(agenda.unir_colaboradores(agenda_eventos.personal[rowid]), rowid)
+                       for rowid, nuevos, _ in propuestas if nuevos]
+            return agenda_eventos, choques, propuestas, cambios
+
+        def mostrar(resultado):
+            agenda_eventos, choques, propuestas, cambios = resultado
+            tabla_choques.delete(*tabla_choques.get_children())
+            tabla_propuestas.delete(*tabla_propuestas.get_children())
+            for choque in choques:
+                tabla_choques.insert("", "end", values=choque)
+            for rowid, nuevos, faltan in propuestas:
+                dia = agenda_eventos.eventos[rowid][0]
+                tabla_propuestas.insert("", "end", values=(rowid, dia, agenda.unir_colaboradores(nuevos), faltan))
+            propuesta_actual[:] = cambios
+
+        ejecutor.ejecutar("Agenda", trabajo, mostrar,
+                          lambda e: mostrar_error_analisis("revisar la agenda", e))
+
+    def aplicar():
+        if not propuesta_actual:
+            messagebox.showinfo("Agenda", "No hay propuestas para aplicar.", parent=ventana_agenda)
+            return
+        try:
+            with db.transaccion() as conexion:
+                asignaciones.guardar_colaboradores(conexion, propuesta_actual)
+            messagebox.showinfo("Agenda", f"Se asignó personal a {len(propuesta_actual)} eventos.", parent=ventana_agenda)
+            propuesta_actual.clear()
+            revisar()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"No se pudieron guardar las asignaciones: {str(e)}", parent=ventana_agenda)
 
+    tk.Button(marco_fechas, text="Revisar", command=revisar).pack(side=tk.LEFT, padx=5)
+    tk.Button(marco_fechas, text="Aplicar propuestas", command=aplicar).pack(side=tk.LEFT, padx=5)
+    revisar()
 
 
-# Función para ordenar el Treeview
+# Función para ordenar el Treeview (el orden se aplica en la base de datos)
 def ordenar_treeview(columna, reverso):
-    datos = [(tree.set(item, columna), item) for item in tree.get_children('')]
-    datos.sort(reverse=reverso)
-    
-    for index, (valor, item) in enumerate(datos):
-        tree.move(item, '', index)
+    try:
+        grilla.ordenar('rowid' if columna == "ID" else columna, reverso)
+    except Exception as e:
+        messagebox.showerror("Error", f"Ocurrió un error al ordenar los registros: {str(e)}")
 
     tree.heading(columna, command=lambda: ordenar_treeview(columna, not reverso))
 
 
-# Crear botones
-boton_mostrar_registros = tk.Button(ventana_principal, text="Mostrar Registros", command=mostrar_registros)
-boton_mostrar_registros.pack(side=tk.LEFT)
-
-boton_mostrar_estadisticas = tk.Button(ventana_principal, text="Mostrar Estadísticas", command=mostrar_estadisticas)
-boton_mostrar_estadisticas.pack(side=tk.LEFT)
-
-boton_mostrar_graficas = tk.Button(ventana_principal, text="Mostrar Gráficas", command=mostrar_graficas_estadisticas)
-boton_mostrar_graficas.pack(side=tk.LEFT)
+# Cerrar las conexiones del pool al salir de la aplicación
+def cerrar_aplicacion():
+    ejecutor.cerrar()
+    db.cerrar()
+    ventana_principal.destroy()
 
-boton_analizar_series = tk.Button(ventana_principal, text="Analizar Series Temporales", command=analizar_series_temporales)
-boton_analizar_series.pack(side=tk.LEFT)
 
-boton_clustering = tk.Button(ventana_principal, text="Realizar Clustering", command=realizar_clustering)
-boton_clustering.pack(side=tk.LEFT)
-
-# Crear un botón para realizar el análisis de sentimientos
-boton_analizar = tk.Button(ventana_principal, text="Analizar Sentimientos", command=analizar_sentimientos)
-boton_analizar.pack(side=tk.LEFT)
+# Con --medir-arranque se informa el tiempo de importación y el tiempo
+# hasta el primer cuadro dibujado (en JSON) y se cierra la aplicación
+def informar_arranque(event):
+    if event.widget is not ventana_principal:
+        return
+    ventana_principal.update_idletasks()
+    t_cuadro = time.perf_counter()
+    print(json.dumps({
+        "imports_s": round(T_IMPORTS - T_INICIO, 4),
+        "primer_cuadro_s": round(t_cuadro - T_INICIO, 4),
+    }), flush=True)
+    ventana_principal.after(0, cerrar_aplicacion)
+
+
+# La ventana sólo se crea al ejecutar este archivo; los procesos de trabajo
+# (multiprocessing) lo importan sin abrir otra ventana
+if __name__ == "__main__":
+    # Capa de acceso a datos compartida por toda la aplicación (conexiones
+    # de larga vida), con el esquema al día antes de abrir la ventana
+    db = nucleo.abrir()
+
+    # Caché de resultados compartida por las vistas de análisis; se invalida
+    # sola cuando cambia la versión de los datos
+    cache = CacheResultados(db)
+
+    # Filtro compartido (ver filtros.py) que aplican la grilla y los análisis
+    filtro_actual = {}
+
+    # Crear la ventana principal
+    ventana_principal = tk.Tk()
+    ventana_principal.title("Sistema de Taquizas a Domicilio")
+
+    # Caja de búsqueda sobre la grilla (Enter busca)
+    frame_busqueda = tk.Frame(ventana_principal)
+    frame_busqueda.pack(fill=tk.X, padx=5, pady=3)
+    tk.Label(frame_busqueda, text="Buscar (nombre, dirección, comentario):").pack(side=tk.LEFT)
+    entry_busqueda = tk.Entry(frame_busqueda, width=40)
+    entry_busqueda.pack(side=tk.LEFT, padx=5)
+    entry_busqueda.bind("<Return>", buscar_registros)
+    tk.Button(frame_busqueda, text="Buscar", command=buscar_registros).pack(side=tk.LEFT)
+    tk.Button(frame_busqueda, text="Limpiar", command=limpiar_busqueda).pack(side=tk.LEFT, padx=5)
+
+    # Barra de filtros: fechas, zona, tipo de evento y rango de personas
+    frame_filtros = tk.Frame(ventana_principal)
+    frame_filtros.pack(fill=tk.X, padx=5, pady=3)
+    entradas_filtro = {}
+    for campo, texto, ancho in (('desde', "Desde (AAAA-MM-DD):", 11), ('hasta', "Hasta:", 11),
+                                ('zona', "Zona:", 12), ('tipo_evento', "Tipo:", 12),
+                                ('personas_min', "Personas de:", 5), ('personas_max', "a:", 5)):
+        tk.Label(frame_filtros, text=texto).pack(side=tk.LEFT)
+        if campo in filtros.COLUMNAS_OPCIONES:
+            entrada = ttk.Combobox(frame_filtros, width=ancho,
+                                   postcommand=lambda campo=campo: cargar_opciones_filtro(campo))
+        else:
+            entrada = tk.Entry(frame_filtros, width=ancho)
+        entrada.pack(side=tk.LEFT, padx=(2, 6))
+        entrada.bind("<Return>", lambda event: aplicar_filtros())
+        entradas_filtro[campo] = entrada
+    tk.Button(frame_filtros, text="Aplicar filtros", command=aplicar_filtros).pack(side=tk.LEFT)
+    tk.Button(frame_filtros, text="Quitar", command=quitar_filtros).pack(side=tk.LEFT, padx=5)
+    etiqueta_filtro = tk.Label(frame_filtros, text="Sin filtro", fg="gray")
+    etiqueta_filtro.pack(side=tk.LEFT, padx=5)
+
+    # Marco para el Treeview de registros y su barra de desplazamiento
+    frame_registros = tk.Frame(ventana_principal)
+
+    # Crear un Treeview para mostrar registros
+    tree = ttk.Treeview(
+        frame_registros,
+        columns=("ID", "Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas", "Direccion", "Zona", "Tipo de evento", "Costo"),
+        show='headings'
+    )
+
+    # Definir encabezados de columna
+    tree.heading("ID", text="ID", command=lambda: ordenar_treeview("ID", False))  # Nuevo encabezado para ID
+    tree.heading("Nombre del solicitante", text="Nombre del solicitante", command=lambda: ordenar_treeview("Nombre del solicitante", False))
+    tree.heading("Fecha", text="Fecha", command=lambda: ordenar_treeview("Fecha", False))
+    tree.heading("Horario", text="Horario", command=lambda: ordenar_treeview("Horario", False))
+    tree.heading("Cantidad de personas", text="Cantidad de personas", command=lambda: ordenar_treeview("Cantidad de personas", False))
+    tree.heading("Direccion", text="Direccion", command=lambda: ordenar_treeview("Direccion", False))
+    tree.heading("Zona", text="Zona", command=lambda: ordenar_treeview("Zona", False))
+    tree.heading("Tipo de evento", text="Tipo de evento", command=lambda: ordenar_treeview("Tipo de evento", False))
+    tree.heading("Costo", text="Costo", command=lambda: ordenar_treeview("Costo", False))
+
+    # Ajustar el ancho de cada columna
+    tree.column("ID", width=50)  # Columna para ID
+    tree.column("Nombre del solicitante", width=200)
+    tree.column("Fecha", width=100)
+    tree.column("Horario", width=100)
+    tree.column("Cantidad de personas", width=150)
+    tree.column("Direccion", width=250)
+    tree.column("Zona", width=100)
+    tree.column("Tipo de evento", width=150)
+    tree.column("Costo", width=100)
+
+    # Barra de desplazamiento vertical que representa la tabla completa
+    scrollbar_registros = ttk.Scrollbar(frame_registros, orient="vertical")
+    scrollbar_registros.pack(side=tk.RIGHT, fill=tk.Y)
+
+    # Empaquetar el Treeview
+    tree.pack(fill=tk.BOTH, expand=True)
+    frame_registros.pack(fill=tk.BOTH, expand=True)
+
+    # La grilla paginada sólo carga las filas alrededor de la posición visible
+    grilla = GrillaPaginada(tree, scrollbar_registros, db)
+
+    # Área de estado para los análisis que corren en segundo plano
+    ejecutor = EjecutorTareas(ventana_principal)
+    ejecutor.marco.pack(side=tk.BOTTOM, fill=tk.X)
+
+    # Panel de gráficas: una sola figura embebida que se reutiliza
+    panel_graficas = graficas.PanelGraficas(ventana_principal)
+
+    # Crear botones
+    boton_mostrar_registros = tk.Button(ventana_principal, text="Mostrar Registros", command=mostrar_registros)
+    boton_mostrar_registros.pack(side=tk.LEFT)
+
+    boton_mostrar_estadisticas = tk.Button(ventana_principal, text="Mostrar Estadísticas", command=mostrar_estadisticas)
+    boton_mostrar_estadisticas.pack(side=tk.LEFT)
+
+    boton_mostrar_graficas = tk.Button(ventana_principal, text="Mostrar Gráficas", command=mostrar_graficas_estadisticas)
+    boton_mostrar_graficas.pack(side=tk.LEFT)
+
+    boton_analizar_series = tk.Button(ventana_principal, text="Analizar Series Temporales", command=analizar_series_temporales)
+    boton_analizar_series.pack(side=tk.LEFT)
+
+    boton_pronostico_grupo = tk.Button(ventana_principal, text="Pronóstico por Grupo", command=analizar_pronostico_por_grupo)
+    boton_pronostico_grupo.pack(side=tk.LEFT)
+
+    boton_clustering = tk.Button(ventana_principal, text="Realizar Clustering", command=realizar_clustering)
+    boton_clustering.pack(side=tk.LEFT)
+
+    # Crear un botón para realizar el análisis de sentimientos
+    boton_analizar = tk.Button(ventana_principal, text="Analizar Sentimientos", command=analizar_sentimientos)
+    boton_analizar.pack(side=tk.LEFT)
+
+    # Llamar a la función para agregar el botón en la ventana principal
+    boton_asignacion = tk.Button(ventana_principal, text="Asignación para Evento", command=asignar_evento)
+    boton_asignacion.pack(side=tk.LEFT)
+
+    boton_insumos = tk.Button(ventana_principal, text="Planificar Insumos", command=planificar_insumos)
+    boton_insumos.pack(side=tk.LEFT)
+
+    boton_agenda = tk.Button(ventana_principal, text="Agenda de Colaboradores", command=revisar_agenda)
+    boton_agenda.pack(side=tk.LEFT)
+
+    boton_modificar = tk.Button(ventana_principal, text="Modificar Registro", command=modificar_registro)
+    boton_modificar.pack(pady=10)
+
+    boton_eliminar = tk.Button(ventana_principal, text="Eliminar Registro", command=eliminar_registro)
+    boton_eliminar.pack(pady=10)
+
+    # Crear botón para abrir la ventana de agregar registro
+    boton_agregar = tk.Button(ventana_principal, text="Agregar Registro", command=agregar_nuevo_registro)
+    boton_agregar.pack(pady=10)
+
+    boton_importar = tk.Button(ventana_principal, text="Importar Registros", command=importar_registros)
+    boton_importar.pack(pady=10)
 
-# Llamar a la función para agregar el botón en la ventana principal
-boton_asignacion = tk.Button(ventana_principal, text="Asignación para Evento", command=asignar_evento)
-boton_asignacion.pack(side=tk.LEFT)
+    boton_exportar = tk.Button(ventana_principal, text="Exportar Datos", command=exportar_datos)
+    boton_exportar.pack(pady=10)
 
-boton_modificar = tk.Button(ventana_principal, text="Modificar Registro", command=modificar_registro)
-boton_modificar.pack(pady=10)
+    ventana_principal.protocol("WM_DELETE_WINDOW", cerrar_aplicacion)
 
-boton_eliminar = tk.Button(ventana_principal, text="Eliminar Registro", command=eliminar_registro)
-boton_eliminar.pack(pady=10)
+    ventana_principal.geometry("800x600")
 
-# Crear botón para abrir la ventana de agregar registro
-boton_agregar = tk.Button(ventana_principal, text="Agregar Registro", command=agregar_nuevo_registro)
-boton_agregar.pack(pady=10)
+    if "--medir-arranque" in sys.argv:
+        ventana_principal.bind("<Map>", informar_arranque, add="+")
+    else:
+        # Con la ventana ya visible, precargar las librerías pesadas en segundo plano
+        ventana_principal.after(1000, dependencias.precargar)
 
-ventana_principal.geometry("800x600")
-ventana_principal.mainloop()
+    ventana_principal.mainloop()
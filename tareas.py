@@ -0,0 +1,138 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+
+# Excepción que lanza una tarea cuando el operador la cancela
+class TareaCancelada(Exception):
+    pass
+
+
+# Una tarea en segundo plano. El trabajo recibe este objeto para informar
+# su avance con `reportar()` y revisar con `revisar_cancelacion()` si el
+# operador pidió detenerla (la cancelación es cooperativa).
+class Tarea:
+    def __init__(self, nombre, ejecutor):
+        self.nombre = nombre
+        self._ejecutor = ejecutor
+        self._cancelada = threading.Event()
+
+    def cancelar(self):
+        self._cancelada.set()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def revisar_cancelacion(self):
+        if self._cancelada.is_set():
+            raise TareaCancelada(self.nombre)
+
+    # Informar avance (fracción entre 0 y 1, o None si no se conoce)
+    def reportar(self, fraccion=None, mensaje=None):
+        self._ejecutor._mensajes.put(('avance', self, fraccion, mensaje))
+
+
+# Ejecutor de tareas para la interfaz: corre el trabajo en un pool de
+# hilos y regresa los resultados al hilo de Tk revisando una cola con
+# `after()`, porque los widgets sólo se pueden tocar desde ese hilo.
+# Muestra el avance en un área de estado con barra de progreso y botón
+# de cancelar.
+class EjecutorTareas:
+    INTERVALO_MS = 100
+
+    def __init__(self, raiz, max_hilos=2):
+        self.raiz = raiz
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="tarea")
+        self._mensajes = queue.Queue()
+        self._activas = []
+
+        # Área de estado
+        self.marco = ttk.Frame(raiz)
+        self.etiqueta = ttk.Label(self.marco, text="Listo")
+        self.etiqueta.pack(side="left", padx=5)
+        self.barra = ttk.Progressbar(self.marco, length=200, mode="determinate", maximum=1.0)
+        self.barra.pack(side="left", padx=5)
+        self.boton_cancelar = ttk.Button(self.marco, text="Cancelar", command=self.cancelar_actual, state="disabled")
+        self.boton_cancelar.pack(side="left", padx=5)
+
+        self.raiz.after(self.INTERVALO_MS, self._revisar_cola)
+
+    # Ejecutar `trabajo(tarea)` en segundo plano. Al terminar se llama
+    # `al_terminar(resultado)` en el hilo de Tk; si falla, `al_fallar(error)`.
+    def ejecutar(self, nombre, trabajo, al_terminar, al_fallar=None):
+        tarea = Tarea(nombre, self)
+        self._activas.append(tarea)
+        self._mostrar_estado(tarea, None, "iniciando...")
+
+        def correr():
+            try:
+                resultado = trabajo(tarea)
+            except TareaCancelada:
+                self._mensajes.put(('cancelada', tarea, None, None))
+            except Exception as e:
+                self._mensajes.put(('error', tarea, e, al_fallar))
+            else:
+                self._mensajes.put(('listo', tarea, resultado, al_terminar))
+
+        self._pool.submit(correr)
+        return tarea
+
+    # Cancelar la tarea más reciente
+    def cancelar_actual(self):
+        if self._activas:
+            self._activas[-1].cancelar()
+            self.etiqueta.config(text=f"{self._activas[-1].nombre}: cancelando...")
+
+    # Procesar los mensajes de los hilos de trabajo (corre en el hilo de Tk)
+    def _revisar_cola(self):
+        try:
+            while True:
+                tipo, tarea, dato, llamada = self._mensajes.get_nowait()
+                if tipo == 'avance':
+                    if tarea in self._activas and not tarea.cancelada:
+                        self._mostrar_estado(tarea, dato, llamada)
+                    continue
+                if tarea in self._activas:
+                    self._activas.remove(tarea)
+                if tipo == 'listo':
+                    self._terminar(f"{tarea.nombre}: listo")
+                    llamada(dato)
+                elif tipo == 'error':
+                    self._terminar(f"{tarea.nombre}: error")
+                    if llamada is not None:
+                        llamada(dato)
+                else:
+                    self._terminar(f"{tarea.nombre}: cancelada")
+        except queue.Empty:
+            pass
+        finally:
+            self.raiz.after(self.INTERVALO_MS, self._revisar_cola)
+
+    def _mostrar_estado(self, tarea, fraccion, mensaje):
+        texto = tarea.nombre if not mensaje else f"{tarea.nombre}: {mensaje}"
+        self.etiqueta.config(text=texto)
+        if fraccion is None:
+            self.barra.config(mode="indeterminate")
+            self.barra.start(15)
+        else:
+            self.barra.stop()
+            self.barra.config(mode="determinate", value=fraccion)
+        self.boton_cancelar.config(state="normal")
+
+    def _terminar(self, texto):
+        if self._activas:
+            # Todavía hay otra tarea corriendo: mostrar su estado
+            self._mostrar_estado(self._activas[-1], None, None)
+            return
+        self.barra.stop()
+        self.barra.config(mode="determinate", value=0)
+        self.etiqueta.config(text=texto)
+        self.boton_cancelar.config(state="disabled")
+
+    # Detener el pool al cerrar la aplicación (las tareas en curso se cancelan)
+    def cerrar(self):
+        for tarea in self._activas:
+            tarea.cancelar()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Las pruebas importan los módulos de la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nucleo
+import registros
+
+
+# Base de datos nueva, con el esquema al día, en un directorio temporal
+@pytest.fixture
+def db(tmp_path):
+    db = nucleo.abrir(str(tmp_path / "prueba.sqlite"))
+    yield db
+    db.cerrar()
+
+
+# Insertar taquizas (tuplas en el orden de COLUMNAS_GRILLA); devuelve sus rowid
+def insertar(db, filas):
+    with db.transaccion() as conexion:
+        return [registros.insertar_registro(conexion, fila) for fila in filas]
@@ -0,0 +1,73 @@
+import agenda
+from agenda import Agenda
+from asignaciones import guardar_colaboradores
+from conftest import insertar
+
+
+def _evento(nombre, fecha, horario, personas=40):
+    return (nombre, f"{fecha} 00:00:00", horario, personas, None, None, None, None)
+
+
+def test_conflictos_todos_los_pares():
+    a = Agenda()
+    a.agregar_evento(1, "2023-03-01", "10:00", 40, ["Juan"])
+    a.agregar_evento(2, "2023-03-01", "11:00", 40, ["Juan", "Ana"])
+    a.agregar_evento(3, "2023-03-01", "12:00", 40, ["Juan"])
+    # Empieza justo cuando termina el 1 (4 h de evento + 1 h de traslado)
+    a.agregar_evento(4, "2023-03-01", "15:00", 40, ["Ana"])
+    a.agregar_evento(5, "2023-03-02", "10:00", 40, ["Juan"])
+    assert sorted(a.conflictos()) == [
+        ("Ana", "2023-03-01", 2, 4),
+        ("Juan", "2023-03-01", 1, 2),
+        ("Juan", "2023-03-01", 1, 3),
+        ("Juan", "2023-03-01", 2, 3),
+    ]
+    assert a.conflictos_de(3, ["Juan", "Ana"]) == [("Juan", 1), ("Juan", 2), ("Ana", 2), ("Ana", 4)]
+    assert a.conflictos_de(5, ["Ana"]) == []
+
+
+def test_conflictos_despues_de_medianoche():
+    a = Agenda()
+    a.agregar_evento(1, "2023-03-01", "22:00", 40, ["Juan"])
+    a.agregar_evento(2, "2023-03-02", "01:00", 40, ["Juan"])
+    a.agregar_evento(3, "2023-03-02", "07:00", 40, ["Juan"])
+    assert a.conflictos() == [("Juan", "2023-03-02", 1, 2)]
+    assert not a.libre("Juan", 2)
+
+
+def test_sin_horario_ocupa_el_dia():
+    a = Agenda()
+    a.agregar_evento(1, "2023-03-01", None, 40, ["Juan"])
+    a.agregar_evento(2, "2023-03-01", "23:00", 40, ["Juan"])
+    assert a.conflictos() == [("Juan", "2023-03-01", 1, 2)]
+
+
+def test_proponer_con_la_plantilla(db):
+    rowids = insertar(db, [
+        _evento("Boda", "2023-03-01", "10:00:00.000000", 120),
+        _evento("XV años", "2023-03-01", "12:00:00.000000", 40),
+    ])
+    with db.transaccion() as conexion:
+        guardar_colaboradores(conexion, [("Juan", rowids[0])])
+        # Eva no tiene eventos en el rango pero está en la plantilla
+        conexion.executemany("INSERT INTO staff (nombre) VALUES (?)", [("Eva",), ("Luis",)])
+    with db.conexion() as conexion:
+        a = Agenda.leer(conexion, "2023-03-01", "2023-03-01")
+    assert a.plantilla == ["Eva", "Juan", "Luis"]
+    propuestas = a.proponer()
+    assert propuestas == [(rowids[0], ["Eva", "Luis"], 0), (rowids[1], [], 1)]
+    assert a.conflictos() == []
+
+
+def test_choques_en_cambios(db):
+    rowids = insertar(db, [
+        _evento("Boda", "2023-03-01", "22:00:00.000000"),
+        _evento("XV años", "2023-03-02", "00:30:00.000000"),
+        _evento("Bautizo", "2023-03-05", "12:00:00.000000"),
+    ])
+    with db.transaccion() as conexion:
+        guardar_colaboradores(conexion, [("Juan", rowids[0])])
+    with db.conexion() as conexion:
+        # El evento del día anterior también cuenta por cruzar la medianoche
+        assert agenda.choques_al_asignar(conexion, rowids[1], "juan y Ana") == [("Juan", rowids[0])]
+        assert agenda.choques_al_asignar(conexion, rowids[2], "Juan") == []
@@ -0,0 +1,41 @@
+import registros
+from cache import CacheResultados
+from conftest import insertar
+
+
+def test_version_datos_solo_por_eventos(db):
+    version = db.version_datos()
+    with db.transaccion() as conexion:
+        conexion.execute("INSERT OR REPLACE INTO recetas (tipo_evento, kg_pastor) VALUES ('Boda', 0.2)")
+    assert db.version_datos() == version
+    insertar(db, [("Ana", "2023-01-05 00:00:00", None, 40, None, None, None, None)])
+    assert db.version_datos() != version
+    version = db.version_datos()
+    with db.transaccion() as conexion:
+        conexion.execute("INSERT INTO staff (nombre) VALUES ('Luis')")
+    assert db.version_datos() != version
+
+
+def test_cache_por_version(db):
+    cache = CacheResultados(db, max_entradas=2)
+    calculos = []
+
+    def contar():
+        calculos.append(None)
+        with db.conexion() as conexion:
+            return registros.contar_registros(conexion)
+
+    assert cache.obtener("total", contar) == 0
+    assert cache.obtener("total", contar) == 0
+    assert len(calculos) == 1
+    # Una escritura en taquizas invalida la entrada
+    insertar(db, [("Ana", "2023-01-05 00:00:00", None, 40, None, None, None, None)])
+    assert cache.obtener("total", contar) == 1
+    assert len(calculos) == 2
+    assert (cache.aciertos, cache.fallos) == (1, 2)
+
+    # Sólo se guardan las max_entradas usadas más recientemente
+    cache.obtener("a", lambda: "a")
+    cache.obtener("b", lambda: "b")
+    cache.obtener("total", contar)
+    assert len(calculos) == 3
@@ -0,0 +1,32 @@
+import csv
+
+import exportacion
+import importacion
+import nucleo
+from conftest import insertar
+
+
+def test_exportar_e_importar_registros(db, tmp_path):
+    insertar(db, [
+        ("Ana", "2023-01-05 00:00:00", "14:30:00.000000", 40, "Calle 1", "Norte", "Boda", 1500),
+        ("Luis", "2023-01-06 00:00:00", None, 10, None, None, None, None),
+    ])
+    with db.transaccion() as conexion:
+        conexion.execute('UPDATE taquizas SET "Comentario" = \'Todo muy rico\', puestos_tacos = 2 WHERE id = 1')
+    ruta = str(tmp_path / "registros.csv")
+    assert exportacion.exportar(db, 'registros', ruta, tamano_lote=1) == 2
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        encabezado = next(csv.reader(archivo))
+    assert encabezado == ["ID", "Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas",
+                          "Direccion", "Zona", "Tipo de evento", "Costo", "Comentario", "puestos_tacos"]
+
+    # El archivo exportado se vuelve a importar sin perder columnas
+    otra = nucleo.abrir(str(tmp_path / "otra.sqlite"))
+    try:
+        insertados, rechazados, ignoradas = importacion.importar(otra, ruta)
+        assert (insertados, rechazados, ignoradas) == (2, [], ["ID"])
+        consulta = 'SELECT * FROM taquizas ORDER BY id'
+        with db.conexion() as conexion, otra.conexion() as conexion_otra:
+            assert conexion_otra.execute(consulta).fetchall() == conexion.execute(consulta).fetchall()
+    finally:
+        otra.cerrar()
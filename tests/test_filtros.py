@@ -0,0 +1,66 @@
+import pytest
+
+import filtros
+import registros
+from conftest import insertar
+from test_registros import FILAS
+
+
+def test_normalizar():
+    assert filtros.normalizar({'desde': " 2023-01-05 ", 'zona': "", 'personas_min': "10", 'otro': "x"}) == {
+        'desde': "2023-01-05", 'personas_min': 10}
+    for valores in ({'desde': "05/01/2023"}, {'personas_max': "diez"},
+                    {'desde': "2023-02-01", 'hasta': "2023-01-01"}, {'personas_min': "9", 'personas_max': "3"}):
+        with pytest.raises(ValueError):
+            filtros.normalizar(valores)
+
+
+def test_clausula_con_parametros():
+    filtro = {'desde': "2023-01-01", 'hasta': "2023-01-31", 'zona': "Norte",
+              'tipo_evento': "Boda", 'personas_min': 10, 'personas_max': 90}
+    sql, parametros = filtros.clausula(filtro, 't', extra=("t.id > 0",))
+    assert sql == (' WHERE t.id > 0 AND t."Fecha" >= ? AND t."Fecha" < date(?, \'+1 day\')'
+                   ' AND t."Zona" = ? AND t."Tipo de evento" = ?'
+                   ' AND t."Cantidad de personas" >= ? AND t."Cantidad de personas" <= ?')
+    assert parametros == ["2023-01-01", "2023-01-31", "Norte", "Boda", 10, 90]
+    assert filtros.clausula({}) == ("", [])
+    assert filtros.clausula(None, extra=("x = 1",)) == (" WHERE x = 1", [])
+
+
+def test_clausula_filtra_en_sqlite(db):
+    insertar(db, [
+        ("Ana", "2023-01-31 00:00:00", None, 40, None, "Norte", "Boda", 100),
+        ("Luis", "2023-02-01 00:00:00", None, 40, None, "Norte", "Boda", 100),
+        ("Eva", "2023-01-10 00:00:00", None, 40, None, "Norte' OR '1'='1", "Boda", 100),
+    ])
+    with db.conexion() as conexion:
+        def nombres(filtro):
+            sql, parametros = filtros.clausula(filtro)
+            return [fila[0] for fila in conexion.execute(
+                'SELECT "Nombre del solicitante" FROM taquizas' + sql + " ORDER BY 1", parametros)]
+
+        # 'hasta' incluye todo el último día
+        assert nombres({'desde': "2023-01-01", 'hasta': "2023-01-31", 'zona': "Norte"}) == ["Ana"]
+        # Los valores van como parámetros, nunca dentro del SQL
+        assert nombres({'zona': "Norte' OR '1'='1"}) == ["Eva"]
+
+
+def test_clave_y_describir():
+    filtro = {'zona': "Sur", 'desde': "2023-01-01"}
+    assert filtros.clave(filtro) == "desde=2023-01-01;zona=Sur"
+    assert filtros.clave(None) == ""
+    assert filtros.describir(filtro) == "fechas 2023-01-01 a …, zona Sur"
+
+
+def test_pagina_con_filtro_y_busqueda(db):
+    insertar(db, FILAS)
+    filtro = {'zona': "Sur", 'personas_min': 30}
+    busqueda = registros.consulta_busqueda("clien 3")
+    with db.conexion() as conexion:
+        esperados = [fila[0] for fila in conexion.execute(
+            'SELECT rowid FROM taquizas WHERE "Zona" = \'Sur\' AND "Cantidad de personas" >= 30 '
+            'AND "Nombre del solicitante" = \'Cliente 3\' ORDER BY "Costo" DESC, rowid DESC')]
+        assert esperados
+        pagina = registros.leer_pagina(conexion, 100, "Costo", True, busqueda=busqueda, filtro=filtro)
+        assert [fila[0] for fila in pagina] == esperados
+        assert registros.contar_registros(conexion, busqueda, filtro) == len(esperados)
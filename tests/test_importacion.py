@@ -0,0 +1,111 @@
+import csv
+
+import pytest
+
+import importacion
+
+ENCABEZADO = ("Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas", "Zona", "Costo")
+
+
+def _csv(ruta, filas, encabezado=ENCABEZADO):
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(encabezado)
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+def _esquema(db):
+    with db.conexion() as conexion:
+        return sorted(conexion.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'taquizas'").fetchall())
+
+
+def _contar(db):
+    with db.conexion() as conexion:
+        return conexion.execute("SELECT COUNT(*) FROM taquizas").fetchone()[0]
+
+
+def test_importar_con_rechazos(db, tmp_path):
+    ruta = _csv(tmp_path / "eventos.csv", [
+        ("Ana", "2023-01-05", "14:30", "40", "Norte", "$1,500"),
+        ("", "2023-01-06", "", "10", "", ""),
+        ("Luis", "31/02/2023", "", "10", "", ""),
+        ("Eva", "06/01/2023", "2:00 PM", "2.5", "", ""),
+        ("Pedro", "2023-01-07", "", "25", "Sur", ""),
+    ])
+    esquema = _esquema(db)
+    insertados, rechazados, ignoradas = importacion.importar(db, ruta, tamano_lote=2)
+    assert insertados == 2
+    assert ignoradas == []
+    assert [(numero, motivo) for numero, motivo, _ in rechazados] == [
+        (3, "Nombre del solicitante vacío"),
+        (4, "Fecha no reconocida: 31/02/2023"),
+        (5, "Cantidad de personas debe ser entero: 2.5"),
+    ]
+    with db.conexion() as conexion:
+        assert conexion.execute(
+            'SELECT "Nombre del solicitante", "Fecha", "Horario", "Costo" FROM taquizas ORDER BY id'
+        ).fetchall() == [("Ana", "2023-01-05 00:00:00", "14:30:00.000000", 1500),
+                         ("Pedro", "2023-01-07 00:00:00", None, None)]
+        # Las filas del último lote quedan en el índice de búsqueda
+        assert conexion.execute(
+            "SELECT rowid FROM busqueda_taquizas WHERE busqueda_taquizas MATCH 'pedro'").fetchall() == [(2,)]
+    # Los índices y el disparador de búsqueda se recrean después de la carga
+    assert _esquema(db) == esquema
+
+
+def test_importar_comentario_y_columnas_desconocidas(db, tmp_path):
+    ruta = _csv(tmp_path / "eventos.csv", [
+        ("Ana", "2023-01-05", "40", "Todo muy rico", "3", "llamar antes", "x"),
+        ("Luis", "2023-01-06", "10", "", "", "", ""),
+    ], encabezado=("Nombre del solicitante", "Fecha", "Cantidad de personas", "comentario",
+                   "Puestos_Tacos", "Notas", "Fecha"))
+    insertados, rechazados, ignoradas = importacion.importar(db, ruta)
+    assert (insertados, rechazados) == (2, [])
+    # Las columnas desconocidas o repetidas se informan en lugar de perderse sin aviso
+    assert ignoradas == ["Notas", "Fecha"]
+    with db.conexion() as conexion:
+        assert conexion.execute(
+            'SELECT "Nombre del solicitante", "Comentario", puestos_tacos FROM taquizas ORDER BY id'
+        ).fetchall() == [("Ana", "Todo muy rico", 3), ("Luis", None, 0)]
+        assert conexion.execute(
+            "SELECT rowid FROM busqueda_taquizas WHERE busqueda_taquizas MATCH 'rico'").fetchall() == [(1,)]
+
+
+def test_fila_que_falla_deshace_todo(db, tmp_path):
+    # Un número que SQLite no puede guardar hace fallar el segundo lote,
+    # después de insertar el primero y de quitar los índices
+    ruta = _csv(tmp_path / "eventos.csv", [
+        ("Ana", "2023-01-05", "", "40", "", ""),
+        ("Luis", "2023-01-06", "", "10", "", ""),
+        ("Eva", "2023-01-07", "", "10", "", "1" + "0" * 20),
+    ])
+    esquema = _esquema(db)
+    with pytest.raises(OverflowError):
+        importacion.importar(db, ruta, tamano_lote=2)
+    assert _contar(db) == 0
+    assert _esquema(db) == esquema
+
+
+def test_cancelar_deshace_todo(db, tmp_path):
+    ruta = _csv(tmp_path / "eventos.csv", [(f"Cliente {i}", "2023-01-05", "", "40", "", "") for i in range(5)])
+    lotes = []
+
+    def revisar_cancelacion():
+        lotes.append(None)
+        if len(lotes) == 3:
+            raise RuntimeError("cancelada")
+
+    esquema = _esquema(db)
+    with pytest.raises(RuntimeError):
+        importacion.importar(db, ruta, tamano_lote=2, revisar_cancelacion=revisar_cancelacion)
+    assert _contar(db) == 0
+    assert _esquema(db) == esquema
+
+
+def test_encabezado_incompleto(db, tmp_path):
+    ruta = tmp_path / "eventos.csv"
+    ruta.write_text("Nombre del solicitante,Zona\nAna,Norte\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Fecha"):
+        importacion.importar(db, str(ruta))
@@ -0,0 +1,70 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import insumos
+from asignaciones import INSUMOS, guardar_insumos
+from conftest import insertar
+from migraciones import RECETA_GENERAL
+
+
+def _evento(fecha, personas, tipo):
+    return ("Cliente", f"{fecha} 00:00:00", None, personas, None, None, tipo, None)
+
+
+def test_planificar_y_lista_compras(db):
+    rowids = insertar(db, [
+        _evento("2023-04-01", 100, "Boda"),
+        _evento("2023-04-01", 50, "XV años"),
+        _evento("2023-04-02", 20, None),
+        _evento("2023-04-03", 10, "Boda"),  # fuera del rango
+    ])
+    receta_boda = [0.2] + [0.0] * (len(INSUMOS) - 1)
+    capturados = [0.0] * len(INSUMOS)
+    capturados[INSUMOS.index('kg_pastor')] = 7.5
+    with db.transaccion() as conexion:
+        insumos.guardar_receta(conexion, "Boda", receta_boda)
+        guardar_insumos(conexion, [tuple(capturados) + (rowids[1],)])
+
+    with db.conexion() as conexion:
+        plan = insumos.planificar(conexion, "2023-04-01", "2023-04-02")
+    general = np.array([RECETA_GENERAL[insumo] for insumo in INSUMOS])
+    assert plan['rowids'].tolist() == rowids[:3]
+    assert plan['dias'].tolist() == ["2023-04-01", "2023-04-01", "2023-04-02"]
+    assert plan['faltantes'].tolist() == [True, False, True]
+    # Cada evento con la receta de su tipo (o la general)
+    assert np.allclose(plan['calculados'], np.round([np.array(receta_boda) * 100, general * 50, general * 20], 2))
+    assert np.allclose(plan['plan'], [np.array(receta_boda) * 100, capturados, np.round(general * 20, 2)])
+
+    compras = insumos.lista_compras(plan)
+    assert [fila[:3] for fila in compras] == [("2023-04-01", 2, 1), ("2023-04-02", 1, 1)]
+    assert np.allclose([fila[3:] for fila in compras],
+                       np.round([plan['plan'][0] + plan['plan'][1], plan['plan'][2]], 2))
+
+
+def test_lista_compras_vacia(db):
+    with db.conexion() as conexion:
+        plan = insumos.planificar(conexion, "2023-01-01", "2023-01-31")
+    assert plan['plan'].shape == (0, len(INSUMOS))
+    assert insumos.lista_compras(plan) == []
+
+
+def test_llenar_faltantes(db):
+    rowids = insertar(db, [_evento("2023-04-01", 100, None), _evento("2023-04-01", 50, None)])
+    capturados = [1.0] * len(INSUMOS)
+    with db.transaccion() as conexion:
+        guardar_insumos(conexion, [tuple(capturados) + (rowids[1],)])
+    insumos.llenar_faltantes(db, "2023-04-01", "2023-04-01")
+    with db.conexion() as conexion:
+        plan = insumos.planificar(conexion, "2023-04-01", "2023-04-01")
+    assert not plan['faltantes'].any()
+    assert np.allclose(plan['capturados'][0], [round(RECETA_GENERAL[insumo] * 100, 2) for insumo in INSUMOS])
+    assert np.allclose(plan['capturados'][1], capturados)
+
+
+def test_falta_receta_general(db):
+    with db.transaccion() as conexion:
+        conexion.execute("DELETE FROM recetas")
+    with db.conexion() as conexion:
+        with pytest.raises(ValueError):
+            insumos.planificar(conexion, "2023-01-01", "2023-01-31")
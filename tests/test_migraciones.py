@@ -0,0 +1,86 @@
+import sqlite3
+
+import base_datos
+import migraciones
+from migraciones import aplicar_migraciones, version_esquema, VERSION_ACTUAL
+
+# Tabla taquizas como estaba antes de las migraciones (la del archivo
+# original): sin llave id, con el comentario, los colaboradores en texto
+# libre y una columna por insumo
+ESQUEMA_ORIGINAL = """
+    CREATE TABLE "taquizas" (
+        "Nombre del solicitante" TEXT, "Fecha" TIMESTAMP, "Horario" TIME,
+        "Cantidad de personas" INTEGER, "Direccion" TEXT, "Zona" TEXT,
+        "Tipo de evento" TEXT, "Costo" INTEGER,
+        "Comentario" TEXT, colaboradores TEXT NULL,
+        kg_tortilla REAL DEFAULT 0, kg_queso REAL DEFAULT 0, kg_tortilla_harina REAL DEFAULT 0,
+        kg_bistek REAL DEFAULT 0, kg_chorizo REAL DEFAULT 0, kg_pastor REAL DEFAULT 0,
+        kg_cebolla REAL DEFAULT 0, kg_limones REAL DEFAULT 0, puestos_tacos INTEGER DEFAULT 0
+    )
+"""
+
+
+def _tablas(conexion):
+    return {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master")}
+
+
+def test_base_vacia(tmp_path):
+    db = base_datos.BaseDatos(str(tmp_path / "vacia.sqlite"))
+    try:
+        aplicadas = aplicar_migraciones(db)
+        assert aplicadas == [version for version, _, _ in migraciones.MIGRACIONES]
+        assert version_esquema(db) == VERSION_ACTUAL
+        with db.conexion() as conexion:
+            tablas = _tablas(conexion)
+            assert {"taquizas", "staff", "event_staff", "event_supplies", "recetas",
+                    "asignaciones_taquizas", "busqueda_taquizas", "revision_datos"} <= tablas
+            assert {"idx_taquizas_fecha", "idx_taquizas_zona", "idx_taquizas_tipo_evento"} <= tablas
+            # Las consultas por fecha se resuelven con el índice de cobertura
+            plan = " ".join(fila[3] for fila in conexion.execute(
+                'EXPLAIN QUERY PLAN SELECT TOTAL("Costo") FROM taquizas WHERE "Fecha" >= \'2023-01-01\''))
+            assert "COVERING INDEX idx_taquizas_fecha" in plan
+            assert conexion.execute("PRAGMA foreign_key_check").fetchall() == []
+        # Volver a abrirla no aplica nada
+        assert aplicar_migraciones(db) == []
+    finally:
+        db.cerrar()
+
+
+def test_base_original(tmp_path):
+    ruta = str(tmp_path / "original.sqlite")
+    conexion = sqlite3.connect(ruta)
+    conexion.execute(ESQUEMA_ORIGINAL)
+    conexion.executemany(
+        'INSERT INTO taquizas ("Nombre del solicitante", "Fecha", "Horario", "Cantidad de personas", '
+        '"Zona", "Comentario", colaboradores, kg_pastor, kg_limones) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [("José Martínez", "2023-05-01 00:00:00", "14:00:00.000000", 80, "Norte", "Sin cebolla", "JUAN PÉREZ, McAllen y luis", 9.5, 2.0),
+         ("Ana López", "2023-05-02 00:00:00", None, 30, "Sur", None, None, 0, 0),
+         ("Pedro Ruiz", "2023-05-03 00:00:00", "18:30:00.000000", 120, None, None, "Luis", 0, 0)])
+    conexion.execute("DELETE FROM taquizas WHERE rowid = 2")
+    conexion.commit()
+    conexion.close()
+
+    db = base_datos.BaseDatos(ruta)
+    try:
+        aplicar_migraciones(db)
+        assert version_esquema(db) == VERSION_ACTUAL
+        with db.conexion() as conexion:
+            columnas = {fila[1] for fila in conexion.execute('PRAGMA table_info("taquizas")')}
+            assert "id" in columnas and "Comentario" in columnas
+            assert not {"colaboradores", "kg_pastor"} & columnas
+            # Los rowid se conservan (el 2 se había borrado)
+            assert [fila[0] for fila in conexion.execute("SELECT id FROM taquizas ORDER BY id")] == [1, 3]
+            # Los nombres quedan como se escribieron; "Luis" y "luis" son la misma persona
+            assert conexion.execute("SELECT nombre FROM staff ORDER BY nombre").fetchall() == [
+                ("JUAN PÉREZ",), ("luis",), ("McAllen",)]
+            assert conexion.execute(
+                "SELECT rowid_taquiza, insumo, kg FROM event_supplies ORDER BY rowid_taquiza, insumo"
+            ).fetchall() == [(1, "limones", 2.0), (1, "pastor", 9.5)]
+            assert conexion.execute(
+                "SELECT rowid_taquiza, colaboradores, kg_pastor, kg_queso FROM asignaciones_taquizas ORDER BY 1"
+            ).fetchall() == [(1, "JUAN PÉREZ, McAllen, luis", 9.5, 0.0), (3, "luis", 0.0, 0.0)]
+            # El índice de búsqueda incluye las filas que ya existían
+            assert conexion.execute(
+                "SELECT rowid FROM busqueda_taquizas WHERE busqueda_taquizas MATCH 'jose'").fetchall() == [(1,)]
+    finally:
+        db.cerrar()
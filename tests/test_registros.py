@@ -0,0 +1,70 @@
+import pytest
+
+import registros
+from conftest import insertar
+from registros import COLUMNAS_GRILLA
+
+# Registros con valores repetidos y NULL en las columnas de orden
+FILAS = [
+    (f"Cliente {i % 7}", f"2023-{1 + i % 12:02d}-{1 + i % 5:02d} 00:00:00",
+     None if i % 4 == 0 else f"{10 + i % 9}:00:00.000000",
+     None if i % 6 == 0 else 20 + (i * 7) % 50,
+     None, None if i % 3 == 0 else ("Norte", "Sur", "Centro")[i % 3],
+     ("Boda", "XV años", None)[i % 3], None if i % 5 == 0 else 1000 * (i % 8))
+    for i in range(60)
+]
+
+
+# Rowid en el orden de la grilla, leídos con ORDER BY ... OFFSET
+def _oraculo(conexion, orden, descendente, limite, desplazamiento):
+    direccion = "DESC" if descendente else "ASC"
+    columna = "rowid" if orden == 'rowid' else f'"{orden}"'
+    return [fila[0] for fila in conexion.execute(
+        f"SELECT rowid FROM taquizas ORDER BY {columna} {direccion}, rowid {direccion} LIMIT ? OFFSET ?",
+        (limite, desplazamiento))]
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+@pytest.mark.parametrize("orden", ('rowid',) + COLUMNAS_GRILLA)
+def test_paginas_por_llave(db, orden, descendente):
+    insertar(db, FILAS)
+    limite = 7
+    with db.conexion() as conexion:
+        # Hacia adelante, página por página desde el principio
+        paginas = []
+        llave = None
+        while True:
+            pagina = registros.leer_pagina(conexion, limite, orden, descendente, despues_de=llave)
+            if not pagina:
+                break
+            paginas.append([fila[0] for fila in pagina])
+            llave = registros.llave_de_fila(pagina[-1], orden)
+        assert paginas == [_oraculo(conexion, orden, descendente, limite, i * limite)
+                           for i in range(len(paginas))]
+        assert sum(map(len, paginas)) == len(FILAS)
+
+        # Hacia atrás desde el final
+        todos = _oraculo(conexion, orden, descendente, -1, 0)
+        ultima = registros.leer_registro(conexion, todos[-1])
+        llave = registros.llave_de_fila(ultima, orden)
+        hacia_atras = [todos[-1]]
+        while True:
+            pagina = registros.leer_pagina(conexion, limite, orden, descendente, antes_de=llave)
+            if not pagina:
+                break
+            hacia_atras[:0] = [fila[0] for fila in pagina]
+            llave = registros.llave_de_fila(pagina[0], orden)
+        assert hacia_atras == todos
+
+        # Saltar a una posición lejana y seguir desde ahí
+        for posicion in (0, 13, len(FILAS) - 1):
+            llave = registros.llave_en_posicion(conexion, posicion, orden, descendente)
+            assert llave[1] == todos[posicion]
+            pagina = registros.leer_pagina(conexion, limite, orden, descendente, despues_de=llave)
+            assert [fila[0] for fila in pagina] == todos[posicion + 1:posicion + 1 + limite]
+
+
+def test_orden_desconocido(db):
+    with db.conexion() as conexion:
+        with pytest.raises(ValueError):
+            registros.leer_pagina(conexion, 10, 'rowid; DROP TABLE taquizas')
@@ -0,0 +1,66 @@
+import csv
+import json
+
+import nucleo
+import reportes
+from conftest import insertar
+
+
+def _leer_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        return list(csv.reader(archivo))
+
+
+def _base(tmp_path):
+    ruta = str(tmp_path / "reportes.sqlite")
+    db = nucleo.abrir(ruta)
+    try:
+        insertar(db, [
+            ("Ana", "2023-01-05 00:00:00", None, 40, None, "Norte", "Boda", 1500),
+            ("Luis", "2023-01-20 00:00:00", None, 60, None, "Norte", "XV años", 2500),
+            ("Eva", "2023-02-02 00:00:00", None, 30, None, "Sur", "Boda", None),
+            ("Pedro", "2023-02-10 00:00:00", None, 25, None, None, None, 800),
+        ])
+    finally:
+        db.cerrar()
+    return ruta
+
+
+def test_reporte_estadisticas(tmp_path):
+    ruta = _base(tmp_path)
+    salida = tmp_path / "salida"
+    assert reportes.main(["--db", ruta, "--salida", str(salida), "--reportes", "estadisticas"]) == 0
+
+    assert _leer_csv(salida / "estadisticas_zona.csv") == [
+        ["Zona", "Cantidad de Eventos", "Total de Personas", "Suma de Costos"],
+        ["Norte", "2", "100", "4000"],
+        ["Sur", "1", "30", "0"],
+    ]
+    assert _leer_csv(salida / "estadisticas_mes.csv")[1:] == [["2023-01", "2", "100", "4000"],
+                                                              ["2023-02", "2", "55", "800"]]
+    assert len(_leer_csv(salida / "estadisticas_tipo_evento.csv")) == 3
+
+    with open(salida / "resumen.json", encoding="utf-8") as archivo:
+        resumen = json.load(archivo)
+    assert list(resumen["reportes"]) == ["estadisticas"]
+    resultado = resumen["reportes"]["estadisticas"]
+    assert resultado["estado"] == "ok"
+    assert sorted(resultado["archivos"]) == ["estadisticas_mes.csv", "estadisticas_tipo_evento.csv",
+                                             "estadisticas_zona.csv"]
+    assert resultado["resumen"] == {"estadisticas_zona": 2, "estadisticas_tipo_evento": 2, "estadisticas_mes": 2}
+
+
+def test_reporte_con_error(tmp_path, monkeypatch):
+    def fallar(db, **_):
+        raise RuntimeError("sin datos")
+
+    monkeypatch.setitem(nucleo.REPORTES, "falla", fallar)
+    ruta = _base(tmp_path)
+    salida = tmp_path / "salida"
+    # Un reporte que falla queda en el resumen sin detener a los demás
+    assert reportes.main(["--db", ruta, "--salida", str(salida), "--reportes", "falla", "estadisticas"]) == 1
+    with open(salida / "resumen.json", encoding="utf-8") as archivo:
+        resultados = json.load(archivo)["reportes"]
+    assert resultados["falla"] == {"estado": "error", "error": "RuntimeError: sin datos",
+                                   "segundos": resultados["falla"]["segundos"]}
+    assert resultados["estadisticas"]["estado"] == "ok"
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import quote
+
+import pytest
+
+import registros
+from servidor import ErrorHttp, Escritor, Servidor
+
+EVENTO = {"Nombre del solicitante": "Ana", "Fecha": "2023-01-05", "Horario": "14:30",
+          "Cantidad de personas": 40, "Zona": "Norte", "Costo": 1500}
+
+
+# Correr `prueba(servidor)` con el escritor único en marcha, como en servir()
+def _correr(db, prueba):
+    async def principal():
+        servidor = Servidor(db, lectores=2)
+        servidor.escritor = Escritor(db, asyncio.get_running_loop())
+        try:
+            return await prueba(servidor)
+        finally:
+            servidor.escritor.cerrar()
+            servidor._lectores.shutdown()
+    return asyncio.run(principal())
+
+
+def _cuerpo(datos):
+    return json.dumps(datos).encode("utf-8")
+
+
+def test_rutas(db):
+    async def prueba(servidor):
+        estado, creado = await servidor.despachar("POST", "/eventos", _cuerpo(EVENTO))
+        assert estado == HTTPStatus.CREATED
+        assert creado["Nombre del solicitante"] == "Ana" and creado["Horario"] == "14:30:00.000000"
+        ruta = f"/eventos/{creado['id']}"
+
+        assert await servidor.despachar("GET", ruta, b"") == (HTTPStatus.OK, creado)
+        estado, modificado = await servidor.despachar("PUT", ruta, _cuerpo(dict(EVENTO, Costo=2000)))
+        assert estado == HTTPStatus.OK and modificado["Costo"] == 2000
+
+        await servidor.despachar("POST", "/eventos", _cuerpo(dict(EVENTO, Fecha="2023-01-01")))
+        estado, pagina = await servidor.despachar("GET", "/eventos?limite=1&orden=Fecha&desc=1", b"")
+        assert estado == HTTPStatus.OK
+        assert [e["id"] for e in pagina["eventos"]] == [creado["id"]]
+        assert pagina["siguiente"] == ("2023-01-05 00:00:00", creado["id"])
+        despues = quote(json.dumps(pagina["siguiente"]))
+        _, pagina = await servidor.despachar("GET", f"/eventos?limite=1&orden=Fecha&desc=1&despues={despues}", b"")
+        assert [e["Fecha"] for e in pagina["eventos"]] == ["2023-01-01 00:00:00"]
+
+        assert await servidor.despachar("DELETE", ruta, b"") == (HTTPStatus.NO_CONTENT, None)
+        for metodo, cuerpo in (("GET", b""), ("PUT", _cuerpo(EVENTO)), ("DELETE", b"")):
+            with pytest.raises(ErrorHttp) as error:
+                await servidor.despachar(metodo, ruta, cuerpo)
+            assert error.value.estado == HTTPStatus.NOT_FOUND
+    _correr(db, prueba)
+
+
+@pytest.mark.parametrize("metodo, ruta, cuerpo, estado", [
+    ("GET", "/otra", b"", HTTPStatus.NOT_FOUND),
+    ("GET", "/eventos/abc", b"", HTTPStatus.NOT_FOUND),
+    ("PATCH", "/eventos", b"", HTTPStatus.METHOD_NOT_ALLOWED),
+    ("POST", "/eventos", b"{no es json", HTTPStatus.BAD_REQUEST),
+    ("GET", "/eventos?orden=Comentario", b"", HTTPStatus.BAD_REQUEST),
+    ("POST", "/eventos", _cuerpo({"Nombre del solicitante": "Ana"}), HTTPStatus.UNPROCESSABLE_ENTITY),
+    ("POST", "/eventos", _cuerpo(dict(EVENTO, Fecha="ayer")), HTTPStatus.UNPROCESSABLE_ENTITY),
+    ("PUT", "/eventos/1", _cuerpo(dict(EVENTO, **{"Cantidad de personas": 0})), HTTPStatus.UNPROCESSABLE_ENTITY),
+])
+def test_errores(db, metodo, ruta, cuerpo, estado):
+    async def prueba(servidor):
+        with pytest.raises(ErrorHttp) as error:
+            await servidor.despachar(metodo, ruta, cuerpo)
+        assert error.value.estado == estado
+    _correr(db, prueba)
+    with db.conexion() as conexion:
+        assert registros.contar_registros(conexion) == 0
+
+
+def test_lote_con_una_escritura_fallida(db):
+    valores = tuple(EVENTO.get(c) for c in registros.COLUMNAS_GRILLA)
+
+    def insertar(nombre):
+        return lambda conexion: registros.insertar_registro(conexion, (nombre,) + valores[1:])
+
+    def insertar_y_fallar(conexion):
+        registros.insertar_registro(conexion, ("Falla",) + valores[1:])
+        raise ValueError("pedido inválido")
+
+    async def prueba(servidor):
+        escritor = servidor.escritor
+        # Mientras se tiene el candado el hilo escritor no puede tomar
+        # pedidos, así los tres llegan en el mismo lote y la misma transacción
+        with escritor._hay_pedidos:
+            futuros = [escritor.escribir(insertar("Ana")), escritor.escribir(insertar_y_fallar),
+                       escritor.escribir(insertar("Luis"))]
+        resultados = await asyncio.gather(*futuros, return_exceptions=True)
+        assert isinstance(resultados[1], ValueError)
+        return resultados
+    resultados = _correr(db, prueba)
+    with db.conexion() as conexion:
+        # El SAVEPOINT deshizo sólo la escritura que falló
+        assert conexion.execute('SELECT id, "Nombre del solicitante" FROM taquizas ORDER BY id').fetchall() == [
+            (resultados[0], "Ana"), (resultados[2], "Luis")]